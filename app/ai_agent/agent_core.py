@@ -15,6 +15,7 @@ from models import (
     Expense, InventoryMovement
 )
 from sqlalchemy import func
+from sale_service import SaleService
 
 
 @tool
@@ -175,59 +176,22 @@ def add_new_sale(
         db.add(variety)
         db.flush()
     
-    # Calculate values
-    qty_decimal = Decimal(str(quantity))
-    total_cost = Decimal(str(cost_price))
-    total_selling = Decimal(str(selling_price))
-    cost_per_unit = total_cost / qty_decimal
-    selling_per_unit = total_selling / qty_decimal
-    profit = total_selling - total_cost
-    
-    # Auto-create inventory if needed
-    supplier_inv = db.query(SupplierInventory).filter(
-        SupplierInventory.variety_id == variety.id,
-        SupplierInventory.quantity_remaining >= qty_decimal,
-        SupplierInventory.tenant_id == tenant_id
-    ).first()
-    
-    if not supplier_inv:
-        supplier_inv = SupplierInventory(
-            tenant_id=tenant_id,
-            supplier_name="Auto-Generated",
-            variety_id=variety.id,
-            quantity=qty_decimal,
-            price_per_item=cost_per_unit,
-            total_amount=total_cost,
-            supply_date=date.fromisoformat(sale_date) if sale_date else date.today(),
-            quantity_remaining=qty_decimal
-        )
-        db.add(supplier_inv)
-        db.flush()
-    
-    # Create sale
-    sale = Sale(
-        tenant_id=tenant_id,
+    # Allocate stock FIFO, record sale + movement in one transaction (one commit)
+    recorded = SaleService.record_sale(
+        db, tenant_id, variety,
+        quantity=Decimal(str(quantity)),
+        total_cost=Decimal(str(cost_price)),
+        total_selling=Decimal(str(selling_price)),
         salesperson_name=salesperson_name,
-        variety_id=variety.id,
-        quantity=qty_decimal,
-        selling_price=selling_per_unit,
-        cost_price=cost_per_unit,
-        profit=profit,
         sale_date=date.fromisoformat(sale_date) if sale_date else date.today(),
-        supplier_inventory_id=supplier_inv.id
+        auto_supplier_name="Auto-Generated",
+        movement_notes=f'Sale by {salesperson_name} (assistant)'
     )
-    
-    # Update inventory
-    supplier_inv.quantity_used += qty_decimal
-    supplier_inv.quantity_remaining -= qty_decimal
-    
-    db.add(sale)
-    db.commit()
-    db.refresh(sale)
+    profit = recorded["profit"]
     
     return {
         "success": True,
-        "sale_id": sale.id,
+        "sale_id": recorded["sale_id"],
         "message": f"Sale recorded: {quantity} {variety_name} for PKR {selling_price}",
         "profit": float(profit)
     }
@@ -499,8 +463,8 @@ Remember: You are a helpful assistant that can both answer questions AND take ac
 
 
 # --------------- AGENT CLASS -----------------
-from langchain.chat_models import init_chat_model
 from langchain.agents import create_agent
+from llm_clients import LLMClients
 
 
 
@@ -509,7 +473,10 @@ class SalesManagerAgent:
     
     def __init__(self):
         """Initialize the agent with specified model"""
-        self.model = init_chat_model("google_genai:gemini-2.5-flash")
+        # Shared with the rest of the process (see llm_clients.py)
+        self.model = LLMClients.get("agent")
+        if self.model is None:
+            raise RuntimeError("AI agent unavailable: GOOGLE_API_KEY not configured or LangChain not installed")
         
         # Define all available tools
         self.tools = [
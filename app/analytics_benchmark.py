@@ -0,0 +1,183 @@
+# app/analytics_benchmark.py - Old (pure Python) vs new (NumPy) AnalyticsEngine primitives
+#
+# Usage (from app/):
+#   python analytics_benchmark.py                    # 10k, 100k, 1M points
+#   python analytics_benchmark.py --sizes 10000 50000
+#
+# Every run first checks that the NumPy versions match the reference
+# implementations (within float tolerance) on random series, then times both.
+
+import sys
+import time
+import random
+from datetime import date, timedelta
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import numpy as np
+from analytics_engine import AnalyticsEngine
+
+
+# ==================== REFERENCE (PREVIOUS) IMPLEMENTATIONS ====================
+
+def reference_moving_average(data: List[float], window: int = 7) -> List[float]:
+    if len(data) < window:
+        return data
+
+    result = []
+    for i in range(len(data)):
+        if i < window - 1:
+            result.append(data[i])
+        else:
+            result.append(sum(data[i - window + 1:i + 1]) / window)
+    return result
+
+
+def reference_exponential_moving_average(data: List[float], alpha: float = 0.3) -> List[float]:
+    if not data:
+        return []
+
+    ema = [data[0]]
+    for value in data[1:]:
+        ema.append(alpha * value + (1 - alpha) * ema[-1])
+    return ema
+
+
+def reference_linear_regression(x: List[float], y: List[float], future_periods: int):
+    n = len(x)
+    x_mean = sum(x) / n
+    y_mean = sum(y) / n
+
+    numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(n))
+    denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
+    if denominator == 0:
+        return [y_mean] * future_periods, 0.0
+
+    slope = numerator / denominator
+    intercept = y_mean - slope * x_mean
+
+    y_pred = [slope * x[i] + intercept for i in range(n)]
+    ss_res = sum((y[i] - y_pred[i]) ** 2 for i in range(n))
+    ss_tot = sum((y[i] - y_mean) ** 2 for i in range(n))
+    r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+
+    return [max(0, slope * (n + i) + intercept) for i in range(future_periods)], r_squared
+
+
+def reference_seasonality_pattern(data: List[Dict]) -> Dict:
+    period_data = defaultdict(list)
+    for item in data:
+        date_obj = item["date"]
+        period_data[date_obj.weekday()].append(float(item.get("value") or item.get("revenue", 0)))
+
+    pattern, std_pattern = {}, {}
+    for day, values in period_data.items():
+        pattern[day] = sum(values) / len(values)
+        variance = sum((v - pattern[day]) ** 2 for v in values) / len(values)
+        std_pattern[day] = variance ** 0.5
+    return {"pattern": pattern, "std": std_pattern}
+
+
+# ==================== HELPERS ====================
+
+def random_series(size: int, seed: int = 42) -> List[float]:
+    rng = random.Random(seed)
+    return [max(0.0, 1000 + 5 * i * 0.001 + rng.gauss(0, 150)) for i in range(size)]
+
+
+def random_daily_data(values: List[float]) -> List[Dict]:
+    start = date(2020, 1, 1)
+    return [{"date": start + timedelta(days=i), "revenue": v} for i, v in enumerate(values)]
+
+
+def timed(func: Callable, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def check_equivalence(size: int):
+    """Raise AssertionError if new and reference results differ"""
+    values = random_series(size, seed=size)
+    x = list(range(size))
+
+    assert np.allclose(AnalyticsEngine.calculate_moving_average(values, 7), reference_moving_average(values, 7))
+    assert np.allclose(
+        AnalyticsEngine.exponential_moving_average(values, 0.3),
+        reference_exponential_moving_average(values, 0.3)
+    )
+
+    new_pred, new_r2 = AnalyticsEngine.linear_regression_forecast_basic(x, values, 30)
+    ref_pred, ref_r2 = reference_linear_regression(x, values, 30)
+    assert np.allclose(new_pred, ref_pred) and np.isclose(new_r2, ref_r2)
+
+    # Seasonality needs two full weeks; compare the per-weekday means / stds (rounded to 2dp)
+    if size < 14:
+        return
+
+    daily = random_daily_data(values)
+    new_season = AnalyticsEngine.calculate_seasonality(daily)
+    ref_season = reference_seasonality_pattern(daily)
+    days_map = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    ref_pattern = {days_map[k]: round(v, 2) for k, v in ref_season["pattern"].items()}
+    ref_std = {days_map[k]: round(v, 2) for k, v in ref_season["std"].items()}
+    assert list(new_season["pattern"]) == list(ref_pattern)
+    assert np.allclose(list(new_season["pattern"].values()), list(ref_pattern.values()), atol=0.011)
+    assert np.allclose(list(new_season["std_deviation"].values()), list(ref_std.values()), atol=0.011)
+
+
+def benchmark(size: int) -> List[Dict]:
+    values = random_series(size)
+    array = np.asarray(values)
+    x = list(range(size))
+    daily = random_daily_data(values)
+
+    cases = [
+        ("moving_average",
+         lambda: reference_moving_average(values, 7),
+         lambda: AnalyticsEngine.calculate_moving_average(array, 7)),
+        ("exponential_moving_average",
+         lambda: reference_exponential_moving_average(values, 0.3),
+         lambda: AnalyticsEngine.exponential_moving_average(array, 0.3)),
+        ("linear_regression_basic",
+         lambda: reference_linear_regression(x, values, 30),
+         lambda: AnalyticsEngine.linear_regression_forecast_basic(np.arange(size), array, 30)),
+        ("seasonality",
+         lambda: reference_seasonality_pattern(daily),
+         lambda: AnalyticsEngine.calculate_seasonality(daily)),
+    ]
+
+    rows = []
+    for name, old, new in cases:
+        old_seconds = timed(old)
+        new_seconds = timed(new)
+        rows.append({
+            "name": name,
+            "size": size,
+            "old_ms": old_seconds * 1000,
+            "new_ms": new_seconds * 1000,
+            "speedup": old_seconds / new_seconds if new_seconds else float("inf")
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark NumPy analytics primitives against the pure-Python versions")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print("🔎 Checking equivalence...")
+    for size in (2, 7, 8, 100, 10_000):
+        try:
+            check_equivalence(size)
+        except AssertionError:
+            print(f"❌ NumPy results differ from reference at size {size}")
+            sys.exit(1)
+    print("✅ NumPy results match the reference implementations\n")
+
+    print(f"{'primitive':<28} {'points':>10} {'old ms':>12} {'new ms':>10} {'speedup':>9}")
+    for size in args.sizes:
+        for row in benchmark(size):
+            print(f"{row['name']:<28} {row['size']:>10} {row['old_ms']:>12.1f} {row['new_ms']:>10.1f} {row['speedup']:>8.1f}x")
@@ -3,62 +3,186 @@
 from datetime import datetime, timedelta, date
 from typing import List, Dict, Tuple, Optional
 from decimal import Decimal
-from collections import defaultdict
-import numpy as np
-import pandas as pd
+import math
+import threading
 
-# Try to import sklearn - use advanced ML if available
-try:
-    from sklearn.linear_model import LinearRegression
-    from sklearn.preprocessing import PolynomialFeatures
-    from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
-    print("⚠️ Warning: scikit-learn not installed. Using basic linear regression.")
+# Heavy numeric / ML libraries are imported on FIRST USE, not at module import.
+# Importing them here used to add seconds to every worker boot, even when no
+# forecast was ever requested. Call _ensure_sklearn() / _ensure_prophet() before use.
+np = None
+pd = None
+LinearRegression = PolynomialFeatures = None
+r2_score = mean_absolute_error = mean_squared_error = None
+Prophet = None
 
-# NEW: Try to import Prophet for time series forecasting
-try:
-    from prophet import Prophet
-    import warnings
-    warnings.filterwarnings('ignore', category=FutureWarning)
-    PROPHET_AVAILABLE = True
-    print("✅ Prophet available for advanced time series forecasting")
-except ImportError:
-    PROPHET_AVAILABLE = False
-    print("⚠️ Warning: Prophet not installed. Using fallback regression.")
-    print("   Install with: pip install prophet")
+SKLEARN_AVAILABLE = False
+PROPHET_AVAILABLE = False
+
+_sklearn_loaded = False
+_prophet_loaded = False
+_lfilter = None
+_lfilter_loaded = False
+_import_lock = threading.Lock()
+
+
+def _ensure_numpy():
+    """Import numpy once"""
+    global np
+
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+def _get_lfilter():
+    """scipy.signal.lfilter (ships with scikit-learn) or None if scipy is missing"""
+    global _lfilter, _lfilter_loaded
+
+    if not _lfilter_loaded:
+        try:
+            from scipy.signal import lfilter
+            _lfilter = lfilter
+        except ImportError:
+            _lfilter = None
+        _lfilter_loaded = True
+    return _lfilter
+
+
+def _ensure_sklearn() -> bool:
+    """Import numpy + scikit-learn once; returns SKLEARN_AVAILABLE"""
+    global LinearRegression, PolynomialFeatures, r2_score, mean_absolute_error, mean_squared_error
+    global SKLEARN_AVAILABLE, _sklearn_loaded
+
+    if _sklearn_loaded:
+        return SKLEARN_AVAILABLE
+
+    with _import_lock:
+        if _sklearn_loaded:
+            return SKLEARN_AVAILABLE
+
+        _ensure_numpy()
+
+        # Try to import sklearn - use advanced ML if available
+        try:
+            from sklearn.linear_model import LinearRegression as _LinearRegression
+            from sklearn.preprocessing import PolynomialFeatures as _PolynomialFeatures
+            from sklearn import metrics
+            LinearRegression = _LinearRegression
+            PolynomialFeatures = _PolynomialFeatures
+            r2_score = metrics.r2_score
+            mean_absolute_error = metrics.mean_absolute_error
+            mean_squared_error = metrics.mean_squared_error
+            SKLEARN_AVAILABLE = True
+        except ImportError:
+            SKLEARN_AVAILABLE = False
+            print("⚠️ Warning: scikit-learn not installed. Using basic linear regression.")
+
+        _sklearn_loaded = True
+        return SKLEARN_AVAILABLE
+
+
+def _ensure_prophet() -> bool:
+    """Import pandas + Prophet once (plus numpy / sklearn metrics); returns PROPHET_AVAILABLE"""
+    global pd, Prophet, PROPHET_AVAILABLE, _prophet_loaded
+
+    if _prophet_loaded:
+        return PROPHET_AVAILABLE
+
+    _ensure_sklearn()
+
+    with _import_lock:
+        if _prophet_loaded:
+            return PROPHET_AVAILABLE
+
+        import pandas
+        pd = pandas
+
+        # Try to import Prophet for time series forecasting
+        try:
+            from prophet import Prophet as _Prophet
+            import warnings
+            warnings.filterwarnings('ignore', category=FutureWarning)
+            Prophet = _Prophet
+            PROPHET_AVAILABLE = True
+            print("✅ Prophet available for advanced time series forecasting")
+        except ImportError:
+            PROPHET_AVAILABLE = False
+            print("⚠️ Warning: Prophet not installed. Using fallback regression.")
+            print("   Install with: pip install prophet")
+
+        _prophet_loaded = True
+        return PROPHET_AVAILABLE
 
 
 class AnalyticsEngine:
     """Advanced Machine Learning and Statistical Analysis Engine"""
     
     @staticmethod
-    def calculate_moving_average(data: List[float], window: int = 7) -> List[float]:
-        """Calculate simple moving average"""
+    def calculate_moving_average(data, window: int = 7) -> List[float]:
+        """
+        Calculate simple moving average (list or numpy array in)
+        The first window-1 points are passed through unchanged
+        """
         if len(data) < window:
-            return data
+            return list(data)
         
-        result = []
-        for i in range(len(data)):
-            if i < window - 1:
-                result.append(data[i])
-            else:
-                avg = sum(data[i-window+1:i+1]) / window
-                result.append(avg)
-        return result
+        _ensure_numpy()
+        values = np.asarray(data, dtype=float)
+        
+        # Window sums from one cumulative sum: O(n) instead of O(n * window)
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        result = values.copy()
+        result[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+        return result.tolist()
     
     @staticmethod
-    def exponential_moving_average(data: List[float], alpha: float = 0.3) -> List[float]:
-        """Calculate exponential moving average"""
-        if not data:
+    def exponential_moving_average(data, alpha: float = 0.3) -> List[float]:
+        """Calculate exponential moving average: ema[i] = alpha * x[i] + (1 - alpha) * ema[i-1]"""
+        if len(data) == 0:
             return []
         
-        ema = [data[0]]
-        for value in data[1:]:
+        _ensure_numpy()
+        values = np.asarray(data, dtype=float)
+        
+        lfilter = _get_lfilter()
+        if lfilter is not None:
+            # First-order IIR filter; initial state makes ema[0] == x[0]
+            ema, _ = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1 - alpha) * values[0]])
+            return ema.tolist()
+        
+        ema = [float(values[0])]
+        for value in values[1:].tolist():
             ema.append(alpha * value + (1 - alpha) * ema[-1])
         return ema
     
+    @staticmethod
+    def least_squares(x, y) -> Optional[Tuple[float, float, float]]:
+        """
+        Closed-form simple linear regression: (slope, intercept, r_squared)
+        Returns None if x has no variance
+        """
+        _ensure_numpy()
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        
+        x_centered = x - x.mean()
+        y_mean = y.mean()
+        
+        denominator = float(np.dot(x_centered, x_centered))
+        if denominator == 0:
+            return None
+        
+        slope = float(np.dot(x_centered, y - y_mean)) / denominator
+        intercept = float(y_mean) - slope * float(x.mean())
+        
+        residuals = y - (slope * x + intercept)
+        ss_res = float(np.dot(residuals, residuals))
+        ss_tot = float(np.dot(y - y_mean, y - y_mean))
+        r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+        
+        return slope, intercept, r_squared
+    
     # 🆕 NEW: Facebook Prophet Time Series Forecasting (Generic)
     @staticmethod
     def forecast_timeseries_prophet(historical_data: List[Dict], days_ahead: int = 30, 
@@ -71,7 +195,7 @@ class AnalyticsEngine:
                         OR [{"date": "2024-01-01", "quantity": 50}, ...]
         value_column: "revenue" or "quantity" - what to predict
         """
-        if not PROPHET_AVAILABLE:
+        if not _ensure_prophet():
             print("⚠️ Prophet not available, falling back to sklearn")
             return AnalyticsEngine.forecast_sklearn_fallback(historical_data, days_ahead, value_column)
         
@@ -237,6 +361,75 @@ class AnalyticsEngine:
             historical_data, days_ahead, value_column="quantity"
         )
     
+    # Batch fallback for sparse demand series (ProductDemandPredictor batch endpoint)
+    @staticmethod
+    def forecast_sparse_demand_batch(series: Dict[int, List[Dict]], start_date: date,
+                                     end_date: date, days_ahead: int = 30) -> Dict[int, Dict]:
+        """
+        Fast demand forecast for many sparse series at once (too few sale days for Prophet)
+        Each variety's demand is treated as a constant daily rate: the mean over the whole
+        window with no-sale days counted as zero. One matrix, one pass - no model fitting.
+        
+        series: {variety_id: [{"date": "2024-01-01", "quantity": 5.0}, ...]}
+        """
+        if not series:
+            return {}
+        
+        _ensure_numpy()
+        
+        window = (end_date - start_date).days + 1
+        variety_ids = list(series)
+        
+        # Rows = varieties, columns = days in the window (zero-filled)
+        matrix = np.zeros((len(variety_ids), window))
+        for row, variety_id in enumerate(variety_ids):
+            for item in series[variety_id]:
+                item_date = item["date"]
+                if isinstance(item_date, str):
+                    item_date = datetime.strptime(item_date, "%Y-%m-%d").date()
+                matrix[row, (item_date - start_date).days] = item["quantity"]
+        
+        rates = matrix.mean(axis=1)
+        lower = np.maximum(rates - 1.96 * matrix.std(axis=1), 0)
+        upper = rates + 1.96 * matrix.std(axis=1)
+        sale_days = np.count_nonzero(matrix, axis=1)
+        
+        forecast_dates = [
+            (end_date + timedelta(days=i)).strftime("%Y-%m-%d")
+            for i in range(1, days_ahead + 1)
+        ]
+        
+        results = {}
+        for row, variety_id in enumerate(variety_ids):
+            # Whole units, like the Prophet path
+            predicted = int(round(float(rates[row])))
+            forecast_data = [
+                {
+                    "date": forecast_date,
+                    "predicted_quantity": predicted,
+                    "lower_bound": round(float(lower[row]), 2),
+                    "upper_bound": round(float(upper[row]), 2),
+                    "confidence_level": "low"
+                }
+                for forecast_date in forecast_dates
+            ]
+            
+            results[variety_id] = {
+                "forecast": forecast_data,
+                "confidence": "low",
+                "r_squared": 0,
+                "total_predicted": predicted * days_ahead,
+                "avg_daily_predicted": predicted,
+                "model_info": {
+                    "type": "sparse_mean_rate",
+                    "sale_days": int(sale_days[row]),
+                    "using_prophet": False
+                },
+                "message": f"Only {int(sale_days[row])} days with sales - forecast uses the average daily rate"
+            }
+        
+        return results
+    
     # 🔧 UPDATED: Main forecast method now uses Prophet by default
     @staticmethod
     def forecast_revenue(historical_data: List[Dict], days_ahead: int = 30,
@@ -262,7 +455,7 @@ class AnalyticsEngine:
             }
         
         # 🆕 TRY PROPHET FIRST (best for time series)
-        if PROPHET_AVAILABLE and use_advanced:
+        if use_advanced and _ensure_prophet():
             return AnalyticsEngine.forecast_revenue_prophet(historical_data, days_ahead)
         
         # FALLBACK TO SKLEARN
@@ -307,7 +500,7 @@ class AnalyticsEngine:
             y_smoothed = y
         
         # Use polynomial if sklearn available
-        if SKLEARN_AVAILABLE:
+        if _ensure_sklearn():
             X = np.array(x).reshape(-1, 1)
             y_array = np.array(y_smoothed)
             
@@ -384,39 +577,23 @@ class AnalyticsEngine:
         }
     
     @staticmethod
-    def linear_regression_forecast_basic(x: List[float], y: List[float], 
-                                        future_periods: int) -> Tuple[List[float], float]:
+    def linear_regression_forecast_basic(x, y, future_periods: int) -> Tuple[List[float], float]:
         """Basic linear regression (last resort fallback)"""
         n = len(x)
         if n < 2:
-            return [y[-1]] * future_periods if y else [0] * future_periods, 0.0
+            return [y[-1]] * future_periods if len(y) else [0] * future_periods, 0.0
         
-        x_mean = sum(x) / n
-        y_mean = sum(y) / n
+        fit = AnalyticsEngine.least_squares(x, y)
+        if fit is None:
+            return [float(np.mean(y))] * future_periods, 0.0
         
-        numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(n))
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
-        
-        if denominator == 0:
-            return [y_mean] * future_periods, 0.0
+        slope, intercept, r_squared = fit
         
-        slope = numerator / denominator
-        intercept = y_mean - slope * x_mean
+        # Predictions for x = n, n+1, ...
+        future_x = np.arange(n, n + future_periods, dtype=float)
+        predictions = np.maximum(slope * future_x + intercept, 0)
         
-        # R-squared
-        y_pred = [slope * x[i] + intercept for i in range(n)]
-        ss_res = sum((y[i] - y_pred[i]) ** 2 for i in range(n))
-        ss_tot = sum((y[i] - y_mean) ** 2 for i in range(n))
-        r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
-        
-        # Predictions
-        predictions = []
-        for i in range(future_periods):
-            future_x = n + i
-            pred = slope * future_x + intercept
-            predictions.append(max(0, pred))
-        
-        return predictions, r_squared
+        return predictions.tolist(), r_squared
     
     # ... [REST OF YOUR EXISTING METHODS - keep all the other methods unchanged] ...
     
@@ -433,9 +610,10 @@ class AnalyticsEngine:
         if len(data) < 2:
             return {"trend": "insufficient_data", "strength": 0, "confidence": 0}
         
-        x = list(range(len(data)))
+        _ensure_numpy()
+        x = np.arange(len(data))
         
-        if SKLEARN_AVAILABLE:
+        if _ensure_sklearn():
             X = np.array(x).reshape(-1, 1)
             y = np.array(data)
             
@@ -446,21 +624,13 @@ class AnalyticsEngine:
             r_squared = r2_score(y, model.predict(X))
             y_mean = np.mean(y)
         else:
-            x_mean = sum(x) / len(x)
-            y_mean = sum(data) / len(data)
-            
-            numerator = sum((x[i] - x_mean) * (data[i] - y_mean) for i in range(len(data)))
-            denominator = sum((x[i] - x_mean) ** 2 for i in range(len(data)))
+            fit = AnalyticsEngine.least_squares(x, data)
             
-            if denominator == 0:
+            if fit is None:
                 return {"trend": "stable", "strength": 0, "confidence": 0}
             
-            slope = numerator / denominator
-            
-            y_pred = [slope * x[i] + (y_mean - slope * x_mean) for i in range(len(data))]
-            ss_res = sum((data[i] - y_pred[i]) ** 2 for i in range(len(data)))
-            ss_tot = sum((data[i] - y_mean) ** 2 for i in range(len(data)))
-            r_squared = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+            slope, _, r_squared = fit
+            y_mean = float(np.mean(data))
         
         threshold = y_mean * 0.01
         
@@ -486,30 +656,33 @@ class AnalyticsEngine:
         if len(data) < period * 2:
             return {"has_seasonality": False, "pattern": {}}
         
-        period_data = defaultdict(list)
+        weekdays = []
+        values = []
         for item in data:
             if isinstance(item["date"], str):
                 date_obj = datetime.strptime(item["date"], "%Y-%m-%d").date()
             else:
                 date_obj = item["date"]
             
-            day_of_week = date_obj.weekday()
-            value = item.get("value") or item.get("revenue", 0)
-            period_data[day_of_week].append(float(value))
+            weekdays.append(date_obj.weekday())
+            values.append(float(item.get("value") or item.get("revenue", 0)))
         
-        pattern = {}
-        std_pattern = {}
-        for day, values in period_data.items():
-            if len(values) == 0:
-                continue
-            
-            pattern[day] = sum(values) / len(values)
-            if SKLEARN_AVAILABLE:
-                std_pattern[day] = float(np.std(values))
-            else:
-                mean = pattern[day]
-                variance = sum((v - mean) ** 2 for v in values) / len(values)
-                std_pattern[day] = variance ** 0.5
+        _ensure_numpy()
+        weekdays = np.asarray(weekdays, dtype=np.intp)
+        values = np.asarray(values, dtype=float)
+        
+        # Per-weekday mean and (population) std deviation with bincount - no Python grouping
+        counts = np.bincount(weekdays, minlength=7)
+        means = np.bincount(weekdays, weights=values, minlength=7) / np.maximum(counts, 1)
+        deviations = values - means[weekdays]
+        stds = np.sqrt(np.bincount(weekdays, weights=deviations * deviations, minlength=7) / np.maximum(counts, 1))
+        
+        # Keep days in order of first appearance (same ordering / tie-breaking as before)
+        _, first_seen = np.unique(weekdays, return_index=True)
+        present_days = weekdays[np.sort(first_seen)].tolist()
+        
+        pattern = {day: float(means[day]) for day in present_days}
+        std_pattern = {day: float(stds[day]) for day in present_days}
         
         if len(pattern) > 0:
             avg = sum(pattern.values()) / len(pattern)
@@ -540,11 +713,7 @@ class AnalyticsEngine:
         
         reorder_point = (avg_daily_sales * lead_time_days) * safety_stock_factor
         
-        if SKLEARN_AVAILABLE:
-            return int(np.ceil(reorder_point))
-        else:
-            import math
-            return int(math.ceil(reorder_point))
+        return int(math.ceil(reorder_point))
     
     @staticmethod
     def generate_insights(sales_data: List[Dict], inventory_data: List[Dict],
@@ -8,6 +8,7 @@ import secrets
 import jwt
 from auth_models import Tenant, User, UserSession, EmailVerificationToken, PasswordResetToken
 from auth_schemas import TenantCreate, UserCreate, LoginRequest
+from principal_cache import PrincipalCache
 import os
 
 
@@ -166,12 +167,14 @@ class AuthService:
             if date.today() > tenant.trial_end_date:
                 tenant.subscription_status = "expired"
                 db.commit()
+                PrincipalCache.invalidate_tenant(tenant.id)
                 raise HTTPException(
                     status_code=status.HTTP_402_PAYMENT_REQUIRED,
                     detail="Free trial expired. Please upgrade to continue."
                 )
         
         db.commit()
+        PrincipalCache.invalidate_user(user.id)
         return user, tenant
     
     @staticmethod
@@ -302,6 +305,7 @@ class AuthService:
         user.is_email_verified = True
         
         db.commit()
+        PrincipalCache.invalidate_user(user.id)
         db.refresh(user)
         
         return user
@@ -380,10 +384,22 @@ class AuthService:
         user.account_locked_until = None  # Unlock account if locked
         
         db.commit()
+        PrincipalCache.invalidate_user(user.id)
         db.refresh(user)
         
         return user
     
+    @staticmethod
+    def set_tenant_active(tenant: Tenant, is_active: bool, db: Session) -> Tenant:
+        """Suspend (is_active=False) or reactivate a tenant"""
+        tenant.is_active = is_active
+        db.commit()
+        
+        # Cached principals of this tenant must re-check suspension immediately
+        PrincipalCache.invalidate_tenant(tenant.id)
+        
+        return tenant
+    
     @staticmethod
     def check_subscription_status(tenant: Tenant) -> dict:
         """Check and return subscription status"""
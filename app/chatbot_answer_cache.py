@@ -0,0 +1,179 @@
+# app/chatbot_answer_cache.py - Reuse chatbot answers to repeated questions until the data changes
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, FrozenSet, Optional, Tuple
+
+
+CHATBOT_ANSWER_CACHE_TTL_SECONDS = int(os.getenv("CHATBOT_ANSWER_CACHE_TTL_SECONDS", "300"))
+CHATBOT_ANSWER_CACHE_MAX_TENANTS = int(os.getenv("CHATBOT_ANSWER_CACHE_MAX_TENANTS", "256"))
+CHATBOT_ANSWER_CACHE_MAX_PER_TENANT = int(os.getenv("CHATBOT_ANSWER_CACHE_MAX_PER_TENANT", "64"))
+# Character-trigram similarity (0..1) at which a differently worded question reuses an
+# answer; 0 = exact (normalized) matches only
+CHATBOT_ANSWER_FUZZY_THRESHOLD = float(os.getenv("CHATBOT_ANSWER_FUZZY_THRESHOLD", "0.8"))
+
+# Words that don't change what is being asked
+_FILLER_WORDS = {
+    "a", "an", "the", "i", "me", "my", "we", "our", "please", "can", "could", "would",
+    "you", "tell", "show", "give", "is", "are", "was", "were", "do", "does", "did", "have", "has",
+    "so", "far"
+}
+# Words that change the answer however similar the rest is: both questions must have the same
+_SCOPE_WORDS = {
+    "today", "yesterday", "tomorrow", "week", "weekly", "month", "monthly", "year", "yearly",
+    "last", "this", "next", "previous", "not", "no", "worst", "least", "lowest", "best", "top", "most"
+}
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase words without punctuation, possessives or filler words"""
+    text = re.sub(r"'s\b", "", question.lower())
+    words = re.findall(r"[a-z0-9]+", text)
+    return " ".join(word for word in words if word not in _FILLER_WORDS)
+
+
+def _scope(normalized: str) -> FrozenSet[str]:
+    return frozenset(word for word in normalized.split() if word in _SCOPE_WORDS or word.isdigit())
+
+
+def _trigrams(normalized: str) -> FrozenSet[str]:
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two trigram sets"""
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class ChatAnswerCache:
+    """
+    Chatbot answers per tenant, valid for the business-context version they were
+    generated against (BusinessContextService.version - the durable DataVersions), so a
+    sale or stock change committed by any worker process retires them.
+
+    Questions are matched on their normalized text, or - above CHATBOT_ANSWER_FUZZY_THRESHOLD
+    trigram similarity and with the same period / number / ranking words - on a close
+    rewording ("Show me top 5 products" ~ "top 5 products please"). Everything is computed
+    locally: no embedding model or extra LLM call.
+
+    Only first questions are cached: an answer that depends on earlier turns of the
+    conversation is never stored or served.
+    """
+
+    # tenant_id -> (context key, normalized question -> entry); one context key per tenant,
+    # an older one is unreachable once the data has changed
+    _tenants: "OrderedDict[int, Tuple[tuple, OrderedDict]]" = OrderedDict()
+    _lock = threading.Lock()
+    _counters = {"exact_hits": 0, "fuzzy_hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def enabled() -> bool:
+        return CHATBOT_ANSWER_CACHE_TTL_SECONDS > 0 and CHATBOT_ANSWER_CACHE_MAX_PER_TENANT > 0
+
+    @staticmethod
+    def context_key(versions: Tuple[int, ...]) -> tuple:
+        # date.today(): the context talks about "today" / "this week"
+        return tuple(versions), date.today().isoformat()
+
+    @staticmethod
+    def lookup(tenant_id: int, question: str, versions: Tuple[int, ...]) -> Tuple[Optional[Dict], Optional[tuple]]:
+        """
+        (cached answer or None, context key to store() a fresh answer under)
+        `versions` (BusinessContextService.version) are read BEFORE the answer is generated:
+        if the data changes meanwhile, the answer is filed under the old version and never served.
+        """
+        if not ChatAnswerCache.enabled():
+            return None, None
+
+        context_key = ChatAnswerCache.context_key(versions)
+
+        normalized = normalize_question(question)
+        now = time.monotonic()
+
+        with ChatAnswerCache._lock:
+            cached = ChatAnswerCache._tenants.get(tenant_id)
+            entries = cached[1] if cached and cached[0] == context_key else None
+            match, outcome = None, "misses"
+
+            if entries:
+                for key in [key for key, entry in entries.items() if entry["expires"] < now]:
+                    del entries[key]
+
+                if normalized in entries:
+                    match, outcome = normalized, "exact_hits"
+                elif 0 < CHATBOT_ANSWER_FUZZY_THRESHOLD < 1:
+                    trigrams, scope = _trigrams(normalized), _scope(normalized)
+                    best = CHATBOT_ANSWER_FUZZY_THRESHOLD
+                    for key, entry in entries.items():
+                        if entry["scope"] != scope:
+                            continue
+                        score = similarity(trigrams, entry["trigrams"])
+                        if score >= best:
+                            match, outcome, best = key, "fuzzy_hits", score
+
+            ChatAnswerCache._counters[outcome] += 1
+            if match is None:
+                return None, context_key
+
+            entries.move_to_end(match)
+            ChatAnswerCache._tenants.move_to_end(tenant_id)
+            return dict(entries[match]["answer"]), context_key
+
+    @staticmethod
+    def store(tenant_id: int, question: str, context_key: Optional[tuple], answer: Dict):
+        """Remember a successful answer (context_key from lookup(); None = don't cache)"""
+        if context_key is None or not ChatAnswerCache.enabled():
+            return
+
+        normalized = normalize_question(question)
+        entry = {
+            "answer": dict(answer),
+            "trigrams": _trigrams(normalized),
+            "scope": _scope(normalized),
+            "expires": time.monotonic() + CHATBOT_ANSWER_CACHE_TTL_SECONDS
+        }
+
+        with ChatAnswerCache._lock:
+            cached = ChatAnswerCache._tenants.get(tenant_id)
+            if cached is None or cached[0] != context_key:
+                cached = (context_key, OrderedDict())
+            ChatAnswerCache._tenants[tenant_id] = cached
+            ChatAnswerCache._tenants.move_to_end(tenant_id)
+
+            entries = cached[1]
+            entries[normalized] = entry
+            entries.move_to_end(normalized)
+            while len(entries) > CHATBOT_ANSWER_CACHE_MAX_PER_TENANT:
+                entries.popitem(last=False)
+            while len(ChatAnswerCache._tenants) > max(1, CHATBOT_ANSWER_CACHE_MAX_TENANTS):
+                ChatAnswerCache._tenants.popitem(last=False)
+
+            ChatAnswerCache._counters["stores"] += 1
+
+    @staticmethod
+    def clear():
+        with ChatAnswerCache._lock:
+            ChatAnswerCache._tenants.clear()
+
+    @staticmethod
+    def stats() -> Dict:
+        with ChatAnswerCache._lock:
+            counters = dict(ChatAnswerCache._counters)
+            entries = sum(len(entries) for _, entries in ChatAnswerCache._tenants.values())
+            tenants = len(ChatAnswerCache._tenants)
+
+        hits = counters["exact_hits"] + counters["fuzzy_hits"]
+        return {
+            "enabled": ChatAnswerCache.enabled(),
+            "tenants": tenants,
+            "entries": entries,
+            "ttl_seconds": CHATBOT_ANSWER_CACHE_TTL_SECONDS,
+            "fuzzy_threshold": CHATBOT_ANSWER_FUZZY_THRESHOLD,
+            **counters,
+            "hit_rate": round(hits / (hits + counters["misses"]), 3) if hits + counters["misses"] else None
+        }
@@ -0,0 +1,93 @@
+# app/chatbot_context.py - Per-tenant business snapshot behind the chatbot's system prompt
+
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models import SupplierInventory
+from sales_rollup import SalesRollupService
+from response_cache import ResponseCache
+from data_versions import DataVersions
+
+
+class BusinessContextService:
+    """
+    Today / week / month sales, top products and suppliers of ONE tenant, computed with
+    three grouped queries and cached through ResponseCache: the snapshot is reused for
+    RESPONSE_CACHE_TTL_SECONDS and dropped as soon as the tenant's sales or inventory
+    change, so every turn of a conversation costs one indexed version read instead of the
+    aggregate queries.
+    """
+
+    DOMAINS = ("sales", "inventory")
+
+    @staticmethod
+    def compute(db: Session, tenant_id: int) -> Dict:
+        """Build the snapshot from the database (no cache)"""
+        today = date.today()
+        week_ago = today - timedelta(days=7)
+        month_ago = today - timedelta(days=30)
+
+        # One pass over the month's daily rollup rows covers today, the week and the month
+        periods = {
+            "today": today,
+            "week": week_ago,
+            "month": month_ago
+        }
+        totals = {name: {"revenue": 0.0, "profit": 0.0, "count": 0} for name in periods}
+
+        for row in SalesRollupService.get_daily_series(db, tenant_id, month_ago, today):
+            for name, since in periods.items():
+                if row.sale_date >= since:
+                    totals[name]["revenue"] += float(row.revenue or 0)
+                    totals[name]["profit"] += float(row.profit or 0)
+                    totals[name]["count"] += row.transaction_count or 0
+
+        top_products = sorted(
+            SalesRollupService.get_variety_totals(db, tenant_id, month_ago, today),
+            key=lambda row: row.revenue or 0,
+            reverse=True
+        )[:5]
+
+        suppliers = db.query(
+            SupplierInventory.supplier_name,
+            func.sum(SupplierInventory.total_amount).label('total')
+        ).filter(
+            SupplierInventory.tenant_id == tenant_id,
+            SupplierInventory.supply_date >= month_ago
+        ).group_by(SupplierInventory.supplier_name).all()
+
+        return {
+            "as_of": today.isoformat(),
+            **totals,
+            "top_products": [
+                {
+                    "name": row.variety_name,
+                    "quantity": float(row.quantity_sold or 0),
+                    "revenue": float(row.revenue or 0),
+                    "profit": float(row.profit or 0)
+                }
+                for row in top_products
+            ],
+            "suppliers": [
+                {"name": row.supplier_name, "total": float(row.total or 0)}
+                for row in suppliers
+            ]
+        }
+
+    @staticmethod
+    def get(db: Session, tenant_id: int, versions: Optional[Tuple[int, ...]] = None) -> Dict:
+        """
+        Cached snapshot for a tenant (computed on a miss)
+        Pass `versions` (version()) if the caller has already read them.
+        """
+        return ResponseCache.get_or_compute(
+            "chatbot.business-context", db, tenant_id, BusinessContextService.DOMAINS, {},
+            lambda: BusinessContextService.compute(db, tenant_id),
+            data_versions=versions
+        )
+
+    @staticmethod
+    def version(db: Session, tenant_id: int) -> Tuple[int, ...]:
+        """Changes whenever a write the snapshot depends on commits, in any worker process"""
+        return DataVersions.get(db, tenant_id, BusinessContextService.DOMAINS)
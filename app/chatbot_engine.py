@@ -1,14 +1,18 @@
 # app/chatbot_engine.py
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, AsyncIterator, Tuple
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 import json
-import os
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+from llm_clients import LLMClients, LLMTimeoutError, LLMCancelledError
+from chatbot_context import BusinessContextService
+from chatbot_answer_cache import ChatAnswerCache
 
 # LangChain imports
 try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
     from langchain.messages import HumanMessage, SystemMessage, AIMessage
     LANGCHAIN_AVAILABLE = True
 except ImportError:
@@ -20,113 +24,63 @@ except ImportError:
 class BusinessChatbot:
     """AI-powered business assistant using LangChain"""
     
-    def __init__(self, db_session=None):
+    def __init__(self, db_session=None, tenant_id: Optional[int] = None):
         self.db = db_session
+        self.tenant_id = tenant_id
         self.llm = self._initialize_llm()
         
     def _initialize_llm(self):
-        """Initialize the language model (Google Gemini)"""
+        """Shared language model (Google Gemini) from the process-wide registry"""
         if not LANGCHAIN_AVAILABLE:
             return None
         
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            print("⚠️ Warning: GOOGLE_API_KEY not found in environment variables")
-            return None
-        
-        try:
-            model = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
-                google_api_key=api_key,
-                temperature=0.7,
-                convert_system_message_to_human=True
-            )
-            return model
-        except Exception as e:
-            print(f"Error initializing Gemini: {e}")
-            return None
+        return LLMClients.get("chat")
+    
+    def get_snapshot(self, versions: Optional[Tuple[int, ...]] = None) -> Dict:
+        """This tenant's cached business figures (see BusinessContextService)"""
+        return BusinessContextService.get(self.db, self.tenant_id, versions)
     
-    def get_business_context(self) -> str:
+    def get_business_context(self, versions: Optional[Tuple[int, ...]] = None) -> str:
         """Get current business data as context for the AI"""
-        if not self.db:
+        if not self.db or self.tenant_id is None:
             return "No database connection available."
         
         try:
-            from sqlalchemy import func
-            from models import Sale, SupplierInventory, ClothVariety, SupplierReturn
-            
-            today = date.today()
-            week_ago = today - timedelta(days=7)
-            month_ago = today - timedelta(days=30)
-            
-            # Get today's sales
-            today_sales = self.db.query(
-                func.sum(Sale.selling_price * Sale.quantity).label('revenue'),
-                func.sum(Sale.profit).label('profit'),
-                func.count(Sale.id).label('count')
-            ).filter(Sale.sale_date == today).first()
-            
-            # Get this week's sales
-            week_sales = self.db.query(
-                func.sum(Sale.selling_price * Sale.quantity).label('revenue'),
-                func.sum(Sale.profit).label('profit')
-            ).filter(Sale.sale_date >= week_ago).first()
-            
-            # Get this month's sales
-            month_sales = self.db.query(
-                func.sum(Sale.selling_price * Sale.quantity).label('revenue'),
-                func.sum(Sale.profit).label('profit')
-            ).filter(Sale.sale_date >= month_ago).first()
-            
-            # Get top products this month
-            top_products = self.db.query(
-                ClothVariety.name,
-                func.sum(Sale.quantity).label('quantity'),
-                func.sum(Sale.selling_price * Sale.quantity).label('revenue')
-            ).join(Sale).filter(
-                Sale.sale_date >= month_ago
-            ).group_by(ClothVariety.name).order_by(
-                func.sum(Sale.selling_price * Sale.quantity).desc()
-            ).limit(5).all()
-            
-            # Get recent suppliers
-            recent_suppliers = self.db.query(
-                SupplierInventory.supplier_name,
-                func.sum(SupplierInventory.total_amount).label('total')
-            ).filter(
-                SupplierInventory.supply_date >= month_ago
-            ).group_by(SupplierInventory.supplier_name).all()
+            snapshot = self.get_snapshot(versions)
+            today, week, month = snapshot["today"], snapshot["week"], snapshot["month"]
+            top_products = snapshot["top_products"]
+            suppliers = snapshot["suppliers"]
             
             context = f"""
-CURRENT BUSINESS DATA (as of {today}):
+CURRENT BUSINESS DATA (as of {snapshot["as_of"]}):
 
 TODAY'S PERFORMANCE:
-- Revenue: ₹{float(today_sales.revenue) if today_sales.revenue else 0:,.2f}
-- Profit: ₹{float(today_sales.profit) if today_sales.profit else 0:,.2f}
-- Transactions: {today_sales.count if today_sales.count else 0}
+- Revenue: ₹{today["revenue"]:,.2f}
+- Profit: ₹{today["profit"]:,.2f}
+- Transactions: {today["count"]}
 
 THIS WEEK (Last 7 days):
-- Revenue: ₹{float(week_sales.revenue) if week_sales.revenue else 0:,.2f}
-- Profit: ₹{float(week_sales.profit) if week_sales.profit else 0:,.2f}
+- Revenue: ₹{week["revenue"]:,.2f}
+- Profit: ₹{week["profit"]:,.2f}
 
 THIS MONTH (Last 30 days):
-- Revenue: ₹{float(month_sales.revenue) if month_sales.revenue else 0:,.2f}
-- Profit: ₹{float(month_sales.profit) if month_sales.profit else 0:,.2f}
+- Revenue: ₹{month["revenue"]:,.2f}
+- Profit: ₹{month["profit"]:,.2f}
 
 TOP 5 PRODUCTS (This Month):
-{chr(10).join([f"- {p.name}: {p.quantity} units, ₹{float(p.revenue):,.2f}" for p in top_products]) if top_products else "No data"}
+{chr(10).join([f"- {p['name']}: {p['quantity']:g} units, ₹{p['revenue']:,.2f}" for p in top_products]) if top_products else "No data"}
 
 SUPPLIERS (This Month):
-{chr(10).join([f"- {s.supplier_name}: ₹{float(s.total):,.2f}" for s in recent_suppliers]) if recent_suppliers else "No suppliers"}
+{chr(10).join([f"- {s['name']}: ₹{s['total']:,.2f}" for s in suppliers]) if suppliers else "No suppliers"}
 """
             return context
             
         except Exception as e:
             return f"Error fetching business context: {str(e)}"
     
-    def create_system_prompt(self) -> str:
+    def create_system_prompt(self, versions: Optional[Tuple[int, ...]] = None) -> str:
         """Create the system prompt for the AI"""
-        business_context = self.get_business_context()
+        business_context = self.get_business_context(versions)
         
         return f"""You are an intelligent business assistant for a cloth shop management system. 
 Your job is to help the business owner understand their data, make decisions, and answer questions.
@@ -154,9 +108,14 @@ REMEMBER:
 - The business is a cloth/fabric shop
 """
     
-    async def chat(self, user_message: str, conversation_history: List[Dict] = None) -> Dict:
+    async def chat(self, user_message: str, conversation_history: List[Dict] = None, request=None) -> Dict:
         """
         Process a chat message and return AI response
+        Nothing here blocks the event loop: the business context (sync DB queries) is built
+        in the threadpool and the model is awaited through LLMClients.ainvoke (timeout,
+        concurrency limit, cancelled if the client behind `request` disconnects)
+        A first question already answered for this tenant's current data comes from
+        ChatAnswerCache without calling the model ("cached": True)
         """
         if not self.llm:
             return {
@@ -166,31 +125,37 @@ REMEMBER:
             }
         
         try:
-            # Create messages
-            messages = [
-                SystemMessage(content=self.create_system_prompt())
-            ]
-            
-            # Add conversation history
-            if conversation_history:
-                for msg in conversation_history[-10:]:  # Last 10 messages for context
-                    if msg["role"] == "user":
-                        messages.append(HumanMessage(content=msg["content"]))
-                    elif msg["role"] == "assistant":
-                        messages.append(AIMessage(content=msg["content"]))
+            cached, context_key, system_prompt = await run_in_threadpool(
+                self.prepare_turn, user_message, conversation_history
+            )
+            if cached:
+                return {**cached, "timestamp": datetime.now().isoformat(), "success": True, "cached": True}
             
-            # Add current message
-            messages.append(HumanMessage(content=user_message))
+            # Create messages
+            messages = self.build_messages(system_prompt, user_message, conversation_history)
             
-            # Get AI response - FIX: Call invoke() method
-            response = self.llm.invoke(messages)
+            # Get AI response without blocking the event loop
+            response = await LLMClients.ainvoke(self.llm, messages, request=request)
             
-            return {
+            result = {
                 "response": response.content,
                 "timestamp": datetime.now().isoformat(),
-                "model": "gemini-2.0-flash-exp",
+                "model": LLMClients.model_name("chat"),
                 "success": True
             }
+            ChatAnswerCache.store(self.tenant_id, user_message, context_key, result)
+            return result
+            
+        except LLMTimeoutError as e:
+            print(f"⏱️ Chat timed out: {str(e)}")
+            return {
+                "response": "The AI assistant is taking too long to answer right now. Please try again in a moment.",
+                "error": "timeout",
+                "success": False
+            }
+            
+        except LLMCancelledError:
+            raise  # client disconnected: the route answers 499, nothing to log
             
         except Exception as e:
             print(f"Error in chat: {str(e)}")
@@ -200,6 +165,129 @@ REMEMBER:
                 "success": False
             }
     
+    def prepare_turn(
+        self,
+        user_message: str,
+        conversation_history: List[Dict] = None
+    ) -> Tuple[Optional[Dict], Optional[tuple], Optional[str]]:
+        """
+        Sync part of a turn (DB queries), on ONE thread - the session isn't thread-safe:
+        read the tenant's data versions once, look a first question up in ChatAnswerCache
+        and, on a miss, build the system prompt from the snapshot of those same versions
+        Returns (cached answer or None, context key to store a new answer under, system prompt or None)
+        """
+        versions = None
+        if self.db and self.tenant_id is not None:
+            try:
+                versions = BusinessContextService.version(self.db, self.tenant_id)
+            except Exception as e:
+                print(f"⚠️ Chatbot answer cache unavailable: {str(e)}")
+        
+        cached, context_key = None, None
+        if versions is not None and not conversation_history:
+            cached, context_key = ChatAnswerCache.lookup(self.tenant_id, user_message, versions)
+        if cached:
+            return cached, context_key, None
+        return None, context_key, self.create_system_prompt(versions)
+    
+    def start_turn(self, user_message: str, conversation_history: List[Dict] = None) -> "asyncio.Future":
+        """
+        Start prepare_turn() in the threadpool
+        A thread can't be cancelled: keep the session open until this task is done.
+        """
+        return asyncio.ensure_future(run_in_threadpool(self.prepare_turn, user_message, conversation_history))
+    
+    async def stream_chat(
+        self,
+        user_message: str,
+        conversation_history: List[Dict] = None,
+        turn: Optional["asyncio.Future"] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Same as chat(), but yields (event, data) pairs as the answer is generated:
+        'start' once the turn is prepared, one 'token' per model chunk, then 'done' (or 'error')
+        `turn` is a start_turn() task the caller started early (before sending the
+        response headers) and owns - the caller closes the session once it is done.
+        """
+        if not self.llm:
+            yield "error", {
+                "response": "AI chatbot is not configured. Please set GOOGLE_API_KEY in your .env file to enable AI features.",
+                "error": "no_api_key"
+            }
+            return
+        
+        if turn is None:
+            turn = self.start_turn(user_message, conversation_history)
+        
+        try:
+            cached, context_key, system_prompt = await turn
+        except Exception as e:
+            print(f"Error in chat stream: {str(e)}")
+            yield "error", {
+                "response": "I encountered an error while processing your request.",
+                "error": str(e)
+            }
+            return
+        
+        if cached:
+            # The whole answer in one token event
+            yield "start", {"model": cached.get("model"), "timestamp": datetime.now().isoformat(), "cached": True}
+            yield "token", {"text": cached["response"]}
+            yield "done", {"timestamp": datetime.now().isoformat(), "cached": True}
+            return
+        
+        try:
+            yield "start", {"model": LLMClients.model_name("chat"), "timestamp": datetime.now().isoformat()}
+            
+            messages = self.build_messages(system_prompt, user_message, conversation_history)
+            
+            parts = []
+            async for chunk in LLMClients.astream(self.llm, messages):
+                text = chunk.content if isinstance(chunk.content, str) else "".join(
+                    part.get("text", "") for part in chunk.content if isinstance(part, dict)
+                )
+                if text:
+                    parts.append(text)
+                    yield "token", {"text": text}
+            
+            if parts:
+                ChatAnswerCache.store(self.tenant_id, user_message, context_key, {
+                    "response": "".join(parts),
+                    "model": LLMClients.model_name("chat")
+                })
+            yield "done", {"timestamp": datetime.now().isoformat()}
+            
+        except LLMTimeoutError as e:
+            print(f"⏱️ Chat stream timed out: {str(e)}")
+            yield "error", {
+                "response": "The AI assistant is taking too long to answer right now. Please try again in a moment.",
+                "error": "timeout"
+            }
+            
+        except Exception as e:
+            print(f"Error in chat stream: {str(e)}")
+            yield "error", {
+                "response": "I encountered an error while processing your request.",
+                "error": str(e)
+            }
+    
+    @staticmethod
+    def build_messages(system_prompt: str, user_message: str, conversation_history: List[Dict] = None) -> List:
+        """System prompt, the last 10 history messages, then the user's message"""
+        messages = [SystemMessage(content=system_prompt)]
+        
+        # Add conversation history
+        if conversation_history:
+            for msg in conversation_history[-10:]:  # Last 10 messages for context
+                if msg["role"] == "user":
+                    messages.append(HumanMessage(content=msg["content"]))
+                elif msg["role"] == "assistant":
+                    messages.append(AIMessage(content=msg["content"]))
+        
+        # Add current message
+        messages.append(HumanMessage(content=user_message))
+        return messages
+    
     def parse_query_intent(self, user_message: str) -> Dict:
         """
         Parse user intent for direct database queries
@@ -239,52 +327,28 @@ REMEMBER:
         """
         Handle simple queries without LLM (fallback)
         """
-        if not self.db:
+        if not self.db or self.tenant_id is None:
             return "Database not available. Please try again later."
         
         try:
-            from sqlalchemy import func
-            from models import Sale, ClothVariety
-            
-            today = date.today()
+            snapshot = self.get_snapshot()
             
             if intent["intent"] == "sales_today":
-                result = self.db.query(
-                    func.sum(Sale.selling_price * Sale.quantity).label('revenue'),
-                    func.count(Sale.id).label('count')
-                ).filter(Sale.sale_date == today).first()
-                
-                revenue = float(result.revenue) if result.revenue else 0
-                count = result.count if result.count else 0
-                
-                return f"Today's sales: ₹{revenue:,.2f} from {count} transactions."
+                today = snapshot["today"]
+                return f"Today's sales: ₹{today['revenue']:,.2f} from {today['count']} transactions."
             
             elif intent["intent"] == "profit_today":
-                result = self.db.query(
-                    func.sum(Sale.profit).label('profit')
-                ).filter(Sale.sale_date == today).first()
-                
-                profit = float(result.profit) if result.profit else 0
-                return f"Today's profit: ₹{profit:,.2f}"
+                return f"Today's profit: ₹{snapshot['today']['profit']:,.2f}"
             
             elif intent["intent"] == "top_products":
-                month_ago = today - timedelta(days=30)
-                products = self.db.query(
-                    ClothVariety.name,
-                    func.sum(Sale.quantity).label('quantity'),
-                    func.sum(Sale.selling_price * Sale.quantity).label('revenue')
-                ).join(Sale).filter(
-                    Sale.sale_date >= month_ago
-                ).group_by(ClothVariety.name).order_by(
-                    func.sum(Sale.selling_price * Sale.quantity).desc()
-                ).limit(5).all()
+                products = snapshot["top_products"]
                 
                 if not products:
                     return "No sales data available for the past month."
                 
                 response = "Top 5 products this month:\n"
                 for i, p in enumerate(products, 1):
-                    response += f"{i}. {p.name}: {p.quantity} units, ₹{float(p.revenue):,.2f}\n"
+                    response += f"{i}. {p['name']}: {p['quantity']:g} units, ₹{p['revenue']:,.2f}\n"
                 
                 return response
             
@@ -299,7 +363,7 @@ class ChatbotTools:
     """Tools that the chatbot can use to fetch specific data"""
     
     @staticmethod
-    def get_sales_by_date(db, start_date: date, end_date: date = None) -> Dict:
+    def get_sales_by_date(db, tenant_id: int, start_date: date, end_date: date = None) -> Dict:
         """Get sales data for a specific period"""
         from sqlalchemy import func
         from models import Sale
@@ -313,6 +377,7 @@ class ChatbotTools:
             func.sum(Sale.quantity).label('quantity'),
             func.count(Sale.id).label('transactions')
         ).filter(
+            Sale.tenant_id == tenant_id,
             Sale.sale_date >= start_date,
             Sale.sale_date <= end_date
         ).first()
@@ -325,7 +390,7 @@ class ChatbotTools:
         }
     
     @staticmethod
-    def get_top_products(db, limit: int = 5, days: int = 30) -> List[Dict]:
+    def get_top_products(db, tenant_id: int, limit: int = 5, days: int = 30) -> List[Dict]:
         """Get top performing products"""
         from sqlalchemy import func
         from models import Sale, ClothVariety
@@ -338,6 +403,7 @@ class ChatbotTools:
             func.sum(Sale.selling_price * Sale.quantity).label('revenue'),
             func.sum(Sale.profit).label('profit')
         ).join(Sale).filter(
+            Sale.tenant_id == tenant_id,
             Sale.sale_date >= start_date
         ).group_by(ClothVariety.name).order_by(
             func.sum(Sale.selling_price * Sale.quantity).desc()
@@ -354,7 +420,7 @@ class ChatbotTools:
         ]
     
     @staticmethod
-    def get_supplier_summary(db, days: int = 30) -> List[Dict]:
+    def get_supplier_summary(db, tenant_id: int, days: int = 30) -> List[Dict]:
         """Get supplier summary"""
         from sqlalchemy import func
         from models import SupplierInventory
@@ -365,6 +431,7 @@ class ChatbotTools:
             SupplierInventory.supplier_name,
             func.sum(SupplierInventory.total_amount).label('total')
         ).filter(
+            SupplierInventory.tenant_id == tenant_id,
             SupplierInventory.supply_date >= start_date
         ).group_by(SupplierInventory.supplier_name).all()
         
@@ -0,0 +1,46 @@
+# app/conditional_get.py - ETag / If-None-Match dependency for tenant list and status endpoints
+
+import hashlib
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from data_versions import DataVersions
+from routes.auth_routes import get_current_tenant_async
+from auth_models import Tenant
+
+
+class ConditionalGet:
+    """
+    Dependency for list / status endpoints: strong ETag from the tenant's data versions.
+
+    If the client's If-None-Match matches, answers 304 before the endpoint body (and its
+    queries) runs; otherwise sets ETag on the response. Declare it AFTER the permission
+    dependency so a 304 is never sent to a caller who may not read the resource:
+
+        _etag: None = Depends(ConditionalGet("inventory", "sales"))
+    """
+
+    def __init__(self, *domains: str):
+        self.domains = tuple(domains)
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        tenant: Tenant = Depends(get_current_tenant_async),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        versions = await DataVersions.aget(db, tenant.id, self.domains)
+
+        # The URL covers path / query params (filters, page cursor)
+        fingerprint = f"{tenant.id}|{request.url.path}?{request.url.query}|{self.domains}|{versions}"
+        etag = f'"{hashlib.sha256(fingerprint.encode()).hexdigest()[:32]}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if etag in candidates or "*" in candidates:
+                raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
@@ -0,0 +1,136 @@
+# app/data_versions.py - Per-tenant data version counters (ETags / conditional GET, cache invalidation)
+
+from itertools import chain
+from typing import Dict, Iterable, Set, Tuple
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import TenantDataVersion
+
+
+# Data domain of every table whose rows appear in tenant responses - a committed write to
+# one of these tables changes (tenant, domain)
+TABLE_DOMAINS = {
+    "sales": "sales",
+    "daily_sales_rollup": "sales",
+    "cloth_varieties": "inventory",
+    "supplier_inventory": "inventory",
+    "supplier_returns": "inventory",
+    "inventory_movements": "inventory",
+    "inventory_allocations": "inventory",
+    "customer_loans": "loans",
+    "loan_payments": "loans",
+    "expenses": "expenses",
+    "shopkeeper_stock": "shopkeeper_stock",
+    "shopkeeper_sales": "shopkeeper_stock",
+    "shopkeeper_returns": "shopkeeper_stock",
+}
+
+# session.info key: (tenant_id, domain) pairs bumped in the current transaction, for the
+# caches that follow the versions after the commit (see response_cache.py)
+BUMPED_INFO_KEY = "data_versions_bumped"
+
+
+def written_domains(objects: Iterable) -> Set[Tuple[int, str]]:
+    """(tenant_id, domain) pairs touched by these ORM instances"""
+    written = set()
+    for obj in objects:
+        domain = TABLE_DOMAINS.get(getattr(obj, "__tablename__", None))
+        tenant_id = getattr(obj, "tenant_id", None)
+        if domain and tenant_id is not None:
+            written.add((tenant_id, domain))
+    return written
+
+
+class DataVersions:
+    """
+    Durable change counters per (tenant, domain) in tenant_data_versions.
+
+    They are bumped inside the writing transaction (see _bump_before_commit), so a version
+    and the data it describes are committed together and every worker process sees the
+    same value - unlike ResponseCache versions, which may live in one process.
+    """
+
+    @staticmethod
+    def _upsert(dialect_name: str, rows):
+        """INSERT version 1, or add 1 to the existing row, in one statement"""
+        if dialect_name == "mysql":
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+            statement = dialect_insert(TenantDataVersion).values(rows)
+            return statement.on_duplicate_key_update(
+                version=TenantDataVersion.version + 1,
+                updated_at=func.now()
+            )
+
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(TenantDataVersion).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=["tenant_id", "domain"],
+            set_={"version": TenantDataVersion.version + 1, "updated_at": func.now()}
+        )
+
+    @staticmethod
+    def bump(db: Session, keys: Iterable[Tuple[int, str]]):
+        """
+        Increment these (tenant_id, domain) counters in the current transaction (no commit)
+        Writes that bypass the ORM flush (bulk UPDATE / INSERT) call this themselves
+        """
+        keys = sorted(set(keys))  # fixed order: no lock-order deadlocks
+        if not keys:
+            return
+        rows = [{"tenant_id": tenant_id, "domain": domain, "version": 1} for tenant_id, domain in keys]
+        connection = db.connection()
+        connection.execute(DataVersions._upsert(connection.dialect.name, rows))
+
+        # Picked up by ResponseCache after the commit
+        db.info.setdefault(BUMPED_INFO_KEY, set()).update(keys)
+
+    @staticmethod
+    def _versions_statement(tenant_id: int, domains: Tuple[str, ...]):
+        return select(TenantDataVersion.domain, TenantDataVersion.version).where(
+            TenantDataVersion.tenant_id == tenant_id,
+            TenantDataVersion.domain.in_(domains)
+        )
+
+    @staticmethod
+    def get(db: Session, tenant_id: int, domains: Tuple[str, ...]) -> Tuple[int, ...]:
+        """Current versions of a tenant's domains (0 = never written) - one indexed read"""
+        versions: Dict[str, int] = dict(db.execute(DataVersions._versions_statement(tenant_id, domains)).all())
+        return tuple(versions.get(domain, 0) for domain in domains)
+
+    @staticmethod
+    async def aget(db: AsyncSession, tenant_id: int, domains: Tuple[str, ...]) -> Tuple[int, ...]:
+        """Async version of get()"""
+        result = await db.execute(DataVersions._versions_statement(tenant_id, domains))
+        versions: Dict[str, int] = dict(result.all())
+        return tuple(versions.get(domain, 0) for domain in domains)
+
+
+# ==================== BUMP ON COMMIT ====================
+
+@event.listens_for(Session, "after_flush")
+def _collect_writes(session: Session, flush_context):
+    """Remember (tenant, domain) pairs of rows flushed earlier in this transaction"""
+    session.info.setdefault("data_version_writes", set()).update(
+        written_domains(chain(session.new, session.dirty, session.deleted))
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session: Session):
+    """
+    Bump the versions as the last statement before COMMIT - late, so the version rows are
+    locked for as short as possible. Rows still pending are flushed right after this hook.
+    """
+    written = session.info.pop("data_version_writes", set())
+    written |= written_domains(chain(session.new, session.dirty, session.deleted))
+    DataVersions.bump(session, written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_writes(session: Session):
+    session.info.pop("data_version_writes", None)
+    session.info.pop(BUMPED_INFO_KEY, None)
@@ -4,7 +4,9 @@ import os
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from dotenv import load_dotenv
+from db_pool import pool_settings, InstrumentedQueuePool, InstrumentedAsyncQueuePool
 
 # Load environment variables from .env file
 load_dotenv()
@@ -31,18 +33,49 @@ except:
     print(f"Connecting to database...")
 
 # Create SQLAlchemy engine
+# Pool sizing comes from the environment (see db_pool.pool_settings)
+POOL_SETTINGS = pool_settings()
+
 engine = create_engine(
     DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,
-    pool_recycle=3600,
-    pool_size=5,
-    max_overflow=10,
     echo=False,
+    **POOL_SETTINGS,
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_url(url: str) -> str:
+    """Map a sync driver URL to its asyncio driver (PyMySQL -> aiomysql, SQLite -> aiosqlite)"""
+    if url.startswith("mysql+pymysql://"):
+        return url.replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+# Async engine for non-blocking read endpoints (shares the same database)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_pre_ping=True,
+    echo=False,
+    **POOL_SETTINGS,
+)
+
+# expire_on_commit=False: attribute access after commit would need implicit (sync) IO
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -56,6 +89,15 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Async database session dependency for FastAPI
+    Use in `async def` routes so waiting on the database doesn't hold a threadpool worker
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database and create all tables"""
     print("📊 Initializing database...")
@@ -67,6 +109,18 @@ def init_db():
         Base.metadata.create_all(bind=engine)
         print("Database tables created successfully!")
         
+        # Backfill sales rollup (one-time, when the table is new)
+        from sales_rollup import SalesRollupService
+        db = SessionLocal()
+        try:
+            SalesRollupService.backfill_if_empty(db)
+            
+            # First inventory ledger snapshots (later ones come from the monthly job)
+            from inventory_ledger import InventoryLedger
+            InventoryLedger.build_if_empty(db)
+        finally:
+            db.close()
+        
         # Test connection with proper SQLAlchemy 2.0 syntax
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
@@ -78,6 +132,15 @@ def init_db():
         raise
 
 
+def get_pool_metrics() -> dict:
+    """Checkout latency, overflow and timeout counters for both engine pools"""
+    return {
+        "settings": POOL_SETTINGS,
+        "sync": engine.pool.stats.snapshot(engine.pool),
+        "async": async_engine.sync_engine.pool.stats.snapshot(async_engine.sync_engine.pool),
+    }
+
+
 def test_connection():
     """Test database connection"""
     try:
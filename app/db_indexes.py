@@ -0,0 +1,203 @@
+# app/db_indexes.py - Composite index migration and EXPLAIN-based index advisor
+
+from typing import Dict, List
+from datetime import date, timedelta
+from sqlalchemy import select, func, text, inspect
+from sqlalchemy.engine import Engine
+from database import Base
+from models import (
+    Sale, SupplierInventory, SupplierReturn, Expense,
+    InventoryMovement, CustomerLoan, ShopkeeperStock, ClothVariety, StockType
+)
+from pagination import DEFAULT_PAGE_SIZE
+
+
+# Composite indexes declared in models.py (__table_args__).
+# create_all() only adds them to NEW tables, so existing databases need this migration.
+COMPOSITE_INDEXES = {
+    "sales": [
+        "ix_sales_tenant_date_variety",
+        "ix_sales_tenant_variety_date",
+    ],
+    "supplier_inventory": [
+        "ix_supplier_inventory_tenant_variety_remaining_date",
+        "ix_supplier_inventory_tenant_date",
+    ],
+    "supplier_returns": ["ix_supplier_returns_tenant_date"],
+    "expenses": ["ix_expenses_tenant_date"],
+    "inventory_movements": [
+        "ix_inventory_movements_tenant_variety_created",
+        "ix_inventory_movements_tenant_date_variety",
+    ],
+    "customer_loans": ["ix_customer_loans_tenant_date"],
+    "shopkeeper_stock": ["ix_shopkeeper_stock_tenant_date"],
+}
+
+
+def apply_composite_indexes(engine: Engine) -> List[str]:
+    """
+    Create any missing composite indexes on existing tables
+    Safe to run repeatedly - existing indexes are skipped
+    Returns the names of indexes that were created
+    """
+    created = []
+    inspector = inspect(engine)
+
+    for table_name, index_names in COMPOSITE_INDEXES.items():
+        if not inspector.has_table(table_name):
+            # create_all() will build the table with its indexes
+            continue
+
+        table = Base.metadata.tables[table_name]
+        declared = {index.name: index for index in table.indexes}
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+
+        for index_name in index_names:
+            if index_name in existing:
+                continue
+
+            print(f"📇 Creating index {index_name} on {table_name}...")
+            declared[index_name].create(bind=engine)
+            created.append(index_name)
+
+    return created
+
+
+def route_query_shapes(tenant_id: int) -> Dict[str, object]:
+    """
+    Representative queries used by the routes, keyed by "route: description"
+    Parameters are realistic placeholders - only the plan shape matters
+    """
+    today = date.today()
+    month_ago = today - timedelta(days=30)
+    variety_id = 1
+
+    return {
+        "sales.get_sales_by_date": select(Sale).where(
+            Sale.sale_date == today,
+            Sale.tenant_id == tenant_id
+        ),
+        "predictions.analyze_product_performance": select(
+            Sale.variety_id,
+            func.sum(Sale.selling_price * Sale.quantity),
+            func.sum(Sale.profit)
+        ).where(
+            Sale.sale_date >= month_ago,
+            Sale.sale_date <= today,
+            Sale.tenant_id == tenant_id
+        ).group_by(Sale.variety_id),
+        "predictions.get_reorder_recommendations": select(
+            Sale.variety_id,
+            func.sum(Sale.quantity),
+            func.count(func.distinct(Sale.sale_date))
+        ).where(
+            Sale.sale_date >= month_ago,
+            Sale.sale_date <= today,
+            Sale.tenant_id == tenant_id
+        ).group_by(Sale.variety_id),
+        "inventory.get_inventory_status (sold)": select(
+            Sale.variety_id, func.sum(Sale.quantity)
+        ).where(
+            Sale.tenant_id == tenant_id,
+            Sale.stock_type == StockType.NEW_STOCK
+        ).group_by(Sale.variety_id),
+        "sales.create_sale (FIFO lot)": select(SupplierInventory).where(
+            SupplierInventory.variety_id == variety_id,
+            SupplierInventory.quantity_remaining >= 1,
+            SupplierInventory.tenant_id == tenant_id
+        ).order_by(SupplierInventory.supply_date.asc()).limit(1),
+        "supplier.get_inventory_by_date": select(SupplierInventory).where(
+            SupplierInventory.supply_date == today,
+            SupplierInventory.tenant_id == tenant_id
+        ),
+        "supplier.get_returns_by_date": select(SupplierReturn).where(
+            SupplierReturn.return_date == today,
+            SupplierReturn.tenant_id == tenant_id
+        ),
+        "expenses.get_expenses_by_month": select(Expense).where(
+            Expense.expense_date >= month_ago,
+            Expense.expense_date <= today,
+            Expense.tenant_id == tenant_id
+        ).order_by(Expense.expense_date.desc()),
+        "inventory.get_inventory_movements": select(InventoryMovement).where(
+            InventoryMovement.variety_id == variety_id,
+            InventoryMovement.tenant_id == tenant_id
+        ).order_by(InventoryMovement.created_at.desc()).limit(50),
+        "customer_loans.get_all_loans": select(CustomerLoan).where(
+            CustomerLoan.tenant_id == tenant_id
+        ).order_by(CustomerLoan.loan_date.desc(), CustomerLoan.id.desc()).limit(DEFAULT_PAGE_SIZE + 1),
+        "shopkeeper_stock.get_all_shopkeeper_stock": select(ShopkeeperStock).where(
+            ShopkeeperStock.tenant_id == tenant_id
+        ).order_by(ShopkeeperStock.issue_date.desc(), ShopkeeperStock.id.desc()).limit(DEFAULT_PAGE_SIZE + 1),
+        "inventory.get_low_stock_items": select(ClothVariety).where(
+            ClothVariety.min_stock_level.isnot(None),
+            ClothVariety.current_stock <= ClothVariety.min_stock_level,
+            ClothVariety.tenant_id == tenant_id
+        ),
+    }
+
+
+def explain_route_queries(engine: Engine, tenant_id: int) -> List[Dict]:
+    """
+    Run EXPLAIN for each route query shape and flag full table scans
+    MySQL: access type 'ALL' (or no key used); SQLite: a plain 'SCAN' step without an index
+    """
+    report = []
+    dialect = engine.dialect.name
+
+    with engine.connect() as conn:
+        for route, statement in route_query_shapes(tenant_id).items():
+            sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+
+            if dialect == "sqlite":
+                rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).mappings().all()
+                steps = [row["detail"] for row in rows]
+                full_scans = [
+                    step for step in steps
+                    if step.startswith("SCAN") and "INDEX" not in step
+                ]
+            else:
+                rows = conn.execute(text(f"EXPLAIN {sql}")).mappings().all()
+                steps = [
+                    f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']}"
+                    for row in rows
+                ]
+                full_scans = [
+                    f"{row['table']} (type={row['type']})"
+                    for row in rows
+                    if row["type"] == "ALL" or row["key"] is None
+                ]
+
+            report.append({
+                "route": route,
+                "full_scan": bool(full_scans),
+                "flagged": full_scans,
+                "plan": steps
+            })
+
+    return report
+
+
+if __name__ == "__main__":
+    # python db_indexes.py migrate
+    # python db_indexes.py explain --tenant-id 1
+    import argparse
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Composite index migration and EXPLAIN advisor")
+    parser.add_argument("command", choices=["migrate", "explain"])
+    parser.add_argument("--tenant-id", type=int, default=1, help="Tenant to use in EXPLAIN query shapes")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        created = apply_composite_indexes(engine)
+        print(f"✅ Created {len(created)} index(es)" if created else "✅ All composite indexes already exist")
+    else:
+        flagged = 0
+        for entry in explain_route_queries(engine, args.tenant_id):
+            marker = "⚠️ FULL SCAN" if entry["full_scan"] else "✅"
+            print(f"{marker} {entry['route']}")
+            for step in entry["plan"]:
+                print(f"    {step}")
+            flagged += entry["full_scan"]
+        print(f"\n{flagged} query shape(s) flagged for full scans")
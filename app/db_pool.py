@@ -0,0 +1,134 @@
+# app/db_pool.py - Connection pool sizing and telemetry
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+def pool_settings() -> Dict[str, int]:
+    """
+    Pool parameters for ONE engine in ONE worker process, from environment:
+
+    - DB_POOL_SIZE / DB_MAX_OVERFLOW: explicit per-engine sizes (win if set)
+    - DB_MAX_CONNECTIONS: total connection budget for the whole deployment; split across
+      WEB_CONCURRENCY workers and the two engines (sync + async), 2/3 pooled, 1/3 overflow
+    - DB_POOL_TIMEOUT: seconds to wait for a free connection before failing (default 30)
+    - DB_POOL_RECYCLE: seconds before a connection is replaced (default 3600)
+    """
+    pool_size, max_overflow = 5, 10
+
+    budget = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+    if budget > 0:
+        workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+        per_engine = max(2, budget // (workers * 2))
+        pool_size = max(1, per_engine * 2 // 3)
+        max_overflow = per_engine - pool_size
+
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", pool_size)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", max_overflow)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "3600")),
+    }
+
+
+class PoolStats:
+    """Thread-safe checkout counters for one pool (kept across pool.recreate())"""
+
+    def __init__(self, name: str, window: int = 1000):
+        self.name = name
+        self._lock = threading.Lock()
+        self._recent_waits = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.overflow_checkouts = 0
+            self.peak_checked_out = 0
+            self.peak_overflow = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self._recent_waits.clear()
+
+    def timed_checkout(self, pool, checkout):
+        """Run pool checkout, recording how long the caller waited"""
+        started = time.perf_counter()
+        try:
+            connection = checkout()
+        except exc.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+
+        waited = time.perf_counter() - started
+        checked_out = pool.checkedout()
+        overflow = max(0, pool.overflow())
+
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self._recent_waits.append(waited)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+            if overflow > 0:
+                self.overflow_checkouts += 1
+
+        return connection
+
+    def snapshot(self, pool) -> Dict:
+        """Current pool state plus counters since start (or last reset)"""
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            checkouts = self.checkouts
+
+            def percentile(p: float) -> float:
+                if not waits:
+                    return 0.0
+                return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+            return {
+                "engine": self.name,
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+                "wait_ms": {
+                    "avg": round(self.total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+                    "p50": round(percentile(0.50) * 1000, 3),
+                    "p95": round(percentile(0.95) * 1000, 3),
+                    "p99": round(percentile(0.99) * 1000, 3),
+                    "max": round(self.max_wait * 1000, 3),
+                    "window": len(waits)
+                }
+            }
+
+
+# Stats live on the pool CLASS so they survive engine.dispose() / pool.recreate()
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time, overflow use and timeouts"""
+    stats = PoolStats("sync")
+
+    def connect(self):
+        return self.stats.timed_checkout(self, super().connect)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time, overflow use and timeouts"""
+    stats = PoolStats("async")
+
+    def connect(self):
+        return self.stats.timed_checkout(self, super().connect)
@@ -0,0 +1,205 @@
+# app/fifo_allocator.py - FIFO stock allocation across supplier lots
+
+import os
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from models import ClothVariety, SupplierInventory, InventoryAllocation
+
+
+# Lots locked per query while walking the FIFO queue
+FIFO_LOCK_BATCH = int(os.getenv("FIFO_LOCK_BATCH", "5"))
+
+Allocation = Tuple[SupplierInventory, Decimal]
+
+
+class FifoAllocator:
+    """
+    Takes stock from a variety's supplier lots, oldest supply_date first, splitting a
+    quantity across as many lots as it needs. Every consumed slice is recorded in
+    inventory_allocations so a delete / return puts stock back into the lots it came from.
+
+    allocate() and release() lock the variety row (SELECT ... FOR UPDATE) before any of
+    its lots, so transactions moving one variety's stock queue there and then lock lots
+    in FIFO order - two sales can never hold each other's lots (lock-order deadlock).
+    The lock also refreshes the session's variety, so the caller's current_stock
+    update that follows is not a lost update. Different varieties don't wait on each other.
+    All changes happen in the caller's transaction - nothing here commits.
+    """
+
+    @staticmethod
+    def _lock_variety(db: Session, tenant_id: int, variety_id: int) -> Optional[ClothVariety]:
+        return db.query(ClothVariety).filter(
+            ClothVariety.id == variety_id,
+            ClothVariety.tenant_id == tenant_id
+        ).with_for_update().populate_existing().one_or_none()
+
+    @staticmethod
+    def _lock_next_lots(
+        db: Session,
+        tenant_id: int,
+        variety_id: int,
+        seen: Set[int]
+    ) -> List[SupplierInventory]:
+        query = db.query(SupplierInventory).filter(
+            SupplierInventory.tenant_id == tenant_id,
+            SupplierInventory.variety_id == variety_id,
+            SupplierInventory.quantity_remaining > 0
+        )
+        if seen:
+            query = query.filter(SupplierInventory.id.notin_(seen))
+
+        return query.order_by(
+            SupplierInventory.supply_date.asc(),
+            SupplierInventory.id.asc()
+        ).limit(FIFO_LOCK_BATCH).with_for_update().populate_existing().all()
+
+    @staticmethod
+    def allocate(db: Session, tenant_id: int, variety_id: int, quantity: Decimal) -> Tuple[List[Allocation], Decimal]:
+        """
+        Consume `quantity` from the oldest lots
+        Returns ([(lot, quantity taken)], shortfall) - shortfall > 0 if the lots ran out
+        """
+        allocations: List[Allocation] = []
+        needed = Decimal(str(quantity))
+        seen: Set[int] = set()
+
+        FifoAllocator._lock_variety(db, tenant_id, variety_id)
+
+        while needed > 0:
+            lots = FifoAllocator._lock_next_lots(db, tenant_id, variety_id, seen)
+            if not lots:
+                break
+
+            for lot in lots:
+                seen.add(lot.id)
+                take = min(lot.quantity_remaining, needed)
+                if take <= 0:
+                    continue
+
+                lot.quantity_used += take
+                lot.quantity_remaining -= take
+                allocations.append((lot, take))
+                needed -= take
+                if needed <= 0:
+                    break
+
+        return allocations, max(needed, Decimal('0'))
+
+    @staticmethod
+    def create_consumed_lot(
+        db: Session,
+        tenant_id: int,
+        variety_id: int,
+        quantity: Decimal,
+        cost_per_unit: Decimal,
+        supply_date: date,
+        supplier_name: str
+    ) -> SupplierInventory:
+        """
+        Auto-create a lot for stock sold but never recorded as supplied
+        (only the uncovered shortfall - already consumed in full)
+        """
+        lot = SupplierInventory(
+            tenant_id=tenant_id,
+            supplier_name=supplier_name,
+            variety_id=variety_id,
+            quantity=quantity,
+            price_per_item=cost_per_unit,
+            total_amount=cost_per_unit * quantity,
+            supply_date=supply_date,
+            quantity_used=quantity,
+            quantity_remaining=Decimal('0'),
+            quantity_returned=Decimal('0')
+        )
+        db.add(lot)
+        db.flush()
+        return lot
+
+    @staticmethod
+    def record(
+        db: Session,
+        tenant_id: int,
+        variety_id: int,
+        allocations: List[Allocation],
+        reference_type: str,
+        reference_id: int
+    ):
+        """Store the lot slices behind a sale / shopkeeper issue"""
+        db.add_all([
+            InventoryAllocation(
+                tenant_id=tenant_id,
+                supplier_inventory_id=lot.id,
+                variety_id=variety_id,
+                reference_type=reference_type,
+                reference_id=reference_id,
+                quantity=taken
+            )
+            for lot, taken in allocations
+        ])
+
+    @staticmethod
+    def release(
+        db: Session,
+        tenant_id: int,
+        variety_id: int,
+        reference_type: str,
+        reference_id: int,
+        quantity: Decimal,
+        legacy_lot_id: Optional[int] = None
+    ) -> Decimal:
+        """
+        Put `quantity` back into the lots a record consumed, newest slice first
+        Whatever the recorded slices don't cover (records created before allocations
+        were tracked) goes back to the record's single legacy_lot_id.
+        Returns the quantity actually restored to lots.
+        """
+        remaining = Decimal(str(quantity))
+
+        FifoAllocator._lock_variety(db, tenant_id, variety_id)
+
+        slices = db.query(InventoryAllocation).filter(
+            InventoryAllocation.tenant_id == tenant_id,
+            InventoryAllocation.reference_type == reference_type,
+            InventoryAllocation.reference_id == reference_id
+        ).order_by(InventoryAllocation.id.desc()).all()
+
+        lot_ids = {s.supplier_inventory_id for s in slices}
+        if legacy_lot_id:
+            lot_ids.add(legacy_lot_id)
+        if not lot_ids:
+            return Decimal('0')
+
+        lots = {
+            lot.id: lot
+            for lot in db.query(SupplierInventory).filter(
+                SupplierInventory.id.in_(lot_ids),
+                SupplierInventory.tenant_id == tenant_id
+            ).with_for_update().all()
+        }
+
+        released = Decimal('0')
+        for allocation in slices:
+            if remaining <= 0:
+                break
+
+            give = min(allocation.quantity, remaining)
+            lot = lots.get(allocation.supplier_inventory_id)
+            if lot:
+                lot.quantity_used -= give
+                lot.quantity_remaining += give
+                released += give
+
+            allocation.quantity -= give
+            remaining -= give
+            if allocation.quantity <= 0:
+                db.delete(allocation)
+
+        legacy_lot = lots.get(legacy_lot_id)
+        if remaining > 0 and legacy_lot:
+            legacy_lot.quantity_used -= remaining
+            legacy_lot.quantity_remaining += remaining
+            released += remaining
+
+        return released
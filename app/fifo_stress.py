@@ -0,0 +1,169 @@
+# app/fifo_stress.py - Concurrency stress check for FifoAllocator
+#
+# Usage (from app/, against the configured DATABASE_URL - use MySQL, SQLite has no row locks):
+#   python fifo_stress.py                          # 16 threads x 50 allocations over 20 lots
+#   python fifo_stress.py --threads 32 --allocations 100 --lots 10
+#
+# Creates a throwaway tenant, variety and lots, lets many sessions allocate from them
+# at once, then checks that no lot went negative and that every lot's quantity_used
+# equals the allocations recorded against it. The throwaway data is deleted afterwards.
+
+import sys
+import time
+import uuid
+import random
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import func
+from database import SessionLocal, init_db
+from auth_models import Tenant
+from models import ClothVariety, SupplierInventory, InventoryAllocation, MeasurementUnit
+from fifo_allocator import FifoAllocator
+
+
+def create_fixture(lots: int, lot_quantity: Decimal):
+    db = SessionLocal()
+    try:
+        tenant = Tenant(
+            business_name="FIFO stress test",
+            owner_name="FIFO stress test",
+            email=f"fifo-stress-{uuid.uuid4().hex}@example.invalid",
+            trial_start_date=date.today(),
+            trial_end_date=date.today()
+        )
+        db.add(tenant)
+        db.flush()
+
+        variety = ClothVariety(
+            tenant_id=tenant.id,
+            name="FIFO stress variety",
+            measurement_unit=MeasurementUnit.PIECES,
+            current_stock=lot_quantity * lots
+        )
+        db.add(variety)
+        db.flush()
+
+        for i in range(lots):
+            db.add(SupplierInventory(
+                tenant_id=tenant.id,
+                supplier_name="FIFO stress supplier",
+                variety_id=variety.id,
+                quantity=lot_quantity,
+                price_per_item=Decimal('100'),
+                total_amount=lot_quantity * 100,
+                supply_date=date.today() - timedelta(days=lots - i),
+                quantity_used=Decimal('0'),
+                quantity_remaining=lot_quantity,
+                quantity_returned=Decimal('0')
+            ))
+
+        db.commit()
+        return tenant.id, variety.id
+    finally:
+        db.close()
+
+
+def worker(tenant_id: int, variety_id: int, allocations: int, seed: int, results: list, errors: list):
+    rng = random.Random(seed)
+    for n in range(allocations):
+        db = SessionLocal()
+        try:
+            quantity = Decimal(rng.randint(1, 15))
+            taken, shortfall = FifoAllocator.allocate(db, tenant_id, variety_id, quantity)
+            FifoAllocator.record(db, tenant_id, variety_id, taken, "stress", seed * 100000 + n)
+            db.commit()
+            results.append((quantity, shortfall))
+        except Exception as e:
+            db.rollback()
+            errors.append(str(e))
+        finally:
+            db.close()
+
+
+def verify(tenant_id: int, requested: Decimal, shortfall: Decimal) -> list:
+    """Invariant violations (empty list = OK)"""
+    db = SessionLocal()
+    try:
+        problems = []
+        lots = db.query(SupplierInventory).filter(SupplierInventory.tenant_id == tenant_id).all()
+        allocated = dict(
+            db.query(InventoryAllocation.supplier_inventory_id, func.sum(InventoryAllocation.quantity))
+            .filter(InventoryAllocation.tenant_id == tenant_id)
+            .group_by(InventoryAllocation.supplier_inventory_id)
+            .all()
+        )
+
+        for lot in lots:
+            if lot.quantity_remaining < 0:
+                problems.append(f"lot {lot.id} went negative: {lot.quantity_remaining}")
+            if lot.quantity_used != (allocated.get(lot.id) or Decimal('0')):
+                problems.append(f"lot {lot.id} used {lot.quantity_used} but allocations total {allocated.get(lot.id)}")
+            if lot.quantity_used + lot.quantity_remaining != lot.quantity:
+                problems.append(f"lot {lot.id} used + remaining != quantity")
+
+        total_allocated = sum(allocated.values(), Decimal('0'))
+        if total_allocated + shortfall != requested:
+            problems.append(f"allocated {total_allocated} + shortfall {shortfall} != requested {requested}")
+        return problems
+    finally:
+        db.close()
+
+
+def cleanup(tenant_id: int):
+    db = SessionLocal()
+    try:
+        db.query(InventoryAllocation).filter(InventoryAllocation.tenant_id == tenant_id).delete()
+        db.query(SupplierInventory).filter(SupplierInventory.tenant_id == tenant_id).delete()
+        db.query(ClothVariety).filter(ClothVariety.tenant_id == tenant_id).delete()
+        db.query(Tenant).filter(Tenant.id == tenant_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Concurrent FIFO allocation stress check")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--allocations", type=int, default=50, help="Allocations per thread")
+    parser.add_argument("--lots", type=int, default=20)
+    parser.add_argument("--lot-quantity", type=int, default=200)
+    args = parser.parse_args()
+
+    init_db()
+    tenant_id, variety_id = create_fixture(args.lots, Decimal(args.lot_quantity))
+    print(f"🧪 Tenant {tenant_id}: {args.lots} lots x {args.lot_quantity}, "
+          f"{args.threads} threads x {args.allocations} allocations")
+
+    results, errors = [], []
+    threads = [
+        threading.Thread(target=worker, args=(tenant_id, variety_id, args.allocations, seed, results, errors))
+        for seed in range(1, args.threads + 1)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    try:
+        requested = sum((quantity for quantity, _ in results), Decimal('0'))
+        shortfall = sum((short for _, short in results), Decimal('0'))
+        problems = verify(tenant_id, requested, shortfall)
+
+        print(f"⏱️ {len(results)} allocations in {elapsed:.2f}s ({len(results) / elapsed:.0f}/s), "
+              f"requested {requested}, shortfall {shortfall}, {len(errors)} failed transactions")
+        for error in errors[:5]:
+            print(f"   ⚠️ {error}")
+    finally:
+        cleanup(tenant_id)
+
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print("✅ No lot over-consumed; every lot's usage matches its recorded allocations")
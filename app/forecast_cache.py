@@ -0,0 +1,109 @@
+# app/forecast_cache.py - LRU + TTL cache for fitted forecast results
+
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "256"))
+FORECAST_CACHE_TTL_SECONDS = int(os.getenv("FORECAST_CACHE_TTL_SECONDS", "3600"))
+
+
+class ForecastCache:
+    """
+    Caches forecast results so a dashboard refresh doesn't refit Prophet.
+
+    Key: (tenant_id, series kind, variety_id, days_ahead, fingerprint of the historical series).
+    Any new or changed sale changes the fingerprint, so stale forecasts are never served;
+    the TTL only bounds memory held by series nobody asks for anymore.
+    """
+
+    _entries: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def fingerprint(historical_data: List[Dict]) -> str:
+        """Stable hash of the series the model would be fitted on"""
+        payload = json.dumps(historical_data, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def make_key(
+        tenant_id: int,
+        kind: str,
+        days_ahead: int,
+        historical_data: List[Dict],
+        variety_id: Optional[int] = None
+    ) -> Tuple:
+        return (tenant_id, kind, variety_id, days_ahead, ForecastCache.fingerprint(historical_data))
+
+    @staticmethod
+    def get(key: Tuple) -> Optional[Dict]:
+        """Cached result (a copy) or None on miss / expiry"""
+        with ForecastCache._lock:
+            entry = ForecastCache._entries.get(key)
+
+            if entry and entry[0] < time.monotonic():
+                del ForecastCache._entries[key]
+                entry = None
+
+            if not entry:
+                ForecastCache._misses += 1
+                return None
+
+            ForecastCache._entries.move_to_end(key)
+            ForecastCache._hits += 1
+            result = entry[1]
+
+        return copy.deepcopy(result)
+
+    @staticmethod
+    def put(key: Tuple, result: Dict):
+        """Store a result, evicting the least recently used entries when full"""
+        if FORECAST_CACHE_TTL_SECONDS <= 0 or FORECAST_CACHE_MAX_ENTRIES <= 0:
+            return
+
+        with ForecastCache._lock:
+            ForecastCache._entries[key] = (
+                time.monotonic() + FORECAST_CACHE_TTL_SECONDS, copy.deepcopy(result)
+            )
+            ForecastCache._entries.move_to_end(key)
+
+            while len(ForecastCache._entries) > FORECAST_CACHE_MAX_ENTRIES:
+                ForecastCache._entries.popitem(last=False)
+
+    @staticmethod
+    def get_or_compute(key: Tuple, compute: Callable[[], Dict]) -> Dict:
+        """Return the cached result for key, or compute, cache and return it"""
+        result = ForecastCache.get(key)
+        if result is not None:
+            return result
+
+        result = compute()
+        ForecastCache.put(key, result)
+        return result
+
+    @staticmethod
+    def invalidate_tenant(tenant_id: int):
+        """Drop every cached forecast of a tenant"""
+        with ForecastCache._lock:
+            for key in [k for k in ForecastCache._entries if k[0] == tenant_id]:
+                del ForecastCache._entries[key]
+
+    @staticmethod
+    def stats() -> Dict:
+        with ForecastCache._lock:
+            return {
+                "entries": len(ForecastCache._entries),
+                "max_entries": FORECAST_CACHE_MAX_ENTRIES,
+                "ttl_seconds": FORECAST_CACHE_TTL_SECONDS,
+                "hits": ForecastCache._hits,
+                "misses": ForecastCache._misses
+            }
@@ -0,0 +1,324 @@
+# app/forecast_jobs.py - Bounded process pool for forecast fitting, with job tracking
+
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from fastapi import HTTPException, status
+from forecast_cache import ForecastCache
+
+
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(min(2, os.cpu_count() or 1))))
+FORECAST_MAX_JOBS_PER_TENANT = int(os.getenv("FORECAST_MAX_JOBS_PER_TENANT", "2"))
+FORECAST_JOB_RETENTION_SECONDS = int(os.getenv("FORECAST_JOB_RETENTION_SECONDS", "600"))
+FORECAST_WAIT_TIMEOUT_SECONDS = int(os.getenv("FORECAST_WAIT_TIMEOUT_SECONDS", "120"))
+# Series with fewer sale days than this get the fast mean-rate forecast instead of a Prophet fit
+FORECAST_MIN_PROPHET_DAYS = int(os.getenv("FORECAST_MIN_PROPHET_DAYS", "14"))
+
+FORECAST_KINDS = ("revenue", "demand")
+
+
+def run_forecast(kind: str, historical_data: List[Dict], days_ahead: int) -> Dict:
+    """
+    Fit and predict in a worker process (top-level so it can be pickled)
+    Prophet / Stan is CPU-bound - running it here keeps web workers free
+    """
+    from analytics_engine import AnalyticsEngine
+
+    if kind == "demand":
+        return AnalyticsEngine.forecast_product_demand_prophet(historical_data, days_ahead)
+    return AnalyticsEngine.forecast_revenue(historical_data, days_ahead)
+
+
+class ForecastJobs:
+    """
+    Submits forecasts to a bounded ProcessPoolExecutor and tracks them as jobs.
+
+    - Identical in-flight requests (same ForecastCache key) share one job
+    - Results land in ForecastCache, so a finished fit also serves later requests
+    - Each tenant may have at most FORECAST_MAX_JOBS_PER_TENANT fits in flight
+    - A pool broken by a dying worker (Stan crash, OOM kill) is replaced on the next submit
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _jobs: Dict[str, Dict] = {}
+    _in_flight: Dict[tuple, str] = {}    # cache key -> job_id
+    _lock = threading.RLock()
+
+    @staticmethod
+    def _get_executor() -> ProcessPoolExecutor:
+        # Created on first use so importing this module never forks
+        if ForecastJobs._executor is None:
+            ForecastJobs._executor = ProcessPoolExecutor(max_workers=FORECAST_WORKERS)
+        return ForecastJobs._executor
+
+    @staticmethod
+    def _submit_fit(kind: str, historical_data: List[Dict], days_ahead: int) -> Future:
+        """
+        Submit one fit to the pool (caller holds the lock)
+        If a worker process died, the pool refuses every submit with BrokenProcessPool:
+        replace it, fail the jobs it was running and retry once on the new pool.
+        """
+        try:
+            return ForecastJobs._get_executor().submit(run_forecast, kind, historical_data, days_ahead)
+        except BrokenProcessPool:
+            ForecastJobs._replace_broken_executor()
+            return ForecastJobs._get_executor().submit(run_forecast, kind, historical_data, days_ahead)
+
+    @staticmethod
+    def _replace_broken_executor():
+        """Drop the broken pool and fail its in-flight jobs (caller holds the lock)"""
+        print("⚠️ Forecast worker pool is broken (a worker process died) - starting a new one")
+        for job_id in list(ForecastJobs._in_flight.values()):
+            job = ForecastJobs._jobs.get(job_id)
+            if job is None or job["finished_at"] is not None:
+                continue
+            job.update(status="failed", error="Forecast worker process died", finished_at=time.time())
+        ForecastJobs._in_flight.clear()
+
+        # Cancelling its queued futures runs their done-callbacks in this thread (hence the RLock);
+        # the jobs are already recorded as failed, so _on_done leaves them alone
+        broken, ForecastJobs._executor = ForecastJobs._executor, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _prune():
+        """Forget finished jobs older than the retention window (caller holds the lock)"""
+        cutoff = time.time() - FORECAST_JOB_RETENTION_SECONDS
+        expired = [
+            job_id for job_id, job in ForecastJobs._jobs.items()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del ForecastJobs._jobs[job_id]
+
+    @staticmethod
+    def _new_job(tenant_id: int, kind: str, variety_id: Optional[int], days_ahead: int, key: tuple) -> Dict:
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "tenant_id": tenant_id,
+            "kind": kind,
+            "variety_id": variety_id,
+            "days_ahead": days_ahead,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None,
+            "_key": key,
+            "_future": None
+        }
+        ForecastJobs._jobs[job["job_id"]] = job
+        return job
+
+    @staticmethod
+    def submit(
+        tenant_id: int,
+        kind: str,
+        historical_data: List[Dict],
+        days_ahead: int,
+        variety_id: Optional[int] = None
+    ) -> Dict:
+        """
+        Start (or join) a forecast job and return it
+        Raises 429 if the tenant already has the maximum number of fits running
+        """
+        key = ForecastCache.make_key(tenant_id, kind, days_ahead, historical_data, variety_id=variety_id)
+
+        with ForecastJobs._lock:
+            ForecastJobs._prune()
+
+            # Same forecast already being fitted - join it
+            job_id = ForecastJobs._in_flight.get(key)
+            if job_id:
+                return ForecastJobs._jobs[job_id]
+
+            # Already fitted for this exact data - finished job, no process needed
+            cached = ForecastCache.get(key)
+            if cached is not None:
+                job = ForecastJobs._new_job(tenant_id, kind, variety_id, days_ahead, key)
+                job.update(status="completed", result=cached, finished_at=time.time())
+                return job
+
+            running = sum(
+                1 for in_flight_key in ForecastJobs._in_flight if in_flight_key[0] == tenant_id
+            )
+            if running >= FORECAST_MAX_JOBS_PER_TENANT:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Too many forecasts running for your business (max {FORECAST_MAX_JOBS_PER_TENANT}). Try again shortly."
+                )
+
+            future = ForecastJobs._submit_fit(kind, historical_data, days_ahead)
+            job = ForecastJobs._new_job(tenant_id, kind, variety_id, days_ahead, key)
+            job["_future"] = future
+            ForecastJobs._in_flight[key] = job["job_id"]
+
+        future.add_done_callback(lambda f, job_id=job["job_id"]: ForecastJobs._on_done(job_id, f))
+        return job
+
+    @staticmethod
+    def _on_done(job_id: str, future: Future):
+        """Record the outcome of a finished fit and release its in-flight slot"""
+        with ForecastJobs._lock:
+            job = ForecastJobs._jobs.get(job_id)
+            if job is None or job["finished_at"] is not None:
+                return  # unknown, or already recorded (callback and run() both call this)
+
+            ForecastJobs._in_flight.pop(job["_key"], None)
+            job["finished_at"] = time.time()
+
+            try:
+                if future.cancelled():
+                    raise RuntimeError("Forecast was cancelled")
+                job["result"] = future.result()
+                job["status"] = "completed"
+            except Exception as e:
+                job["error"] = str(e)
+                job["status"] = "failed"
+                print(f"❌ Forecast job {job_id} failed: {e}")
+
+        if job["status"] == "completed":
+            ForecastCache.put(job["_key"], job["result"])
+
+    @staticmethod
+    def run(
+        tenant_id: int,
+        kind: str,
+        historical_data: List[Dict],
+        days_ahead: int,
+        variety_id: Optional[int] = None
+    ) -> Dict:
+        """Submit (or join) a forecast and wait for its result - for the synchronous endpoints"""
+        job = ForecastJobs.submit(tenant_id, kind, historical_data, days_ahead, variety_id)
+
+        future = job["_future"]
+        if future is not None:
+            try:
+                future.result(timeout=FORECAST_WAIT_TIMEOUT_SECONDS)
+            except Exception:
+                pass  # status / error are recorded by _on_done
+
+            if future.done():
+                # Waiters wake up before done-callbacks run - record the outcome now
+                ForecastJobs._on_done(job["job_id"], future)
+
+        if job["status"] == "failed":
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Forecast failed: {job['error']}"
+            )
+        if job["status"] != "completed":
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=f"Forecast is still running. Poll /predictions/jobs/{job['job_id']}"
+            )
+
+        return job["result"]
+
+    @staticmethod
+    def run_batch(
+        tenant_id: int,
+        kind: str,
+        series: Dict[int, List[Dict]],
+        days_ahead: int
+    ) -> Dict[int, Dict]:
+        """
+        Fit many series (keyed by variety_id) across the pool and wait for them
+        Every fit is a job counted against FORECAST_MAX_JOBS_PER_TENANT, so the batch runs
+        in a sliding window of the tenant's free slots - never more fits than that in flight.
+        Series still unfinished at the deadline are left out of the result; fits already
+        started keep their slots until they actually finish. Cached series are not refitted.
+        Raises 429 if the tenant has no free slot at all.
+        """
+        results = {}
+        pending = []
+        for variety_id, historical_data in series.items():
+            key = ForecastCache.make_key(tenant_id, kind, days_ahead, historical_data, variety_id=variety_id)
+            cached = ForecastCache.get(key)
+            if cached is not None:
+                results[variety_id] = cached
+            else:
+                pending.append(variety_id)
+
+        waiting: Dict[Future, tuple] = {}  # future -> (variety_id, job)
+        deadline = time.monotonic() + FORECAST_WAIT_TIMEOUT_SECONDS
+
+        while pending or waiting:
+            # Fill the tenant's free slots
+            while pending:
+                try:
+                    job = ForecastJobs.submit(tenant_id, kind, series[pending[0]], days_ahead, variety_id=pending[0])
+                except HTTPException as e:
+                    if e.status_code == status.HTTP_429_TOO_MANY_REQUESTS and waiting:
+                        break  # wait for one of our own fits to free a slot
+                    raise
+
+                variety_id = pending.pop(0)
+                if job["_future"] is None:
+                    results[variety_id] = job["result"]  # fitted meanwhile
+                else:
+                    waiting[job["_future"]] = (variety_id, job)
+
+            remaining = deadline - time.monotonic()
+            if not waiting or remaining <= 0:
+                break
+
+            done, _ = wait(waiting, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # deadline
+
+            for future in done:
+                variety_id, job = waiting.pop(future)
+                # Waiters wake up before done-callbacks run - record the outcome now
+                ForecastJobs._on_done(job["job_id"], future)
+                if job["status"] == "completed":
+                    results[variety_id] = job["result"]
+                else:
+                    print(f"❌ Batch forecast for variety {variety_id} failed: {job['error']}")
+
+        if pending or waiting:
+            print(f"⏱️ Batch forecast for tenant {tenant_id}: {len(pending) + len(waiting)} series "
+                  f"unfinished after {FORECAST_WAIT_TIMEOUT_SECONDS}s")
+
+        return results
+
+    @staticmethod
+    def get(job_id: str, tenant_id: int) -> Optional[Dict]:
+        """A tenant's job by id (None if unknown, expired or another tenant's)"""
+        with ForecastJobs._lock:
+            job = ForecastJobs._jobs.get(job_id)
+            if not job or job["tenant_id"] != tenant_id:
+                return None
+            return job
+
+    @staticmethod
+    def describe(job: Dict) -> Dict:
+        """Public view of a job (no internal fields)"""
+        job_status = job["status"]
+        future = job["_future"]
+        if job_status == "queued" and future is not None and future.running():
+            job_status = "running"
+
+        return {
+            "job_id": job["job_id"],
+            "kind": job["kind"],
+            "variety_id": job["variety_id"],
+            "days_ahead": job["days_ahead"],
+            "status": job_status,
+            "result": job["result"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "finished_at": job["finished_at"]
+        }
+
+    @staticmethod
+    def shutdown():
+        """Stop the worker processes (application shutdown)"""
+        if ForecastJobs._executor is not None:
+            ForecastJobs._executor.shutdown(wait=False, cancel_futures=True)
+            ForecastJobs._executor = None
@@ -0,0 +1,94 @@
+# app/import_timing.py - Startup import cost report
+#
+# Usage (from app/):
+#   python import_timing.py                      # report for `import main`
+#   python import_timing.py --top 30
+#   python import_timing.py --budget 2.5         # exit 1 if `import main` takes longer
+#   IMPORT_TIME_BUDGET_SECONDS=2.5 python import_timing.py
+
+import os
+import sys
+import subprocess
+from typing import Dict, List
+
+
+def measure_imports(module: str = "main") -> List[Dict]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and parse the report
+    Returns one entry per imported module: {"module", "self_ms", "cumulative_ms", "depth"}
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        # import time:       self [us] |   cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            # Nested imports are indented by two spaces per level
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2
+        })
+
+    return entries
+
+
+def total_import_seconds(entries: List[Dict]) -> float:
+    """Wall time of all top-level imports (the cost of `import main`)"""
+    return sum(e["cumulative_ms"] for e in entries if e["depth"] == 0) / 1000
+
+
+def print_report(entries: List[Dict], top: int = 20):
+    """Slowest top-level packages by cumulative import time"""
+    top_level = sorted(
+        (e for e in entries if e["depth"] == 0),
+        key=lambda e: e["cumulative_ms"],
+        reverse=True
+    )
+
+    print(f"{'cumulative ms':>14} {'self ms':>10}  module")
+    for entry in top_level[:top]:
+        print(f"{entry['cumulative_ms']:>14.1f} {entry['self_ms']:>10.1f}  {entry['module']}")
+
+    heavy = [name for name in ("prophet", "pandas", "sklearn", "numpy")
+             if any(e["module"] == name for e in entries)]
+    if heavy:
+        print(f"\n⚠️ Heavy analytics modules imported at startup: {', '.join(heavy)}")
+
+    print(f"\n⏱️ Total import time: {total_import_seconds(entries):.2f}s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-module import cost of the API")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="How many modules to list")
+    parser.add_argument(
+        "--budget", type=float,
+        default=float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "0")),
+        help="Fail (exit 1) if the import takes longer than this many seconds"
+    )
+    args = parser.parse_args()
+
+    entries = measure_imports(args.module)
+    print_report(entries, args.top)
+
+    if args.budget > 0:
+        total = total_import_seconds(entries)
+        if total > args.budget:
+            print(f"❌ Import time {total:.2f}s exceeds budget of {args.budget:.2f}s")
+            sys.exit(1)
+        print(f"✅ Within budget of {args.budget:.2f}s")
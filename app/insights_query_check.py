@@ -0,0 +1,122 @@
+# app/insights_query_check.py - Smart-insights must issue the same number of queries at any sale volume
+#
+# Usage (from app/, against the configured DATABASE_URL):
+#   python insights_query_check.py                       # 10, 1000, 20000 sales in the window
+#   python insights_query_check.py --sizes 100 5000
+#
+# Fills a throwaway tenant with more and more sales (spread over 4 varieties and the last
+# 30 days), runs GET /predictions/smart-insights' handler (bypassing the response cache)
+# after each step and counts the SQL statements it issues. Exits 1 if the count changes
+# with the number of sales. The throwaway data is deleted afterwards.
+
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import insert
+from database import SessionLocal, init_db
+from auth_models import Tenant
+from models import Sale, ClothVariety, MeasurementUnit
+from sales_rollup import SalesRollupService
+from sale_write_benchmark import StatementCounter, cleanup_sales
+from fifo_stress import create_fixture, cleanup
+from routes.predictions import get_smart_insights
+
+
+def add_varieties(tenant_id: int, count: int):
+    db = SessionLocal()
+    try:
+        db.add_all([
+            ClothVariety(
+                tenant_id=tenant_id,
+                name=f"Insights check variety {n}",
+                measurement_unit=MeasurementUnit.PIECES,
+                current_stock=Decimal('0')
+            )
+            for n in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def add_sales(tenant_id: int, variety_ids: list, start: int, count: int):
+    """Insert sales start..start+count-1 in one statement, then rebuild the tenant's rollup"""
+    rows = [
+        {
+            "tenant_id": tenant_id,
+            "salesperson_name": f"check-{n % 3}",
+            "variety_id": variety_ids[n % len(variety_ids)],
+            "quantity": Decimal('2'),
+            "selling_price": Decimal('150'),
+            "cost_price": Decimal('100'),
+            "profit": Decimal('100'),
+            "sale_date": date.today() - timedelta(days=n % 30)
+        }
+        for n in range(start, start + count)
+    ]
+
+    db = SessionLocal()
+    try:
+        if rows:
+            db.execute(insert(Sale), rows)
+            db.commit()
+        SalesRollupService.rebuild(db, tenant_id=tenant_id)
+    finally:
+        db.close()
+
+
+def count_insight_queries(counter: StatementCounter, tenant_id: int):
+    db = SessionLocal()
+    try:
+        tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+
+        before = counter.statements
+        started = time.perf_counter()
+        # __wrapped__: the handler itself, not the cached response
+        result = get_smart_insights.__wrapped__(days=30, tenant=tenant, db=db)
+        elapsed = time.perf_counter() - started
+
+        return counter.statements - before, elapsed, len(result["insights"])
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Smart-insights query count vs number of sales")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 20000],
+                        help="Total sales in the window at each step (ascending)")
+    args = parser.parse_args()
+
+    init_db()
+    tenant_id, variety_id = create_fixture(lots=1, lot_quantity=Decimal('10'))
+    add_varieties(tenant_id, 3)
+
+    db = SessionLocal()
+    try:
+        variety_ids = [v.id for v in db.query(ClothVariety).filter(ClothVariety.tenant_id == tenant_id).all()]
+    finally:
+        db.close()
+
+    counter = StatementCounter()
+    results = []
+    try:
+        inserted = 0
+        for size in sorted(args.sizes):
+            add_sales(tenant_id, variety_ids, inserted, size - inserted)
+            inserted = size
+            results.append((size, *count_insight_queries(counter, tenant_id)))
+    finally:
+        cleanup_sales(tenant_id)
+        cleanup(tenant_id)
+
+    print(f"{'sales':>8} {'queries':>8} {'ms':>8} {'insights':>9}")
+    for size, queries, elapsed, insights in results:
+        print(f"{size:>8} {queries:>8} {elapsed * 1000:>8.1f} {insights:>9}")
+
+    if len({queries for _, queries, _, _ in results}) > 1:
+        print("❌ Query count grows with the number of sales")
+        sys.exit(1)
+    print("✅ Query count is independent of the number of sales")
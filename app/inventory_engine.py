@@ -0,0 +1,162 @@
+# app/inventory_engine.py - Set-based inventory status calculations
+
+from typing import Dict, List, Optional
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from models import ClothVariety, SupplierInventory, Sale, SupplierReturn, StockType
+from schemas import InventoryStatusResponse
+
+
+class InventoryEngine:
+    """
+    Computes supplied / sold / returned totals for many varieties at once.
+    Uses one grouped query per source table instead of three queries per variety,
+    so the number of round-trips stays constant no matter how many varieties a tenant has.
+    """
+
+    @staticmethod
+    def _totals_statements(tenant_id: int, variety_ids: Optional[List[int]] = None) -> List:
+        """Grouped supplied / sold / returned statements (shared by the sync and async readers)"""
+        supplied = select(
+            SupplierInventory.variety_id,
+            func.sum(SupplierInventory.quantity)
+        ).where(
+            SupplierInventory.tenant_id == tenant_id
+        ).group_by(SupplierInventory.variety_id)
+
+        # Only new-stock sales draw down supplier inventory
+        sold = select(
+            Sale.variety_id,
+            func.sum(Sale.quantity)
+        ).where(
+            Sale.tenant_id == tenant_id,
+            Sale.stock_type == StockType.NEW_STOCK
+        ).group_by(Sale.variety_id)
+
+        returned = select(
+            SupplierReturn.variety_id,
+            func.sum(SupplierReturn.quantity)
+        ).where(
+            SupplierReturn.tenant_id == tenant_id
+        ).group_by(SupplierReturn.variety_id)
+
+        if variety_ids is not None:
+            supplied = supplied.where(SupplierInventory.variety_id.in_(variety_ids))
+            sold = sold.where(Sale.variety_id.in_(variety_ids))
+            returned = returned.where(SupplierReturn.variety_id.in_(variety_ids))
+
+        return [supplied, sold, returned]
+
+    @staticmethod
+    def _merge_totals(supplied: Dict, sold: Dict, returned: Dict) -> Dict[int, Dict[str, Decimal]]:
+        totals = {}
+        for variety_id in set(supplied) | set(sold) | set(returned):
+            totals[variety_id] = {
+                "total_supplied": supplied.get(variety_id) or Decimal('0'),
+                "total_sold": sold.get(variety_id) or Decimal('0'),
+                "total_returned": returned.get(variety_id) or Decimal('0')
+            }
+        return totals
+
+    @staticmethod
+    def get_variety_totals(
+        db: Session,
+        tenant_id: int,
+        variety_ids: Optional[List[int]] = None
+    ) -> Dict[int, Dict[str, Decimal]]:
+        """
+        Get totals for every variety of a tenant (or only the given variety_ids)
+        Returns: {variety_id: {"total_supplied": ..., "total_sold": ..., "total_returned": ...}}
+        """
+        if variety_ids is not None and not variety_ids:
+            return {}
+
+        supplied, sold, returned = [
+            dict(db.execute(statement).all())
+            for statement in InventoryEngine._totals_statements(tenant_id, variety_ids)
+        ]
+        return InventoryEngine._merge_totals(supplied, sold, returned)
+
+    @staticmethod
+    async def aget_variety_totals(
+        db: AsyncSession,
+        tenant_id: int,
+        variety_ids: Optional[List[int]] = None
+    ) -> Dict[int, Dict[str, Decimal]]:
+        """Async version of get_variety_totals"""
+        if variety_ids is not None and not variety_ids:
+            return {}
+
+        results = []
+        for statement in InventoryEngine._totals_statements(tenant_id, variety_ids):
+            results.append(dict((await db.execute(statement)).all()))
+
+        return InventoryEngine._merge_totals(*results)
+
+    @staticmethod
+    def is_low_stock(variety: ClothVariety) -> bool:
+        """Check if a variety is at or below its minimum stock level"""
+        if variety.min_stock_level is not None:
+            return variety.current_stock <= variety.min_stock_level
+        return False
+
+    @staticmethod
+    def build_status(
+        variety: ClothVariety,
+        totals: Optional[Dict[str, Decimal]] = None
+    ) -> InventoryStatusResponse:
+        """Build the status response for one variety from precomputed totals"""
+        totals = totals or {}
+
+        return InventoryStatusResponse(
+            variety_id=variety.id,
+            variety_name=variety.name,
+            current_stock=variety.current_stock,
+            min_stock_level=variety.min_stock_level,
+            is_low_stock=InventoryEngine.is_low_stock(variety),
+            total_supplied=totals.get("total_supplied", Decimal('0')),
+            total_sold=totals.get("total_sold", Decimal('0')),
+            total_returned=totals.get("total_returned", Decimal('0')),
+            measurement_unit=variety.measurement_unit.value
+        )
+
+    @staticmethod
+    def get_status_for_varieties(
+        db: Session,
+        tenant_id: int,
+        varieties: List[ClothVariety]
+    ) -> List[InventoryStatusResponse]:
+        """
+        Build status responses for a list of varieties in a constant number of queries
+        Small lists are filtered by id; full listings aggregate the whole tenant.
+        """
+        if not varieties:
+            return []
+
+        variety_ids = [v.id for v in varieties]
+        totals = InventoryEngine.get_variety_totals(
+            db, tenant_id,
+            variety_ids=variety_ids if len(variety_ids) <= 500 else None
+        )
+
+        return [InventoryEngine.build_status(v, totals.get(v.id)) for v in varieties]
+
+    @staticmethod
+    async def aget_status_for_varieties(
+        db: AsyncSession,
+        tenant_id: int,
+        varieties: List[ClothVariety]
+    ) -> List[InventoryStatusResponse]:
+        """Async version of get_status_for_varieties"""
+        if not varieties:
+            return []
+
+        variety_ids = [v.id for v in varieties]
+        totals = await InventoryEngine.aget_variety_totals(
+            db, tenant_id,
+            variety_ids=variety_ids if len(variety_ids) <= 500 else None
+        )
+
+        return [InventoryEngine.build_status(v, totals.get(v.id)) for v in varieties]
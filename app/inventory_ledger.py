@@ -0,0 +1,349 @@
+# app/inventory_ledger.py - Inventory ledger: monthly snapshots, point-in-time stock, reconciliation
+
+from typing import Dict, List, Optional, Tuple
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import event, func, select, update, and_, or_, extract
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import ClothVariety, InventoryMovement, InventorySnapshot
+from data_versions import DataVersions
+
+
+def month_end(day: date) -> date:
+    """Last day of day's month"""
+    next_month = day.replace(day=28) + timedelta(days=4)
+    return next_month - timedelta(days=next_month.day)
+
+
+def last_closed_month_end(today: Optional[date] = None) -> date:
+    """Snapshots are only taken for months that are over"""
+    today = today or date.today()
+    return today.replace(day=1) - timedelta(days=1)
+
+
+class InventoryLedger:
+    """
+    inventory_movements is the append-only stock ledger: a variety's stock on any date is
+    the sum of its movement quantities up to that date. Corrections are new movements
+    (reversals / adjustments), never edits.
+
+    inventory_snapshots stores that sum at the end of every closed month in which a
+    variety moved, so "stock on date D" = nearest snapshot on or before D plus the
+    movements after it - at most one month of rows instead of the whole history.
+    A movement dated inside an already-snapshotted month drops the snapshots it
+    invalidates (see _invalidate_backdated); the next build_snapshots() restores them.
+    """
+
+    # ==================== WRITES ====================
+
+    @staticmethod
+    def record_movement(
+        db: Session,
+        tenant_id: int,
+        variety: ClothVariety,
+        movement_type: str,
+        quantity: Decimal,
+        reference_type: Optional[str],
+        reference_id: Optional[int],
+        notes: str,
+        movement_date: date
+    ) -> InventoryMovement:
+        """
+        Apply a signed quantity to the variety's stock and append the matching ledger row
+        The caller holds the variety's row lock (FifoAllocator.allocate / release take it and
+        refresh `variety`), so this read-modify-write and stock_after see every committed movement.
+        """
+        variety.current_stock += quantity
+
+        movement = InventoryMovement(
+            tenant_id=tenant_id,
+            variety_id=variety.id,
+            movement_type=movement_type,
+            quantity=quantity,
+            reference_id=reference_id,
+            reference_type=reference_type,
+            notes=notes,
+            movement_date=movement_date,
+            stock_after=variety.current_stock
+        )
+        db.add(movement)
+        return movement
+
+    @staticmethod
+    def invalidate_snapshots(db: Session, tenant_id: int, variety_id: int, from_date: date):
+        """Drop snapshots that a movement dated from_date makes stale"""
+        db.query(InventorySnapshot).filter(
+            InventorySnapshot.tenant_id == tenant_id,
+            InventorySnapshot.variety_id == variety_id,
+            InventorySnapshot.snapshot_date >= from_date
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def invalidate_for_rows(db: Session, rows: List[Dict]):
+        """invalidate_snapshots for movement dicts written with a bulk insert (no ORM events)"""
+        cutoff = last_closed_month_end()
+        earliest: Dict[Tuple[int, int], date] = {}
+        for row in rows:
+            if row["movement_date"] <= cutoff:
+                key = (row["tenant_id"], row["variety_id"])
+                earliest[key] = min(earliest.get(key, row["movement_date"]), row["movement_date"])
+
+        for (tenant_id, variety_id), from_date in earliest.items():
+            InventoryLedger.invalidate_snapshots(db, tenant_id, variety_id, from_date)
+
+    # ==================== SNAPSHOTS ====================
+
+    @staticmethod
+    def build_snapshots(db: Session, tenant_id: Optional[int] = None, through: Optional[date] = None) -> int:
+        """
+        Recompute month-end snapshots from the ledger (monthly job; safe to rerun)
+        One grouped query over the movements, cumulative sums in Python, one bulk insert.
+        Commits. Returns the number of snapshot rows written.
+        """
+        through = through or last_closed_month_end()
+
+        year = extract('year', InventoryMovement.movement_date)
+        month = extract('month', InventoryMovement.movement_date)
+        monthly = select(
+            InventoryMovement.tenant_id,
+            InventoryMovement.variety_id,
+            year,
+            month,
+            func.sum(InventoryMovement.quantity)
+        ).where(
+            InventoryMovement.movement_date <= through
+        ).group_by(
+            InventoryMovement.tenant_id, InventoryMovement.variety_id, year, month
+        ).order_by(
+            InventoryMovement.tenant_id, InventoryMovement.variety_id, year, month
+        )
+
+        delete_query = db.query(InventorySnapshot)
+        if tenant_id is not None:
+            monthly = monthly.where(InventoryMovement.tenant_id == tenant_id)
+            delete_query = delete_query.filter(InventorySnapshot.tenant_id == tenant_id)
+
+        rows = []
+        running: Dict[Tuple[int, int], Decimal] = {}
+        for row_tenant, variety_id, row_year, row_month, quantity in db.execute(monthly):
+            key = (row_tenant, variety_id)
+            running[key] = running.get(key, Decimal('0')) + (quantity or Decimal('0'))
+            rows.append({
+                "tenant_id": row_tenant,
+                "variety_id": variety_id,
+                "snapshot_date": month_end(date(int(row_year), int(row_month), 1)),
+                "stock": running[key]
+            })
+
+        delete_query.delete(synchronize_session=False)
+        if rows:
+            db.execute(InventorySnapshot.__table__.insert(), rows)
+        db.commit()
+
+        return len(rows)
+
+    @staticmethod
+    def build_if_empty(db: Session) -> int:
+        """Take the first snapshots on first start after the table was added"""
+        has_snapshots = db.query(InventorySnapshot.id).first() is not None
+        has_movements = db.query(InventoryMovement.id).first() is not None
+
+        if has_snapshots or not has_movements:
+            return 0
+
+        print("📊 Building inventory snapshots from the movement ledger...")
+        return InventoryLedger.build_snapshots(db)
+
+    # ==================== POINT-IN-TIME READS ====================
+
+    @staticmethod
+    def _as_of_statements(tenant_id: int, as_of: date, variety_id: Optional[int] = None) -> List:
+        """Nearest-snapshot and delta statements (shared by the sync and async readers)"""
+        latest = select(
+            InventorySnapshot.variety_id,
+            func.max(InventorySnapshot.snapshot_date).label('snapshot_date')
+        ).where(
+            InventorySnapshot.tenant_id == tenant_id,
+            InventorySnapshot.snapshot_date <= as_of
+        ).group_by(InventorySnapshot.variety_id)
+        if variety_id is not None:
+            latest = latest.where(InventorySnapshot.variety_id == variety_id)
+        latest = latest.subquery()
+
+        snapshots = select(
+            InventorySnapshot.variety_id,
+            InventorySnapshot.snapshot_date,
+            InventorySnapshot.stock
+        ).join(
+            latest,
+            and_(
+                InventorySnapshot.variety_id == latest.c.variety_id,
+                InventorySnapshot.snapshot_date == latest.c.snapshot_date
+            )
+        ).where(InventorySnapshot.tenant_id == tenant_id)
+
+        # Only movements after each variety's snapshot (all of them if it has none)
+        deltas = select(
+            InventoryMovement.variety_id,
+            func.sum(InventoryMovement.quantity)
+        ).outerjoin(
+            latest, InventoryMovement.variety_id == latest.c.variety_id
+        ).where(
+            InventoryMovement.tenant_id == tenant_id,
+            InventoryMovement.movement_date <= as_of,
+            or_(
+                latest.c.snapshot_date.is_(None),
+                InventoryMovement.movement_date > latest.c.snapshot_date
+            )
+        ).group_by(InventoryMovement.variety_id)
+        if variety_id is not None:
+            deltas = deltas.where(InventoryMovement.variety_id == variety_id)
+
+        varieties = select(ClothVariety.id, ClothVariety.name).where(ClothVariety.tenant_id == tenant_id)
+        if variety_id is not None:
+            varieties = varieties.where(ClothVariety.id == variety_id)
+
+        return [varieties.order_by(ClothVariety.name), snapshots, deltas]
+
+    @staticmethod
+    def _merge_as_of(varieties, snapshots, deltas: Dict) -> List[Dict]:
+        snapshot_by_variety = {variety_id: (snapshot_date, stock) for variety_id, snapshot_date, stock in snapshots}
+
+        result = []
+        for variety_id, name in varieties:
+            snapshot_date, base = snapshot_by_variety.get(variety_id, (None, Decimal('0')))
+            delta = deltas.get(variety_id) or Decimal('0')
+            result.append({
+                "variety_id": variety_id,
+                "variety_name": name,
+                "stock": base + delta,
+                "snapshot_date": snapshot_date,
+                "delta_since_snapshot": delta
+            })
+        return result
+
+    @staticmethod
+    def get_stock_as_of(db: Session, tenant_id: int, as_of: date, variety_id: Optional[int] = None) -> List[Dict]:
+        """Ledger stock of every variety (or one) at the end of as_of"""
+        varieties, snapshots, deltas = InventoryLedger._as_of_statements(tenant_id, as_of, variety_id)
+        return InventoryLedger._merge_as_of(
+            db.execute(varieties).all(),
+            db.execute(snapshots).all(),
+            dict(db.execute(deltas).all())
+        )
+
+    @staticmethod
+    async def aget_stock_as_of(
+        db: AsyncSession,
+        tenant_id: int,
+        as_of: date,
+        variety_id: Optional[int] = None
+    ) -> List[Dict]:
+        """Async version of get_stock_as_of"""
+        varieties, snapshots, deltas = InventoryLedger._as_of_statements(tenant_id, as_of, variety_id)
+        return InventoryLedger._merge_as_of(
+            (await db.execute(varieties)).all(),
+            (await db.execute(snapshots)).all(),
+            dict((await db.execute(deltas)).all())
+        )
+
+    # ==================== RECONCILIATION ====================
+
+    @staticmethod
+    def reconcile(db: Session, tenant_id: Optional[int] = None, apply: bool = False) -> List[Dict]:
+        """
+        Compare every variety's current_stock with its ledger total (two grouped queries)
+        With apply=True, drifted varieties are set to the ledger total in one bulk UPDATE. Commits.
+        Returns the drifted varieties: tenant_id, variety_id, variety_name, current_stock, ledger_stock, drift
+        """
+        ledger_query = select(
+            InventoryMovement.variety_id,
+            func.sum(InventoryMovement.quantity)
+        ).group_by(InventoryMovement.variety_id)
+
+        varieties_query = select(
+            ClothVariety.id, ClothVariety.tenant_id, ClothVariety.name, ClothVariety.current_stock
+        )
+
+        if tenant_id is not None:
+            ledger_query = ledger_query.where(InventoryMovement.tenant_id == tenant_id)
+            varieties_query = varieties_query.where(ClothVariety.tenant_id == tenant_id)
+
+        ledger = dict(db.execute(ledger_query).all())
+
+        drifted = []
+        for variety_id, variety_tenant, name, current_stock in db.execute(varieties_query):
+            ledger_stock = ledger.get(variety_id) or Decimal('0')
+            current_stock = current_stock or Decimal('0')
+            if ledger_stock != current_stock:
+                drifted.append({
+                    "tenant_id": variety_tenant,
+                    "variety_id": variety_id,
+                    "variety_name": name,
+                    "current_stock": current_stock,
+                    "ledger_stock": ledger_stock,
+                    "drift": current_stock - ledger_stock
+                })
+
+        if apply and drifted:
+            db.execute(
+                update(ClothVariety),
+                [{"id": row["variety_id"], "current_stock": row["ledger_stock"]} for row in drifted]
+            )
+            # Bulk UPDATE skips the ORM flush, so bump the data versions explicitly
+            DataVersions.bump(db, {(row["tenant_id"], "inventory") for row in drifted})
+            db.commit()
+            print(f"🔧 Reconciled current_stock for {len(drifted)} varieties")
+
+        return drifted
+
+
+@event.listens_for(Session, "before_flush")
+def _invalidate_backdated(session: Session, flush_context, instances):
+    """
+    Drop snapshots covering the date of any new movement dated in a closed month
+    Movements dated in the current month (the normal case) cost nothing here
+    """
+    cutoff = last_closed_month_end()
+    earliest: Dict[Tuple[int, int], date] = {}
+
+    for obj in session.new:
+        if isinstance(obj, InventoryMovement) and obj.movement_date and obj.movement_date <= cutoff:
+            key = (obj.tenant_id, obj.variety_id)
+            earliest[key] = min(earliest.get(key, obj.movement_date), obj.movement_date)
+
+    for (tenant_id, variety_id), from_date in earliest.items():
+        InventoryLedger.invalidate_snapshots(session, tenant_id, variety_id, from_date)
+
+
+if __name__ == "__main__":
+    # Monthly job:  python inventory_ledger.py snapshot [--tenant-id N]
+    # Drift report: python inventory_ledger.py reconcile [--tenant-id N] [--apply]
+    import argparse
+    from database import SessionLocal, Base, engine
+
+    parser = argparse.ArgumentParser(description="Inventory ledger snapshots and stock reconciliation")
+    parser.add_argument("command", choices=["snapshot", "reconcile"])
+    parser.add_argument("--tenant-id", type=int, default=None, help="Only this tenant")
+    parser.add_argument("--apply", action="store_true", help="reconcile: overwrite current_stock with the ledger total")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[InventorySnapshot.__table__])
+
+    db = SessionLocal()
+    try:
+        if args.command == "snapshot":
+            rows = InventoryLedger.build_snapshots(db, tenant_id=args.tenant_id)
+            print(f"✅ Wrote {rows} inventory snapshots (through {last_closed_month_end()})")
+        else:
+            drifted = InventoryLedger.reconcile(db, tenant_id=args.tenant_id, apply=args.apply)
+            for row in drifted:
+                print(f"⚠️ tenant {row['tenant_id']} variety {row['variety_id']} ({row['variety_name']}): "
+                      f"current_stock {row['current_stock']} vs ledger {row['ledger_stock']} (drift {row['drift']})")
+            if not drifted:
+                print("✅ current_stock matches the ledger for every variety")
+            elif not args.apply:
+                print(f"❗ {len(drifted)} varieties drifted - rerun with --apply to fix")
+    finally:
+        db.close()
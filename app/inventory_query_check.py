@@ -0,0 +1,125 @@
+# app/inventory_query_check.py - Inventory status must issue the same number of queries at any catalog size
+#
+# Usage (from app/, against the configured DATABASE_URL):
+#   python inventory_query_check.py                      # 10, 1000, 5000 varieties
+#   python inventory_query_check.py --sizes 100 20000
+#
+# Fills a throwaway tenant with more and more varieties (each with one supplier lot, half of
+# them below their minimum stock level), runs the GET /inventory/status and
+# /inventory/low-stock handlers after each step and counts the SQL statements they issue.
+# Exits 1 if the count changes with the number of varieties. The throwaway data is deleted afterwards.
+
+import sys
+import time
+import asyncio
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import insert
+from database import SessionLocal, AsyncSessionLocal, async_engine, init_db
+from auth_models import Tenant
+from models import ClothVariety, SupplierInventory, MeasurementUnit
+from sale_write_benchmark import StatementCounter
+from fifo_stress import create_fixture, cleanup
+from routes.inventory import get_inventory_status, get_low_stock_items
+
+
+def add_varieties(tenant_id: int, start: int, count: int):
+    """Insert varieties start..start+count-1 and one supplier lot each"""
+    if count <= 0:
+        return
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(ClothVariety), [
+            {
+                "tenant_id": tenant_id,
+                "name": f"Inventory check variety {n}",
+                "measurement_unit": MeasurementUnit.PIECES,
+                "current_stock": Decimal('10'),
+                # 0 is a real minimum level: those varieties are never low on stock
+                "min_stock_level": Decimal('20') if n % 2 else Decimal('0')
+            }
+            for n in range(start, start + count)
+        ])
+        variety_ids = [
+            variety_id for (variety_id,) in db.query(ClothVariety.id).filter(
+                ClothVariety.tenant_id == tenant_id,
+                ClothVariety.name.like("Inventory check variety %")
+            ).order_by(ClothVariety.id.desc()).limit(count)
+        ]
+        db.execute(insert(SupplierInventory), [
+            {
+                "tenant_id": tenant_id,
+                "supplier_name": "Inventory check supplier",
+                "variety_id": variety_id,
+                "quantity": Decimal('10'),
+                "price_per_item": Decimal('100'),
+                "total_amount": Decimal('1000'),
+                "supply_date": date.today()
+            }
+            for variety_id in variety_ids
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def count_status_queries(counter: StatementCounter, tenant: Tenant):
+    results = {}
+    for name, handler in (("status", get_inventory_status), ("low-stock", get_low_stock_items)):
+        async with AsyncSessionLocal() as db:
+            before = counter.statements
+            started = time.perf_counter()
+            rows = await handler(tenant=tenant, user=None, etag=None, db=db)
+            results[name] = (counter.statements - before, time.perf_counter() - started, len(rows))
+    return results
+
+
+async def run_steps(counter: StatementCounter, tenant: Tenant, sizes: list):
+    results = []
+    created = 0
+    try:
+        for size in sizes:
+            add_varieties(tenant.id, created, size - created)
+            created = size
+            results.append((size, await count_status_queries(counter, tenant)))
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inventory status query count vs number of varieties")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 5000],
+                        help="Total varieties at each step (ascending)")
+    args = parser.parse_args()
+
+    init_db()
+    tenant_id, _ = create_fixture(lots=1, lot_quantity=Decimal('10'))
+
+    db = SessionLocal()
+    try:
+        tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+        db.expunge(tenant)  # the handlers only read tenant.id
+    finally:
+        db.close()
+
+    counter = StatementCounter(async_engine.sync_engine)
+    try:
+        # One event loop for every step: pooled async connections belong to the loop that opened them
+        results = asyncio.run(run_steps(counter, tenant, sorted(args.sizes)))
+    finally:
+        cleanup(tenant_id)
+
+    print(f"{'varieties':>10} {'endpoint':>10} {'queries':>8} {'ms':>8} {'rows':>7}")
+    for size, endpoints in results:
+        for name, (queries, elapsed, rows) in endpoints.items():
+            print(f"{size:>10} {name:>10} {queries:>8} {elapsed * 1000:>8.1f} {rows:>7}")
+
+    for name in ("status", "low-stock"):
+        if len({endpoints[name][0] for _, endpoints in results}) > 1:
+            print(f"❌ /inventory/{name} query count grows with the number of varieties")
+            sys.exit(1)
+    print("✅ Query count is independent of the number of varieties")
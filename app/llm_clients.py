@@ -0,0 +1,324 @@
+# app/llm_clients.py - Process-wide LLM client registry (chatbot, voice validator, AI agent)
+
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, List, Optional
+
+
+# 'gemini' (default) or 'fake' (canned responses, no network - tests / local dev)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").strip().lower()
+# Build every client in the background at startup so the first request doesn't pay for it
+LLM_WARMUP = os.getenv("LLM_WARMUP", "true").strip().lower() in ("1", "true", "yes")
+LLM_FAKE_RESPONSE = os.getenv("LLM_FAKE_RESPONSE", "This is a canned response from the fake LLM backend.")
+LLM_FAKE_LATENCY_SECONDS = float(os.getenv("LLM_FAKE_LATENCY_SECONDS", "0"))
+
+# Async calls: seconds before a call (including its wait for a slot) is abandoned (0 = no limit),
+# and how many calls may be in flight per worker process at once
+LLM_TIMEOUT_SECONDS = int(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_DISCONNECT_POLL_SECONDS = 0.5
+
+# Per-use-case model configuration; LLM_<PROFILE>_MODEL / LLM_<PROFILE>_TEMPERATURE override
+MODEL_PROFILES: Dict[str, Dict] = {
+    "chat": {"model": "gemini-2.5-flash", "temperature": 0.7, "convert_system_message_to_human": True},
+    "voice": {"model": "gemini-2.5-flash", "temperature": 0.1},
+    "agent": {"model": "gemini-2.5-flash", "temperature": None},
+}
+
+
+def profile_settings(profile: str) -> Dict:
+    """Model settings of a profile with environment overrides applied"""
+    settings = dict(MODEL_PROFILES[profile])
+    prefix = f"LLM_{profile.upper()}_"
+
+    if os.getenv(prefix + "MODEL"):
+        settings["model"] = os.getenv(prefix + "MODEL")
+    if os.getenv(prefix + "TEMPERATURE"):
+        settings["temperature"] = float(os.getenv(prefix + "TEMPERATURE"))
+    return settings
+
+
+_fake_model_class = None
+
+
+def _fake_model():
+    """
+    FakeListChatModel that also supports tool binding (agent) and structured output
+    (voice validator: each response is parsed as JSON into the schema)
+    """
+    global _fake_model_class
+    if _fake_model_class is None:
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        from langchain_core.runnables import RunnableLambda
+
+        class FakeChatModel(FakeListChatModel):
+            # LLM_FAKE_LATENCY_SECONDS simulates a slow model (blocking in invoke, awaited in ainvoke)
+            def _generate(self, *args, **kwargs):
+                if LLM_FAKE_LATENCY_SECONDS:
+                    time.sleep(LLM_FAKE_LATENCY_SECONDS)
+                return super()._generate(*args, **kwargs)
+
+            async def _agenerate(self, *args, **kwargs):
+                if LLM_FAKE_LATENCY_SECONDS:
+                    await asyncio.sleep(LLM_FAKE_LATENCY_SECONDS)
+                return super()._generate(*args, **kwargs)
+
+            def bind_tools(self, tools, **kwargs):
+                return self
+
+            def with_structured_output(self, schema, **kwargs):
+                async def aparse(prompt):
+                    return schema.model_validate_json((await self.ainvoke(prompt)).content)
+
+                return RunnableLambda(
+                    lambda prompt: schema.model_validate_json(self.invoke(prompt).content),
+                    afunc=aparse
+                )
+
+        _fake_model_class = FakeChatModel
+    return _fake_model_class
+
+
+class LLMTimeoutError(Exception):
+    """The model didn't answer within LLM_TIMEOUT_SECONDS (waiting for a free slot included)"""
+
+
+class LLMCancelledError(Exception):
+    """The client disconnected, so the call was cancelled"""
+
+
+async def _wait_for_disconnect(request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(LLM_DISCONNECT_POLL_SECONDS)
+
+
+class LLMClients:
+    """
+    One chat model instance per profile, shared by every request in the process.
+
+    Building a ChatGoogleGenerativeAI sets up its API client and the first call opens its
+    connections; reusing the instance keeps that client (and its pooled HTTP / gRPC
+    connections) warm instead of paying for it on every chatbot or voice request.
+    Structured-output wrappers are cached per (profile, schema) the same way.
+
+    get() returns None when the backend is unusable (LangChain missing, no GOOGLE_API_KEY),
+    so callers keep their existing "AI not configured" fallbacks.
+    """
+
+    _clients: Dict[str, object] = {}
+    _structured: Dict[tuple, object] = {}
+    _lock = threading.Lock()
+
+    # Async call limiter (created on first use, inside the event loop) and counters
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _in_flight = 0
+    _waiting = 0
+    _calls = {"completed": 0, "timeouts": 0, "cancelled": 0, "errors": 0}
+
+    @staticmethod
+    def _build(profile: str):
+        settings = profile_settings(profile)
+
+        if LLM_BACKEND == "fake":
+            return _fake_model()(responses=[LLM_FAKE_RESPONSE])
+
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            print("⚠️ Warning: GOOGLE_API_KEY not found in environment variables")
+            return None
+
+        try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+        except ImportError:
+            print("⚠️ Warning: LangChain not installed.")
+            print("   Install with: pip install langchain-google-genai")
+            return None
+
+        options = {key: value for key, value in settings.items() if value is not None}
+        try:
+            return ChatGoogleGenerativeAI(google_api_key=api_key, **options)
+        except Exception as e:
+            print(f"Error initializing Gemini ({profile}): {e}")
+            return None
+
+    @staticmethod
+    def get(profile: str):
+        """Shared chat model for a profile ('chat' | 'voice' | 'agent'), or None if unavailable"""
+        client = LLMClients._clients.get(profile)
+        if client is not None:
+            return client
+
+        with LLMClients._lock:
+            if profile not in LLMClients._clients:
+                client = LLMClients._build(profile)
+                if client is None:
+                    return None  # not cached: a key added later is picked up on the next call
+                LLMClients._clients[profile] = client
+            return LLMClients._clients[profile]
+
+    @staticmethod
+    def structured(profile: str, schema):
+        """Shared with_structured_output(schema) runnable for a profile, or None if unavailable"""
+        key = (profile, schema)
+        runnable = LLMClients._structured.get(key)
+        if runnable is not None:
+            return runnable
+
+        client = LLMClients.get(profile)
+        if client is None:
+            return None
+
+        with LLMClients._lock:
+            if key not in LLMClients._structured:
+                LLMClients._structured[key] = client.with_structured_output(schema)
+            return LLMClients._structured[key]
+
+    # ==================== ASYNC CALLS ====================
+
+    @staticmethod
+    async def _acquire_slot(timeout: Optional[float] = None):
+        if LLMClients._semaphore is None:
+            LLMClients._semaphore = asyncio.Semaphore(max(1, LLM_MAX_CONCURRENCY))
+
+        LLMClients._waiting += 1
+        try:
+            await asyncio.wait_for(LLMClients._semaphore.acquire(), timeout or None)
+        finally:
+            LLMClients._waiting -= 1
+
+    @staticmethod
+    async def _limited(runnable, prompt):
+        await LLMClients._acquire_slot()
+
+        LLMClients._in_flight += 1
+        try:
+            return await runnable.ainvoke(prompt)
+        finally:
+            LLMClients._in_flight -= 1
+            LLMClients._semaphore.release()
+
+    @staticmethod
+    async def ainvoke(runnable, prompt, request=None, timeout: Optional[float] = None):
+        """
+        Await runnable.ainvoke(prompt) without blocking the event loop, with
+        - at most LLM_MAX_CONCURRENCY calls in flight (the rest wait for a slot)
+        - a timeout (default LLM_TIMEOUT_SECONDS) -> LLMTimeoutError
+        - cancellation when the client behind `request` disconnects -> LLMCancelledError
+        The underlying call is cancelled in every case it is abandoned.
+        """
+        timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+
+        call = asyncio.ensure_future(LLMClients._limited(runnable, prompt))
+        watcher = asyncio.ensure_future(_wait_for_disconnect(request)) if request is not None else None
+        tasks = [task for task in (call, watcher) if task is not None]
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=timeout or None, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        if call in done:
+            outcome = "errors" if call.exception() is not None else "completed"
+            LLMClients._calls[outcome] += 1
+            return call.result()
+
+        if watcher is not None and watcher in done:
+            LLMClients._calls["cancelled"] += 1
+            raise LLMCancelledError("Client disconnected")
+
+        LLMClients._calls["timeouts"] += 1
+        raise LLMTimeoutError(f"LLM did not answer within {timeout}s")
+
+    @staticmethod
+    async def astream(runnable, prompt, timeout: Optional[float] = None) -> AsyncIterator:
+        """
+        Yield the chunks of runnable.astream(prompt) under the same concurrency limit
+        LLMTimeoutError if no slot frees up, or no chunk arrives, within `timeout` seconds.
+        A client disconnect needs no watcher here: StreamingResponse cancels the generator.
+        """
+        timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+
+        try:
+            await LLMClients._acquire_slot(timeout)
+        except asyncio.TimeoutError:
+            LLMClients._calls["timeouts"] += 1
+            raise LLMTimeoutError(f"No free LLM slot within {timeout}s")
+
+        LLMClients._in_flight += 1
+        stream = runnable.astream(prompt)
+        outcome = "cancelled"
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout or None)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    outcome = "timeouts"
+                    raise LLMTimeoutError(f"LLM stream stalled for {timeout}s")
+                yield chunk
+            outcome = "completed"
+        except LLMTimeoutError:
+            raise
+        except Exception:
+            outcome = "errors"
+            raise
+        finally:
+            LLMClients._calls[outcome] += 1
+            LLMClients._in_flight -= 1
+            LLMClients._semaphore.release()
+            await stream.aclose()
+
+    @staticmethod
+    def model_name(profile: str) -> str:
+        return "fake" if LLM_BACKEND == "fake" else profile_settings(profile)["model"]
+
+    @staticmethod
+    def set_fake_responses(profile: str, responses: List):
+        """
+        Tests: serve these responses (strings, or dicts sent as JSON for structured output)
+        from a fake client for this profile, whatever LLM_BACKEND says
+        """
+        texts = [json.dumps(r, default=str) if isinstance(r, dict) else r for r in responses]
+        with LLMClients._lock:
+            LLMClients._clients[profile] = _fake_model()(responses=texts)
+            for key in [k for k in LLMClients._structured if k[0] == profile]:
+                del LLMClients._structured[key]
+
+    @staticmethod
+    def reset():
+        """Drop every client (tests / key rotation); the next get() rebuilds"""
+        with LLMClients._lock:
+            LLMClients._clients.clear()
+            LLMClients._structured.clear()
+
+    @staticmethod
+    def warm_up() -> threading.Thread:
+        """Build every profile's client in a background thread (startup is not delayed)"""
+        def build_all():
+            ready = [profile for profile in MODEL_PROFILES if LLMClients.get(profile) is not None]
+            print(f"🤖 LLM clients ready ({LLM_BACKEND}): {', '.join(ready) or 'none'}")
+
+        thread = threading.Thread(target=build_all, name="llm-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def stats() -> Dict:
+        with LLMClients._lock:
+            return {
+                "backend": LLM_BACKEND,
+                "clients": sorted(LLMClients._clients),
+                "structured_wrappers": len(LLMClients._structured),
+                "max_concurrency": LLM_MAX_CONCURRENCY,
+                "timeout_seconds": LLM_TIMEOUT_SECONDS,
+                "in_flight": LLMClients._in_flight,
+                "waiting": LLMClients._waiting,
+                "calls": dict(LLMClients._calls),
+                "models": {profile: LLMClients.model_name(profile) for profile in MODEL_PROFILES}
+            }
@@ -0,0 +1,95 @@
+# app/llm_load_test.py - The event loop keeps serving while chatbot LLM calls are in flight
+#
+# Usage (from app/, against the configured DATABASE_URL):
+#   python llm_load_test.py --token <JWT>                          # 20 chats, fake LLM answering in 2s
+#   python llm_load_test.py --token <JWT> --chats 50 --latency 3 --max-p95-ms 200
+#
+# The chat endpoint is tenant-scoped: --token is an access token of any user (POST /auth/login).
+#
+# Starts the app on a local port with the fake LLM backend (LLM_BACKEND=fake, no network),
+# fires concurrent POST /chatbot/chat requests and meanwhile polls GET /health.
+# If LLM calls blocked the event loop, /health would stall for the length of the chats;
+# exits 1 if its p95 latency while chats are in flight exceeds --max-p95-ms.
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+parser = argparse.ArgumentParser(description="Chatbot load test against a local fake LLM")
+parser.add_argument("--token", required=True, help="Bearer access token the chats are sent with")
+parser.add_argument("--chats", type=int, default=20, help="Concurrent chat requests")
+parser.add_argument("--latency", type=float, default=2.0, help="Fake LLM latency per call (seconds)")
+parser.add_argument("--port", type=int, default=8765)
+parser.add_argument("--max-p95-ms", type=float, default=250.0, help="Allowed /health p95 during the chats")
+args = parser.parse_args()
+
+# The registry reads its configuration at import time
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["LLM_FAKE_LATENCY_SECONDS"] = str(args.latency)
+os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.chats))
+
+import requests
+import uvicorn
+from main import app
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def chat(base_url: str, n: int, results: list):
+    started = time.perf_counter()
+    response = requests.post(f"{base_url}/chatbot/chat", json={"message": f"How were sales today? ({n})"},
+                             headers={"Authorization": f"Bearer {args.token}"}, timeout=120)
+    results.append((response.status_code, response.json().get("success"), time.perf_counter() - started))
+
+
+def poll_health(base_url: str, stop: threading.Event, latencies: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        requests.get(f"{base_url}/health", timeout=30)
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.05)
+
+
+if __name__ == "__main__":
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    chat_results, health_latencies = [], []
+    stop = threading.Event()
+
+    poller = threading.Thread(target=poll_health, args=(base_url, stop, health_latencies))
+    chats = [threading.Thread(target=chat, args=(base_url, n, chat_results)) for n in range(args.chats)]
+
+    started = time.perf_counter()
+    poller.start()
+    for thread in chats:
+        thread.start()
+    for thread in chats:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    poller.join()
+    server.should_exit = True
+
+    ok = sum(1 for status_code, success, _ in chat_results if status_code == 200 and success)
+    chat_latencies = [latency for _, _, latency in chat_results]
+    health_p95_ms = percentile(health_latencies, 0.95) * 1000
+
+    print(f"💬 {ok}/{args.chats} chats answered in {elapsed:.2f}s "
+          f"(fake LLM {args.latency}s each, p95 {percentile(chat_latencies, 0.95):.2f}s)")
+    print(f"❤️ /health during the chats: {len(health_latencies)} requests, "
+          f"p50 {percentile(health_latencies, 0.5) * 1000:.1f} ms, p95 {health_p95_ms:.1f} ms")
+
+    if ok < args.chats or health_p95_ms > args.max_p95_ms:
+        print("❌ Chats failed or the event loop stalled while they were in flight")
+        sys.exit(1)
+    print("✅ Other requests kept flowing while chats were in flight")
@@ -1,9 +1,11 @@
 # app/main.py - UPDATED WITH PROPER CORS FOR NGROK + MOBILE
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from database import init_db
+from forecast_jobs import ForecastJobs
+from llm_clients import LLMClients, LLM_WARMUP, LLMCancelledError
 from routes import (
     varieties,
     supplier,
@@ -18,6 +20,7 @@ from routes import (
     shopkeeper_stock,
     auth_routes,
     user_management,
+    metrics,
 )
 
 
@@ -28,9 +31,12 @@ async def lifespan(app: FastAPI):
     print("Starting database initialization...")
     init_db()
     print("Database initialization complete!")
+    if LLM_WARMUP:
+        LLMClients.warm_up()
     yield
     # Shutdown (if needed)
     print("Application shutting down...")
+    ForecastJobs.shutdown()
 
 app = FastAPI(
     title="Cloth Shop Management System with AI",
@@ -50,6 +56,11 @@ app.add_middleware(
     max_age=3600,  # Cache preflight for 1 hour
 )
 
+@app.exception_handler(LLMCancelledError)
+async def llm_cancelled_handler(request: Request, exc: LLMCancelledError):
+    """Client disconnected during an LLM call - nobody is listening, don't log it as a 500"""
+    return Response(status_code=499)
+
 # Include routers
 app.include_router(varieties.router)
 app.include_router(supplier.router)
@@ -64,6 +75,7 @@ app.include_router(customer_loans.router)
 app.include_router(shopkeeper_stock.router)
 app.include_router(auth_routes.router)
 app.include_router(user_management.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def root():
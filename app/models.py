@@ -1,6 +1,6 @@
 # app/models.py - UPDATED WITH MULTI-TENANCY
 
-from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, Date, Text, ForeignKey, Enum as SQLEnum, Boolean
+from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, Date, Text, ForeignKey, Enum as SQLEnum, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -65,6 +65,11 @@ class ClothVariety(Base):
 
 class SupplierInventory(Base):
     __tablename__ = "supplier_inventory"
+    __table_args__ = (
+        # FIFO lookups: tenant + variety, lots with stock left, oldest first
+        Index('ix_supplier_inventory_tenant_variety_remaining_date', 'tenant_id', 'variety_id', 'quantity_remaining', 'supply_date'),
+        Index('ix_supplier_inventory_tenant_date', 'tenant_id', 'supply_date'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -91,6 +96,9 @@ class SupplierInventory(Base):
 
 class SupplierReturn(Base):
     __tablename__ = "supplier_returns"
+    __table_args__ = (
+        Index('ix_supplier_returns_tenant_date', 'tenant_id', 'return_date'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -116,6 +124,11 @@ class SupplierReturn(Base):
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        # Tenant-scoped date range scans (reports, analytics, forecasts)
+        Index('ix_sales_tenant_date_variety', 'tenant_id', 'sale_date', 'variety_id'),
+        Index('ix_sales_tenant_variety_date', 'tenant_id', 'variety_id', 'sale_date'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -154,8 +167,38 @@ class Sale(Base):
     customer_loan = relationship("CustomerLoan", back_populates="sale", uselist=False)
 
 
+class DailySalesRollup(Base):
+    """
+    Pre-aggregated sales per (tenant, day, variety, salesperson)
+    Maintained on every sale write so reports don't re-scan the sales table
+    """
+    __tablename__ = "daily_sales_rollup"
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'sale_date', 'variety_id', 'salesperson_name', name='uq_daily_sales_rollup_key'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # 🆕 MULTI-TENANT FIELD
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    sale_date = Column(Date, nullable=False, index=True)
+    variety_id = Column(Integer, ForeignKey("cloth_varieties.id", ondelete="CASCADE"), nullable=False)
+    salesperson_name = Column(String(100), nullable=False)
+    
+    total_revenue = Column(DECIMAL(16, 4), nullable=False, default=0)  # SUM(selling_price * quantity)
+    total_profit = Column(DECIMAL(14, 2), nullable=False, default=0)
+    total_quantity = Column(DECIMAL(14, 2), nullable=False, default=0)
+    sales_count = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
 class CustomerLoan(Base):
     __tablename__ = "customer_loans"
+    __table_args__ = (
+        Index('ix_customer_loans_tenant_date', 'tenant_id', 'loan_date'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -221,6 +264,9 @@ class ExpenseCategory(str, enum.Enum):
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index('ix_expenses_tenant_date', 'tenant_id', 'expense_date'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -242,6 +288,12 @@ class Expense(Base):
 
 class InventoryMovement(Base):
     __tablename__ = "inventory_movements"
+    __table_args__ = (
+        # Movement history per variety, newest first
+        Index('ix_inventory_movements_tenant_variety_created', 'tenant_id', 'variety_id', 'created_at'),
+        # Ledger delta scans: movements of a tenant after a snapshot date
+        Index('ix_inventory_movements_tenant_date_variety', 'tenant_id', 'movement_date', 'variety_id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -262,8 +314,52 @@ class InventoryMovement(Base):
     tenant = relationship("Tenant")
 
 
+class InventorySnapshot(Base):
+    """Ledger stock of a variety at the end of snapshot_date (a month end) - see inventory_ledger.py"""
+    __tablename__ = "inventory_snapshots"
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'variety_id', 'snapshot_date', name='uq_inventory_snapshot_tenant_variety_date'),
+        # Nearest snapshot on or before a date, for all varieties of a tenant
+        Index('ix_inventory_snapshots_tenant_date', 'tenant_id', 'snapshot_date'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    variety_id = Column(Integer, ForeignKey("cloth_varieties.id", ondelete="CASCADE"), nullable=False)
+    snapshot_date = Column(Date, nullable=False)
+    stock = Column(DECIMAL(14, 2), nullable=False)  # SUM(movements.quantity) up to and including snapshot_date
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class InventoryAllocation(Base):
+    """How much of one supplier lot a sale / shopkeeper issue consumed (one row per lot)"""
+    __tablename__ = "inventory_allocations"
+    __table_args__ = (
+        # Allocations of a sale / shopkeeper stock record (release on delete / return)
+        Index('ix_inventory_allocations_tenant_reference', 'tenant_id', 'reference_type', 'reference_id'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    supplier_inventory_id = Column(Integer, ForeignKey("supplier_inventory.id", ondelete="CASCADE"), nullable=False, index=True)
+    variety_id = Column(Integer, ForeignKey("cloth_varieties.id", ondelete="CASCADE"), nullable=False)
+    reference_type = Column(String(50), nullable=False)  # 'sale' | 'shopkeeper_stock'
+    reference_id = Column(Integer, nullable=False)
+    quantity = Column(DECIMAL(10, 2), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    
+    # 🆕 Relationships
+    tenant = relationship("Tenant")
+    supplier_inventory = relationship("SupplierInventory")
+
+
 class ShopkeeperStock(Base):
     __tablename__ = "shopkeeper_stock"
+    __table_args__ = (
+        Index('ix_shopkeeper_stock_tenant_date', 'tenant_id', 'issue_date'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -323,4 +419,18 @@ class ShopkeeperReturn(Base):
     
     created_at = Column(DateTime, server_default=func.now())
     
-    stock_record = relationship("ShopkeeperStock", back_populates="return_transactions")
\ No newline at end of file
+    stock_record = relationship("ShopkeeperStock", back_populates="return_transactions")
+
+class TenantDataVersion(Base):
+    """Per-tenant change counter of one data domain, bumped by every committed write (see data_versions.py)"""
+    __tablename__ = "tenant_data_versions"
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'domain', name='uq_tenant_data_versions_tenant_domain'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    
+    domain = Column(String(32), nullable=False)  # 'sales' | 'inventory' | 'loans' | 'expenses' | 'shopkeeper_stock'
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,102 @@
+# app/pagination.py - Keyset (cursor) pagination for list endpoints
+
+import os
+import json
+import base64
+import binascii
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import and_, or_
+
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """
+    `?limit=&cursor=` query parameters (use as `page: PageParams = Depends()`)
+
+    Every list response is bounded: rows come newest first in pages of `limit`
+    (DEFAULT_PAGE_SIZE without it), and while more rows remain the cursor for the next
+    page is returned in the X-Next-Cursor response header. A client that needs every row
+    follows the cursors (the frontend's getAllPages) - no single request reads them all.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=f"Page size (max {MAX_PAGE_SIZE})"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header")
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+    @property
+    def size(self) -> int:
+        return self.limit or DEFAULT_PAGE_SIZE
+
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """Opaque cursor for the position right after (sort_value, row_id)"""
+    if isinstance(sort_value, datetime):
+        payload = ["dt", sort_value.isoformat(), row_id]
+    elif isinstance(sort_value, date):
+        payload = ["d", sort_value.isoformat(), row_id]
+    else:
+        payload = ["i", int(sort_value), row_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[object, int]:
+    """(sort_value, row_id) from a cursor - 400 if it was not produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        kind, value, row_id = json.loads(raw)
+        if kind == "dt":
+            sort_value = datetime.fromisoformat(value)
+        elif kind == "d":
+            sort_value = date.fromisoformat(value)
+        elif kind == "i" and isinstance(value, int):
+            sort_value = value
+        else:
+            raise ValueError("unknown cursor kind")
+        if not isinstance(row_id, int):
+            raise ValueError("row id must be an integer")
+        return sort_value, row_id
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def keyset_paginate(query, sort_column, id_column, page: PageParams):
+    """
+    Restrict a Query or select() to one page, ordered by (sort_column DESC, id DESC)
+
+    Rows after the cursor are found with a range condition on the (tenant_id, date)
+    indexes, so deep pages cost the same as the first - no OFFSET scan.
+    Fetches one extra row so page_items() can tell whether another page exists.
+    """
+    if page.cursor:
+        sort_value, row_id = decode_cursor(page.cursor)
+        query = query.filter(or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < row_id)
+        ))
+
+    return query.order_by(None).order_by(sort_column.desc(), id_column.desc()).limit(page.size + 1)
+
+
+def page_items(rows, sort_attr: str, page: PageParams, response: Response) -> List:
+    """Trim the extra row fetched by keyset_paginate() and set the next-page cursor header"""
+    rows = list(rows)
+    if len(rows) > page.size:
+        rows = rows[:page.size]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_attr), last.id)
+    return rows
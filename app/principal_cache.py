@@ -0,0 +1,139 @@
+# app/principal_cache.py - Process-level cache of authenticated users and their tenants
+
+import os
+import time
+import threading
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from auth_models import User, Tenant
+
+
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+
+class PrincipalCache:
+    """
+    Caches the (user, tenant) pair behind a JWT `sub` so authenticated requests
+    don't query `users` and `tenants` on every call.
+
+    Entries are DETACHED snapshots. get() / aget() merge them into the request session with
+    load=False, so routes still receive normal session-bound objects (they can be
+    modified and committed) without a SELECT being issued.
+
+    Write paths that change a user or tenant must call invalidate_user / invalidate_tenant
+    after committing. The TTL bounds staleness for other processes/workers.
+    """
+
+    _entries: Dict[int, Tuple[float, User, Tenant]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _lookup(user_id: int) -> Optional[Tuple[User, Tenant]]:
+        """Detached (user, tenant) snapshots, or None on a miss / expired entry"""
+        if PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+            return None
+
+        with PrincipalCache._lock:
+            entry = PrincipalCache._entries.get(user_id)
+            if entry and entry[0] < time.monotonic():
+                del PrincipalCache._entries[user_id]
+                entry = None
+
+        return entry[1:] if entry else None
+
+    @staticmethod
+    def _store(user: User, tenant: Tenant):
+        with PrincipalCache._lock:
+            if len(PrincipalCache._entries) >= PRINCIPAL_CACHE_MAX_ENTRIES:
+                PrincipalCache._evict()
+            PrincipalCache._entries[user.id] = (
+                time.monotonic() + PRINCIPAL_CACHE_TTL_SECONDS, user, tenant
+            )
+
+    @staticmethod
+    def get(db: Session, user_id: int) -> Optional[Tuple[User, Tenant]]:
+        """Return (user, tenant) attached to db, or None on a miss / expired entry"""
+        entry = PrincipalCache._lookup(user_id)
+        if not entry:
+            return None
+
+        user, tenant = entry
+        return db.merge(user, load=False), db.merge(tenant, load=False)
+
+    @staticmethod
+    async def aget(db: AsyncSession, user_id: int) -> Optional[Tuple[User, Tenant]]:
+        """Async version of get() - merging with load=False issues no SQL"""
+        entry = PrincipalCache._lookup(user_id)
+        if not entry:
+            return None
+
+        user, tenant = entry
+        return await db.merge(user, load=False), await db.merge(tenant, load=False)
+
+    @staticmethod
+    def put(db: Session, user: User, tenant: Tenant) -> Tuple[User, Tenant]:
+        """
+        Store freshly loaded (user, tenant) and return copies attached to db
+        Call before anything in the request modifies them.
+        """
+        if PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+            return user, tenant
+
+        # Keep the loaded instances as detached snapshots, hand the request merged copies
+        db.expunge(user)
+        db.expunge(tenant)
+        PrincipalCache._store(user, tenant)
+
+        return db.merge(user, load=False), db.merge(tenant, load=False)
+
+    @staticmethod
+    async def aput(db: AsyncSession, user: User, tenant: Tenant) -> Tuple[User, Tenant]:
+        """Async version of put()"""
+        if PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+            return user, tenant
+
+        db.expunge(user)
+        db.expunge(tenant)
+        PrincipalCache._store(user, tenant)
+
+        return await db.merge(user, load=False), await db.merge(tenant, load=False)
+
+    @staticmethod
+    def _evict():
+        """Drop expired entries, then the oldest ones if still full (caller holds the lock)"""
+        now = time.monotonic()
+        entries = PrincipalCache._entries
+
+        for user_id in [uid for uid, entry in entries.items() if entry[0] < now]:
+            del entries[user_id]
+
+        # Dicts keep insertion order - the first keys are the oldest entries
+        while len(entries) >= PRINCIPAL_CACHE_MAX_ENTRIES:
+            del entries[next(iter(entries))]
+
+    # ==================== INVALIDATION ====================
+
+    @staticmethod
+    def invalidate_user(user_id: int):
+        """Forget one user (role, status, password or profile changed, or user deleted)"""
+        with PrincipalCache._lock:
+            PrincipalCache._entries.pop(user_id, None)
+
+    @staticmethod
+    def invalidate_tenant(tenant_id: int):
+        """Forget every user of a tenant (tenant suspended, reactivated or subscription changed)"""
+        with PrincipalCache._lock:
+            stale = [
+                user_id for user_id, (_, _, tenant) in PrincipalCache._entries.items()
+                if tenant.id == tenant_id
+            ]
+            for user_id in stale:
+                del PrincipalCache._entries[user_id]
+
+    @staticmethod
+    def clear():
+        """Forget everything"""
+        with PrincipalCache._lock:
+            PrincipalCache._entries.clear()
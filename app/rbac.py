@@ -4,7 +4,7 @@ from fastapi import HTTPException, status, Depends
 from sqlalchemy.orm import Session
 from database import get_db
 from auth_models import User, Tenant
-from routes.auth_routes import get_current_user, get_current_tenant
+from routes.auth_routes import get_current_user, get_current_tenant, get_current_user_async
 from enum import Enum
 from typing import List, Optional
 
@@ -122,13 +122,13 @@ def user_has_permission(user: User, permission: Permission) -> bool:
     return permission in user_permissions
 
 # Permission Checker Dependency
-def require_permission(permission: Permission):
+def require_permission(permission: Permission, current_user=get_current_user):
     """
     Dependency to check if current user has required permission
     Usage: @router.get("/", dependencies=[Depends(require_permission(Permission.VIEW_SALES))])
     """
     async def permission_checker(
-        user: User = Depends(get_current_user)
+        user: User = Depends(current_user)
     ):
         if not user_has_permission(user, permission):
             raise HTTPException(
@@ -138,6 +138,10 @@ def require_permission(permission: Permission):
         return user
     return permission_checker
 
+def require_permission_async(permission: Permission):
+    """require_permission for `async def` routes on get_async_db (no sync pool connection)"""
+    return require_permission(permission, current_user=get_current_user_async)
+
 # Owner-Only Dependency
 async def require_owner(
     user: User = Depends(get_current_user)
@@ -162,6 +166,18 @@ async def require_salesperson_or_owner(
         )
     return user
 
+# Platform Admin Dependency
+async def require_superuser(
+    user: User = Depends(get_current_user)
+):
+    """Dependency to ensure user is a platform administrator (not a tenant role)"""
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This action requires platform administrator privileges"
+        )
+    return user
+
 # Check Subscription Limits
 def check_user_limit(tenant: Tenant, db: Session) -> bool:
     """
@@ -0,0 +1,266 @@
+# app/response_cache.py - Tenant-scoped response cache for read-heavy dashboard endpoints
+
+import os
+import json
+import copy
+import time
+import functools
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from data_versions import BUMPED_INFO_KEY, DataVersions
+
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+# Optional shared backend (Redis or anything speaking its protocol), e.g. redis://localhost:6379/0
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "")
+
+# Request arguments that are never part of a cache key (identity / plumbing)
+_UNKEYED_ARGS = {"tenant", "user", "owner", "db", "response", "request"}
+
+
+class _MemoryBackend:
+    """In-process LRU + TTL (one per worker; its versions only see this worker's commits)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._versions: Dict[Tuple[int, str], int] = {}
+        self._lock = threading.Lock()
+
+    def versions(self, tenant_id: int, domains: Tuple[str, ...]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get((tenant_id, domain), 0) for domain in domains)
+
+    def bump(self, keys: Iterable[Tuple[int, str]]):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + RESPONSE_CACHE_TTL_SECONDS, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > RESPONSE_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def size(self) -> Optional[int]:
+        with self._lock:
+            return len(self._entries)
+
+
+class _RedisBackend:
+    """
+    Shared entries and version counters, so a write in one worker invalidates every worker.
+    Eviction is Redis's job (run it with maxmemory-policy allkeys-lru); entries also expire by TTL.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    @staticmethod
+    def _version_key(tenant_id: int, domain: str) -> str:
+        return f"response-cache:version:{tenant_id}:{domain}"
+
+    def versions(self, tenant_id: int, domains: Tuple[str, ...]) -> Tuple[int, ...]:
+        values = self._client.mget([self._version_key(tenant_id, domain) for domain in domains])
+        return tuple(int(value or 0) for value in values)
+
+    def bump(self, keys: Iterable[Tuple[int, str]]):
+        pipeline = self._client.pipeline(transaction=False)
+        for tenant_id, domain in keys:
+            pipeline.incr(self._version_key(tenant_id, domain))
+        pipeline.execute()
+
+    def get(self, key: str):
+        value = self._client.get(f"response-cache:entry:{key}")
+        return json.loads(value) if value is not None else None
+
+    def put(self, key: str, value):
+        self._client.set(f"response-cache:entry:{key}", json.dumps(value), ex=RESPONSE_CACHE_TTL_SECONDS)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+def _create_backend():
+    if RESPONSE_CACHE_REDIS_URL:
+        try:
+            backend = _RedisBackend(RESPONSE_CACHE_REDIS_URL)
+            print("✅ Response cache using Redis backend")
+            return backend
+        except ImportError:
+            print("⚠️ Warning: redis not installed. Response cache falls back to in-process memory.")
+            print("   Install with: pip install redis")
+    return _MemoryBackend()
+
+
+class ResponseCache:
+    """
+    Caches JSON responses of read endpoints per tenant.
+
+    A cached response is keyed by the durable DataVersions of the domains it reads (one
+    indexed read, bumped inside every writing transaction), so a sale committed by ANY
+    worker invalidates the sales dashboards of that tenant only, and only once it is
+    committed. The backend's own counters (bumped after commit, see _bump_committed_writes)
+    are an extra key part when they can be read - shared across workers with Redis,
+    per worker with the memory backend.
+    Old entries are never deleted explicitly - nothing can build their key anymore, so
+    LRU / TTL ages them out.
+
+    A backend error never fails a request: it counts as a miss and the endpoint runs.
+    """
+
+    _backend = _create_backend()
+    _lock = threading.Lock()
+    _counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def enabled() -> bool:
+        return RESPONSE_CACHE_TTL_SECONDS > 0 and RESPONSE_CACHE_MAX_ENTRIES > 0
+
+    @staticmethod
+    def versions(tenant_id: int, domains: Tuple[str, ...]) -> Tuple[int, ...]:
+        """The backend's version counters of a tenant's domains (per worker without Redis)"""
+        return ResponseCache._backend.versions(tenant_id, tuple(domains))
+
+    @staticmethod
+    def bump(tenant_id: int, *domains: str):
+        """Invalidate a tenant's cached responses that read these domains"""
+        ResponseCache.bump_many((tenant_id, domain) for domain in domains)
+
+    @staticmethod
+    def bump_many(keys: Iterable[Tuple[int, str]]):
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            ResponseCache._backend.bump(keys)
+        except Exception as e:
+            print(f"⚠️ Response cache invalidation failed: {str(e)}")
+
+    @staticmethod
+    def _count(endpoint: str, outcome: str):
+        with ResponseCache._lock:
+            counters = ResponseCache._counters.setdefault(endpoint, {"hits": 0, "misses": 0, "errors": 0})
+            counters[outcome] += 1
+
+    @staticmethod
+    def get_or_compute(
+        endpoint: str,
+        db: Session,
+        tenant_id: int,
+        domains: Tuple[str, ...],
+        params: Dict,
+        compute: Callable[[], object],
+        data_versions: Optional[Tuple[int, ...]] = None
+    ):
+        """
+        Cached JSON-ready response for this tenant / params / data versions, or compute it
+        `data_versions`: DataVersions.get(db, tenant_id, domains), if the caller has already read them
+        """
+        if not ResponseCache.enabled():
+            return compute()
+
+        backend = ResponseCache._backend
+        key = None
+        try:
+            if data_versions is None:
+                data_versions = DataVersions.get(db, tenant_id, tuple(domains))
+            try:
+                backend_versions = backend.versions(tenant_id, tuple(domains))
+            except Exception:
+                backend_versions = None  # optional: the durable versions alone keep the key correct
+            # date.today() is part of the key: the endpoints report "the last N days"
+            key = json.dumps(
+                [endpoint, tenant_id, data_versions, backend_versions, date.today().isoformat(), params],
+                sort_keys=True, default=str
+            )
+            cached = backend.get(key)
+        except Exception as e:
+            print(f"⚠️ Response cache read failed: {str(e)}")
+            ResponseCache._count(endpoint, "errors")
+            cached = None
+
+        if cached is not None:
+            ResponseCache._count(endpoint, "hits")
+            return cached
+
+        result = jsonable_encoder(compute())
+
+        if key is not None:
+            ResponseCache._count(endpoint, "misses")
+            try:
+                backend.put(key, result)
+            except Exception as e:
+                print(f"⚠️ Response cache write failed: {str(e)}")
+        return result
+
+    @staticmethod
+    def cached(endpoint: str, domains: Tuple[str, ...]):
+        """
+        Decorator for a sync route taking `tenant` and `db`: the remaining plain arguments
+        (query / path params) form the cache key
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                params = {
+                    name: value for name, value in kwargs.items()
+                    if name not in _UNKEYED_ARGS
+                }
+                return ResponseCache.get_or_compute(
+                    endpoint, kwargs["db"], kwargs["tenant"].id, domains, params,
+                    lambda: func(*args, **kwargs)
+                )
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def stats() -> Dict:
+        with ResponseCache._lock:
+            endpoints = {
+                endpoint: {
+                    **counters,
+                    "hit_rate": round(counters["hits"] / (counters["hits"] + counters["misses"]), 3)
+                    if counters["hits"] + counters["misses"] else None
+                }
+                for endpoint, counters in ResponseCache._counters.items()
+            }
+        return {
+            "backend": ResponseCache._backend.name,
+            "enabled": ResponseCache.enabled(),
+            "entries": ResponseCache._backend.size(),
+            "max_entries": RESPONSE_CACHE_MAX_ENTRIES,
+            "ttl_seconds": RESPONSE_CACHE_TTL_SECONDS,
+            "endpoints": endpoints
+        }
+
+
+# ==================== WRITE-DRIVEN INVALIDATION ====================
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_writes(session: Session):
+    """Follow the durable version bump of the transaction that just committed (see data_versions.py)"""
+    ResponseCache.bump_many(session.info.pop(BUMPED_INFO_KEY, ()))
@@ -2,9 +2,11 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
-from database import get_db
+from database import get_db, get_async_db
 from auth_models import User, Tenant, UserSession
 from auth_schemas import (
     TenantCreate, TenantResponse, UserResponse, 
@@ -15,6 +17,7 @@ from auth_schemas import (
 )
 from auth_service import AuthService
 from email_service import EmailService  # 🆕 NEW
+from principal_cache import PrincipalCache
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
@@ -22,39 +25,87 @@ security = HTTPBearer()
 
 # ==================== DEPENDENCY: Get Current User ====================
 
+def _token_user_id(credentials: HTTPAuthorizationCredentials) -> int:
+    payload = AuthService.verify_token(credentials.credentials)
+    return int(payload.get("sub"))
+
+
+def _check_principal(user: Optional[User], tenant: Optional[Tenant]):
+    """401 / 404 if the token's user or their tenant no longer exists"""
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    
+    if not tenant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tenant not found"
+        )
+
+
+def _check_user_active(user: User):
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+
+
+def _check_tenant_active(tenant: Optional[Tenant]) -> Tenant:
+    if not tenant:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tenant not found"
+        )
+    
+    if not tenant.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Tenant account is suspended"
+        )
+    
+    return tenant
+
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """
     Dependency to get current authenticated user from JWT token
     Use this in protected routes: user: User = Depends(get_current_user)
+    Resolved once per request and served from PrincipalCache across requests
+    `async def` routes on get_async_db use get_current_user_async instead
     """
-    token = credentials.credentials
+    user_id = _token_user_id(credentials)
     
-    # Verify token
-    payload = AuthService.verify_token(token)
-    user_id = int(payload.get("sub"))
+    # Already resolved in this request?
+    principal = getattr(request.state, "principal", None)
+    if principal and principal[0].id == user_id:
+        return principal[0]
     
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    principal = PrincipalCache.get(db, user_id)
     
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+    if not principal:
+        # Get user from database
+        user = db.query(User).filter(User.id == user_id).first()
+        tenant = db.query(Tenant).filter(Tenant.id == user.tenant_id).first() if user else None
+        _check_principal(user, tenant)
+        
+        principal = PrincipalCache.put(db, user, tenant)
     
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User account is inactive"
-        )
+    user = principal[0]
+    _check_user_active(user)
     
+    request.state.principal = principal
     return user
 
 
 async def get_current_tenant(
+    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> Tenant:
@@ -62,21 +113,64 @@ async def get_current_tenant(
     Dependency to get current user's tenant
     Use this for multi-tenant data isolation
     """
-    tenant = db.query(Tenant).filter(Tenant.id == user.tenant_id).first()
+    # Loaded together with the user by get_current_user
+    principal = getattr(request.state, "principal", None)
+    tenant = principal[1] if principal and principal[0].id == user.id else None
     
     if not tenant:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tenant not found"
-        )
+        tenant = db.query(Tenant).filter(Tenant.id == user.tenant_id).first()
     
-    if not tenant.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Tenant account is suspended"
-        )
+    return _check_tenant_active(tenant)
+
+
+# ==================== ASYNC DEPENDENCIES (get_async_db) ====================
+# Same checks as above, on the request's AsyncSession: an `async def` route never checks
+# out a sync pool connection or runs a blocking query on the event loop.
+# The resolved principal is kept apart from the sync one (objects of different sessions).
+
+async def get_current_user_async(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for async routes: user: User = Depends(get_current_user_async)"""
+    user_id = _token_user_id(credentials)
     
-    return tenant
+    principal = getattr(request.state, "async_principal", None)
+    if principal and principal[0].id == user_id:
+        return principal[0]
+    
+    principal = await PrincipalCache.aget(db, user_id)
+    
+    if not principal:
+        user = (await db.execute(select(User).where(User.id == user_id))).scalars().first()
+        tenant = None
+        if user:
+            tenant = (await db.execute(select(Tenant).where(Tenant.id == user.tenant_id))).scalars().first()
+        _check_principal(user, tenant)
+        
+        principal = await PrincipalCache.aput(db, user, tenant)
+    
+    user = principal[0]
+    _check_user_active(user)
+    
+    request.state.async_principal = principal
+    return user
+
+
+async def get_current_tenant_async(
+    request: Request,
+    user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+) -> Tenant:
+    """get_current_tenant for async routes"""
+    principal = getattr(request.state, "async_principal", None)
+    tenant = principal[1] if principal and principal[0].id == user.id else None
+    
+    if not tenant:
+        tenant = (await db.execute(select(Tenant).where(Tenant.id == user.tenant_id))).scalars().first()
+    
+    return _check_tenant_active(tenant)
 
 
 # ==================== REGISTRATION ====================
@@ -380,6 +474,7 @@ def change_password(
     # Update password
     user.hashed_password = User.hash_password(password_data.new_password)
     db.commit()
+    PrincipalCache.invalidate_user(user.id)
     
     return MessageResponse(
         message="Password changed successfully",
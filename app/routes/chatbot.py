@@ -1,13 +1,20 @@
 # app/routes/chatbot.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from database import get_db
-from chatbot_engine import BusinessChatbot, ChatbotTools
+import json
+from database import get_db, SessionLocal
+from chatbot_engine import BusinessChatbot
+from chatbot_context import BusinessContextService
+from llm_clients import LLMClients, LLMCancelledError
+from chatbot_answer_cache import ChatAnswerCache
 from rbac import require_permission, Permission
+from auth_models import Tenant
+from routes.auth_routes import get_current_tenant
 
 router = APIRouter(prefix="/chatbot", tags=["AI Chatbot"])
 
@@ -28,16 +35,22 @@ class ChatResponse(BaseModel):
     success: bool = True
     error: Optional[str] = None
     suggested_queries: Optional[List[str]] = None
+    cached: bool = False  # served from the answer cache, no model call
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_ai(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_with_ai(
+    request: ChatRequest,
+    http_request: Request,
+    tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
     """
     Chat with the AI business assistant
     """
     try:
         # Initialize chatbot
-        chatbot = BusinessChatbot(db_session=db)
+        chatbot = BusinessChatbot(db_session=db, tenant_id=tenant.id)
         
         # Convert history to dict format
         history = [
@@ -46,7 +59,7 @@ async def chat_with_ai(request: ChatRequest, db: Session = Depends(get_db)):
         ] if request.conversation_history else []
         
         # Get AI response
-        result = await chatbot.chat(request.message, history)
+        result = await chatbot.chat(request.message, history, request=http_request)
         
         # Add suggested queries
         suggested_queries = [
@@ -63,9 +76,13 @@ async def chat_with_ai(request: ChatRequest, db: Session = Depends(get_db)):
             model=result.get("model"),
             success=result.get("success", True),
             error=result.get("error"),
+            cached=result.get("cached", False),
             suggested_queries=suggested_queries if not history else None
         )
         
+    except LLMCancelledError:
+        raise  # client is gone - nothing to answer
+        
     except Exception as e:
         return ChatResponse(
             response=f"I encountered an error: {str(e)}",
@@ -75,37 +92,62 @@ async def chat_with_ai(request: ChatRequest, db: Session = Depends(get_db)):
         )
 
 
+@router.post("/chat/stream")
+async def stream_chat_with_ai(request: ChatRequest, tenant: Tenant = Depends(get_current_tenant)):
+    """
+    Chat with the AI business assistant, streamed as server-sent events:
+    `start`, then `token` events ({"text": ...}) as the model generates, then `done` or `error`
+    """
+    history = [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.conversation_history
+    ] if request.conversation_history else []
+    
+    # Own session: the stream outlives the request's dependencies
+    db = SessionLocal()
+    chatbot = BusinessChatbot(db_session=db, tenant_id=tenant.id)
+    
+    # Answer-cache lookup and business context queries start now, while the response headers go out
+    turn = chatbot.start_turn(request.message, history)
+    # Closed when those queries are done - not when the stream ends: a disconnect cancels
+    # the generator, but not the threadpool query still using the session
+    turn.add_done_callback(lambda _: db.close())
+    
+    async def events():
+        async for event, data in chatbot.stream_chat(request.message, history, turn=turn):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # proxies (nginx) must not buffer the stream
+        }
+    )
+
+
 @router.get("/quick-stats")
-def get_quick_stats(db: Session = Depends(get_db)):
+def get_quick_stats(tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
     """
     Get quick stats for the chatbot interface
+    Served from the tenant's cached business snapshot (shared with the chat prompt)
     """
     try:
-        from datetime import date, timedelta
-        
-        today = date.today()
-        
-        # Today's sales
-        today_sales = ChatbotTools.get_sales_by_date(db, today)
-        
-        # This week
-        week_ago = today - timedelta(days=7)
-        week_sales = ChatbotTools.get_sales_by_date(db, week_ago, today)
-        
-        # Top products
-        top_products = ChatbotTools.get_top_products(db, limit=3, days=30)
+        snapshot = BusinessContextService.get(db, tenant.id)
+        today_sales, week_sales = snapshot["today"], snapshot["week"]
         
         return {
             "today": {
                 "revenue": today_sales["revenue"],
                 "profit": today_sales["profit"],
-                "transactions": today_sales["transactions"]
+                "transactions": today_sales["count"]
             },
             "this_week": {
                 "revenue": week_sales["revenue"],
                 "profit": week_sales["profit"]
             },
-            "top_products": top_products,
+            "top_products": snapshot["top_products"][:3],
             "timestamp": datetime.now().isoformat()
         }
         
@@ -164,13 +206,17 @@ def get_suggested_questions():
 
 
 @router.post("/simple-query")
-def simple_query(request: ChatRequest, db: Session = Depends(get_db)):
+def simple_query(
+    request: ChatRequest,
+    tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
     """
     Handle simple queries without AI (fallback mode)
     Useful when API keys are not configured
     """
     try:
-        chatbot = BusinessChatbot(db_session=db)
+        chatbot = BusinessChatbot(db_session=db, tenant_id=tenant.id)
         intent = chatbot.parse_query_intent(request.message)
         response = chatbot.handle_simple_query(intent)
         
@@ -210,5 +256,7 @@ def chatbot_health():
         "openai_configured": openai_configured,
         "anthropic_configured": anthropic_configured,
         "ai_enabled": openai_configured or anthropic_configured,
-        "fallback_mode": not (openai_configured or anthropic_configured)
+        "fallback_mode": not (openai_configured or anthropic_configured),
+        "llm_clients": LLMClients.stats(),
+        "answer_cache": ChatAnswerCache.stats()
     }
\ No newline at end of file
@@ -1,7 +1,7 @@
 # app/routes/customer_loans.py
 # Customer Loan Management API Routes - FIXED with Multi-Tenancy
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 from typing import List, Optional
@@ -17,6 +17,9 @@ from schemas import (
 from routes.auth_routes import get_current_tenant
 from auth_models import Tenant
 from rbac import require_permission, Permission
+from pagination import PageParams, keyset_paginate, page_items
+from response_cache import ResponseCache
+from conditional_get import ConditionalGet
 
 router = APIRouter(prefix="/loans", tags=["Customer Loans"])
 
@@ -77,11 +80,17 @@ def create_customer_loan(
 
 @router.get("/", response_model=List[CustomerLoanResponse])
 def get_all_loans(
+    response: Response,
     status: Optional[str] = None,
+    page: PageParams = Depends(),
     tenant: Tenant = Depends(get_current_tenant),  # 🔒 ADD TENANT
+    etag: None = Depends(ConditionalGet("loans")),  # 304 if unchanged
     db: Session = Depends(get_db)
 ):
-    """Get all customer loans (tenant-isolated)"""
+    """
+    Get all customer loans (tenant-isolated)
+    Newest first, one page of ?limit= at a time (next cursor in X-Next-Cursor)
+    """
     
     # 🔒 Filter by tenant
     query = db.query(CustomerLoan).filter(CustomerLoan.tenant_id == tenant.id)
@@ -94,8 +103,8 @@ def get_all_loans(
             )
         query = query.filter(CustomerLoan.loan_status == status)
     
-    loans = query.order_by(CustomerLoan.loan_date.desc()).all()
-    return loans
+    query = keyset_paginate(query, CustomerLoan.loan_date, CustomerLoan.id, page)
+    return page_items(query.all(), "loan_date", page, response)
 
 
 @router.get("/customer/{customer_name}", response_model=List[CustomerLoanResponse])
@@ -288,6 +297,7 @@ def get_customer_loan_summary(
 
 
 @router.get("/summary/status")
+@ResponseCache.cached("loans.summary-status", domains=("loans",))
 def get_loan_status_summary(
     tenant: Tenant = Depends(get_current_tenant),  # 🔒 ADD TENANT
     db: Session = Depends(get_db)
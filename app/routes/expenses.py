@@ -1,19 +1,21 @@
 # app/routes/expenses.py - CREATE THIS NEW FILE
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 from datetime import date
 from decimal import Decimal
 from database import get_db
-from models import Expense, Sale
+from models import Expense
 from schemas import (
     ExpenseCreate, ExpenseResponse, ExpenseSummary, FinancialReport
 )
+from sales_rollup import SalesRollupService
 from routes.auth_routes import get_current_tenant
 from auth_models import Tenant
 from rbac import require_permission, Permission
+from pagination import PageParams, keyset_paginate, page_items
 
 router = APIRouter(prefix="/expenses", tags=["Expense Management"])
 
@@ -28,12 +30,22 @@ def create_expense(expense: ExpenseCreate, tenant: Tenant = Depends(get_current_
     return db_expense
 
 @router.get("/", response_model=List[ExpenseResponse])
-def get_all_expenses(db: Session = Depends(get_db) ,tenant: Tenant = Depends(get_current_tenant),):
-    """Get all expenses"""
-    expenses = db.query(Expense).filter(
+def get_all_expenses(
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    tenant: Tenant = Depends(get_current_tenant),
+):
+    """
+    Get all expenses
+    Newest first, one page of ?limit= at a time (next cursor in X-Next-Cursor)
+    """
+    query = db.query(Expense).filter(
         Expense.tenant_id == tenant.id  # 🆕 ADD THIS
-    ).order_by(Expense.expense_date.desc()).all()
-    return expenses
+    )
+
+    query = keyset_paginate(query, Expense.expense_date, Expense.id, page)
+    return page_items(query.all(), "expense_date", page, response)
 
 @router.get("/date/{expense_date}", response_model=List[ExpenseResponse])
 def get_expenses_by_date(expense_date: date, tenant: Tenant = Depends(get_current_tenant), db: Session = Depends(get_db)):
@@ -98,18 +110,11 @@ def get_financial_report(year: int, month: int,tenant: Tenant = Depends(get_curr
     _, last_day = monthrange(year, month)
     end_date = date(year, month, last_day)
     
-    # Get sales data for the entire month
-    sales_result = db.query(
-        func.sum(Sale.selling_price * Sale.quantity).label('revenue'),
-        func.sum(Sale.profit).label('profit')
-    ).filter(
-        Sale.sale_date >= start_date,
-        Sale.sale_date <= end_date,
-        Sale.tenant_id == tenant.id 
-    ).first()
+    # Get sales data for the entire month (from daily rollup)
+    sales_result = SalesRollupService.get_summary(db, tenant.id, start_date, end_date)
     
-    revenue = sales_result.revenue if sales_result.revenue else Decimal('0.00')
-    profit = sales_result.profit if sales_result.profit else Decimal('0.00')
+    revenue = sales_result.total_sales if sales_result.total_sales else Decimal('0.00')
+    profit = sales_result.total_profit if sales_result.total_profit else Decimal('0.00')
     
     # Get expenses for the entire month
     expenses_result = db.query(
@@ -1,100 +1,64 @@
 # app/routes/inventory.py - UPDATED WITH MULTI-TENANCY AND RBAC
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Optional
 from datetime import date
 from decimal import Decimal
-from database import get_db
-from models import ClothVariety, SupplierInventory, Sale, SupplierReturn, InventoryMovement
-from schemas import InventoryStatusResponse, InventoryMovementResponse
-from routes.auth_routes import get_current_tenant
+from database import get_db, get_async_db
+from models import ClothVariety, InventoryMovement
+from schemas import InventoryStatusResponse, InventoryMovementResponse, InventoryAsOfResponse, StockDriftResponse
+from inventory_engine import InventoryEngine
+from inventory_ledger import InventoryLedger
+from routes.auth_routes import get_current_tenant, get_current_tenant_async
 from auth_models import Tenant, User
-from rbac import require_permission, Permission  # 🆕 RBAC IMPORTS
+from rbac import require_permission, require_permission_async, require_owner, Permission  # 🆕 RBAC IMPORTS
+from conditional_get import ConditionalGet
 
 router = APIRouter(prefix="/inventory", tags=["Inventory Management"])
 
 
 @router.get("/status", response_model=List[InventoryStatusResponse])
-def get_inventory_status(
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(require_permission(Permission.VIEW_INVENTORY)),  # 🆕 RBAC CHECK
-    db: Session = Depends(get_db)
+async def get_inventory_status(
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.VIEW_INVENTORY)),  # 🆕 RBAC CHECK
+    etag: None = Depends(ConditionalGet("inventory", "sales")),  # 304 if unchanged
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current inventory status for all varieties with stock information (tenant-isolated, requires VIEW_INVENTORY permission)
     """
     # Filter varieties by tenant
-    varieties = db.query(ClothVariety).filter(
-        ClothVariety.tenant_id == tenant.id
-    ).all()
-    
-    inventory_status = []
-    
-    for variety in varieties:
-        # Calculate total supplied (TENANT FILTERED)
-        total_supplied = db.query(
-            func.sum(SupplierInventory.quantity)
-        ).filter(
-            SupplierInventory.variety_id == variety.id,
-            SupplierInventory.tenant_id == tenant.id
-        ).scalar() or Decimal('0')
-        
-        # Calculate total sold from new stock (TENANT FILTERED)
-        total_sold = db.query(
-            func.sum(Sale.quantity)
-        ).filter(
-            Sale.variety_id == variety.id,
-            Sale.stock_type == 'new_stock',
-            Sale.tenant_id == tenant.id
-        ).scalar() or Decimal('0')
-        
-        # Calculate total returned (TENANT FILTERED)
-        total_returned = db.query(
-            func.sum(SupplierReturn.quantity)
-        ).filter(
-            SupplierReturn.variety_id == variety.id,
-            SupplierReturn.tenant_id == tenant.id
-        ).scalar() or Decimal('0')
-        
-        # Check if low stock
-        is_low_stock = False
-        if variety.min_stock_level:
-            is_low_stock = variety.current_stock <= variety.min_stock_level
-        
-        inventory_status.append(
-            InventoryStatusResponse(
-                variety_id=variety.id,
-                variety_name=variety.name,
-                current_stock=variety.current_stock,
-                min_stock_level=variety.min_stock_level,
-                is_low_stock=is_low_stock,
-                total_supplied=total_supplied,
-                total_sold=total_sold,
-                total_returned=total_returned,
-                measurement_unit=variety.measurement_unit.value
-            )
-        )
+    result = await db.execute(
+        select(ClothVariety).where(ClothVariety.tenant_id == tenant.id)
+    )
+    varieties = result.scalars().all()
     
-    return inventory_status
+    # Totals for all varieties in a constant number of grouped queries (TENANT FILTERED)
+    return await InventoryEngine.aget_status_for_varieties(db, tenant.id, varieties)
 
 
 @router.get("/status/{variety_id}", response_model=InventoryStatusResponse)
-def get_variety_inventory_status(
+async def get_variety_inventory_status(
     variety_id: int,
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(require_permission(Permission.VIEW_INVENTORY)),  # 🆕 RBAC CHECK
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.VIEW_INVENTORY)),  # 🆕 RBAC CHECK
+    etag: None = Depends(ConditionalGet("inventory", "sales")),  # 304 if unchanged
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current inventory status for a specific variety (tenant-isolated, requires VIEW_INVENTORY permission)
     """
     # Get variety WITH TENANT FILTER
-    variety = db.query(ClothVariety).filter(
-        ClothVariety.id == variety_id,
-        ClothVariety.tenant_id == tenant.id
-    ).first()
+    result = await db.execute(
+        select(ClothVariety).where(
+            ClothVariety.id == variety_id,
+            ClothVariety.tenant_id == tenant.id
+        )
+    )
+    variety = result.scalars().first()
     
     if not variety:
         raise HTTPException(
@@ -103,43 +67,9 @@ def get_variety_inventory_status(
         )
     
     # Calculate totals (TENANT FILTERED)
-    total_supplied = db.query(
-        func.sum(SupplierInventory.quantity)
-    ).filter(
-        SupplierInventory.variety_id == variety_id,
-        SupplierInventory.tenant_id == tenant.id
-    ).scalar() or Decimal('0')
-    
-    total_sold = db.query(
-        func.sum(Sale.quantity)
-    ).filter(
-        Sale.variety_id == variety_id,
-        Sale.stock_type == 'new_stock',
-        Sale.tenant_id == tenant.id
-    ).scalar() or Decimal('0')
-    
-    total_returned = db.query(
-        func.sum(SupplierReturn.quantity)
-    ).filter(
-        SupplierReturn.variety_id == variety_id,
-        SupplierReturn.tenant_id == tenant.id
-    ).scalar() or Decimal('0')
+    totals = await InventoryEngine.aget_variety_totals(db, tenant.id, variety_ids=[variety.id])
     
-    is_low_stock = False
-    if variety.min_stock_level:
-        is_low_stock = variety.current_stock <= variety.min_stock_level
-    
-    return InventoryStatusResponse(
-        variety_id=variety.id,
-        variety_name=variety.name,
-        current_stock=variety.current_stock,
-        min_stock_level=variety.min_stock_level,
-        is_low_stock=is_low_stock,
-        total_supplied=total_supplied,
-        total_sold=total_sold,
-        total_returned=total_returned,
-        measurement_unit=variety.measurement_unit.value
-    )
+    return InventoryEngine.build_status(variety, totals.get(variety.id))
 
 
 @router.get("/movements/{variety_id}", response_model=List[InventoryMovementResponse])
@@ -176,63 +106,57 @@ def get_inventory_movements(
     return movements
 
 
-@router.get("/low-stock", response_model=List[InventoryStatusResponse])
-def get_low_stock_items(
+@router.get("/as-of/{as_of}", response_model=List[InventoryAsOfResponse])
+async def get_inventory_as_of(
+    as_of: date,
+    variety_id: Optional[int] = Query(None, description="Only this variety"),
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.VIEW_INVENTORY)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stock of every variety at the end of a date, from the inventory ledger (tenant-isolated, requires VIEW_INVENTORY permission)
+    Answered from the nearest month-end snapshot plus the movements after it
+    """
+    return await InventoryLedger.aget_stock_as_of(db, tenant.id, as_of, variety_id)
+
+
+@router.post("/reconcile", response_model=List[StockDriftResponse])
+def reconcile_inventory(
+    apply: bool = Query(False, description="Overwrite current_stock with the ledger total"),
     tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(require_permission(Permission.VIEW_INVENTORY)),  # 🆕 RBAC CHECK
+    owner: User = Depends(require_owner),
     db: Session = Depends(get_db)
+):
+    """
+    Varieties whose current_stock differs from their movement ledger (Owner only)
+    With apply=true the stock levels are corrected to the ledger totals
+    """
+    return InventoryLedger.reconcile(db, tenant_id=tenant.id, apply=apply)
+
+
+@router.get("/low-stock", response_model=List[InventoryStatusResponse])
+async def get_low_stock_items(
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.VIEW_INVENTORY)),  # 🆕 RBAC CHECK
+    etag: None = Depends(ConditionalGet("inventory", "sales")),  # 304 if unchanged
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all varieties that are below their minimum stock level (tenant-isolated, requires VIEW_INVENTORY permission)
     """
     # Filter varieties WITH TENANT
-    varieties = db.query(ClothVariety).filter(
-        ClothVariety.min_stock_level.isnot(None),
-        ClothVariety.current_stock <= ClothVariety.min_stock_level,
-        ClothVariety.tenant_id == tenant.id
-    ).all()
-    
-    low_stock_items = []
-    
-    for variety in varieties:
-        # All calculations TENANT FILTERED
-        total_supplied = db.query(
-            func.sum(SupplierInventory.quantity)
-        ).filter(
-            SupplierInventory.variety_id == variety.id,
-            SupplierInventory.tenant_id == tenant.id
-        ).scalar() or Decimal('0')
-        
-        total_sold = db.query(
-            func.sum(Sale.quantity)
-        ).filter(
-            Sale.variety_id == variety.id,
-            Sale.stock_type == 'new_stock',
-            Sale.tenant_id == tenant.id
-        ).scalar() or Decimal('0')
-        
-        total_returned = db.query(
-            func.sum(SupplierReturn.quantity)
-        ).filter(
-            SupplierReturn.variety_id == variety.id,
-            SupplierReturn.tenant_id == tenant.id
-        ).scalar() or Decimal('0')
-        
-        low_stock_items.append(
-            InventoryStatusResponse(
-                variety_id=variety.id,
-                variety_name=variety.name,
-                current_stock=variety.current_stock,
-                min_stock_level=variety.min_stock_level,
-                is_low_stock=True,
-                total_supplied=total_supplied,
-                total_sold=total_sold,
-                total_returned=total_returned,
-                measurement_unit=variety.measurement_unit.value
-            )
+    result = await db.execute(
+        select(ClothVariety).where(
+            ClothVariety.min_stock_level.isnot(None),
+            ClothVariety.current_stock <= ClothVariety.min_stock_level,
+            ClothVariety.tenant_id == tenant.id
         )
+    )
+    varieties = result.scalars().all()
     
-    return low_stock_items
+    # All calculations TENANT FILTERED
+    return await InventoryEngine.aget_status_for_varieties(db, tenant.id, varieties)
 
 
 @router.post("/adjust/{variety_id}")
@@ -0,0 +1,35 @@
+# app/routes/metrics.py - Process-wide operational metrics (Platform Admin Only)
+
+from fastapi import APIRouter, Depends
+from database import get_pool_metrics
+from response_cache import ResponseCache
+from auth_models import User
+from rbac import require_superuser
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+# ==================== DATABASE POOL ====================
+
+@router.get("/db-pool")
+def get_db_pool_metrics(
+    admin: User = Depends(require_superuser)
+):
+    """
+    Connection pool telemetry for this worker process (platform admins only - not tenant data)
+    Checkout wait percentiles, overflow usage and timeouts for the sync and async engines
+    """
+    return get_pool_metrics()
+
+
+# ==================== RESPONSE CACHE ====================
+
+@router.get("/response-cache")
+def get_response_cache_metrics(
+    admin: User = Depends(require_superuser)
+):
+    """
+    Dashboard response cache for this worker process (platform admins only - not tenant data)
+    Hits, misses and backend errors per endpoint, plus backend and size
+    """
+    return ResponseCache.stats()
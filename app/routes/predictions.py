@@ -4,11 +4,16 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from database import get_db
 from models import Sale, SupplierInventory, ClothVariety
 from analytics_engine import AnalyticsEngine
+from forecast_jobs import ForecastJobs, FORECAST_MIN_PROPHET_DAYS
+from schemas import ForecastJobCreate
+from sales_rollup import SalesRollupService
+from response_cache import ResponseCache
 from fastapi import HTTPException, status
 
 from routes.auth_routes import get_current_tenant
@@ -17,6 +22,38 @@ from auth_models import Tenant
 router = APIRouter(prefix="/predictions", tags=["Predictive Analytics"])
 
 
+# ==================== HISTORY HELPERS ====================
+
+def get_revenue_history(db: Session, tenant_id: int, days: int = 90) -> List[dict]:
+    """Daily revenue series for forecasting: [{"date": "YYYY-MM-DD", "revenue": float}, ...]"""
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+    
+    # Daily sales from the rollup WITH TENANT FILTER
+    daily_sales = SalesRollupService.get_daily_series(db, tenant_id, start_date, end_date)
+    
+    return [
+        {"date": str(sale.sale_date), "revenue": float(sale.revenue)}
+        for sale in daily_sales
+    ]
+
+
+def get_demand_history(db: Session, tenant_id: int, variety_id: int, days: int = 90) -> List[dict]:
+    """Daily quantity series of one variety: [{"date": "YYYY-MM-DD", "quantity": float}, ...]"""
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+    
+    # Daily sales from the rollup WITH TENANT FILTER
+    daily_sales = SalesRollupService.get_daily_series(
+        db, tenant_id, start_date, end_date, variety_id=variety_id
+    )
+    
+    return [
+        {"date": str(sale.sale_date), "quantity": float(sale.quantity_sold)}
+        for sale in daily_sales
+    ]
+
+
 @router.get("/revenue-forecast")
 def forecast_revenue(
     days_ahead: int = Query(30, ge=7, le=90, description="Days to forecast (7-90)"),
@@ -28,31 +65,12 @@ def forecast_revenue(
     🆕 NOW USES FACEBOOK PROPHET FOR ACCURATE TIME SERIES FORECASTING
     """
     
-    # Get historical sales data (last 90 days)
-    end_date = date.today()
-    start_date = end_date - timedelta(days=90)
-    
-    # Query daily sales aggregated WITH TENANT FILTER
-    daily_sales = db.query(
-        Sale.sale_date,
-        func.sum(Sale.selling_price * Sale.quantity).label('revenue')
-    ).filter(
-        Sale.sale_date >= start_date,
-        Sale.sale_date <= end_date,
-        Sale.tenant_id == tenant.id
-    ).group_by(Sale.sale_date).order_by(Sale.sale_date).all()
-    
-    # Prepare data for forecasting
-    historical_data = [
-        {
-            "date": str(sale.sale_date),
-            "revenue": float(sale.revenue)
-        }
-        for sale in daily_sales
-    ]
+    # Get historical sales data (last 90 days, TENANT FILTERED)
+    historical_data = get_revenue_history(db, tenant.id)
     
     # 🆕 Generate forecast using Prophet (automatically falls back to sklearn if unavailable)
-    forecast_result = AnalyticsEngine.forecast_revenue(historical_data, days_ahead)
+    # Fitted in the forecast process pool; cached per tenant + series fingerprint
+    forecast_result = ForecastJobs.run(tenant.id, "revenue", historical_data, days_ahead)
     
     return {
         "historical_data": historical_data[-30:],  # Last 30 days
@@ -71,6 +89,92 @@ def forecast_revenue(
     }
 
 
+@router.get("/product-demand")
+def predict_product_demand_batch(
+    variety_ids: Optional[List[int]] = Query(None, description="Varieties to forecast (default: all)"),
+    days_ahead: int = Query(30, ge=7, le=90),
+    tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """
+    Demand forecasts + reorder points for many products in one call (tenant-isolated)
+    One grouped query for all series; dense series are fitted with Prophet in parallel,
+    sparse ones get a fast vectorized average-rate forecast
+    """
+    # Varieties WITH TENANT FILTER
+    variety_query = db.query(ClothVariety).filter(ClothVariety.tenant_id == tenant.id)
+    if variety_ids:
+        variety_query = variety_query.filter(ClothVariety.id.in_(variety_ids))
+    varieties = {v.id: v for v in variety_query.all()}
+    
+    if not varieties:
+        return {"forecasts": [], "total_products": 0, "days_ahead": days_ahead}
+    
+    # Same 90-day window as /product-demand/{variety_id}, so both share cached fits
+    end_date = date.today()
+    start_date = end_date - timedelta(days=90)
+    
+    rows = SalesRollupService.get_variety_daily_quantities(
+        db, tenant.id, start_date, end_date, variety_ids=list(varieties)
+    )
+    
+    series = defaultdict(list)
+    for row in rows:
+        series[row.variety_id].append(
+            {"date": str(row.sale_date), "quantity": float(row.quantity_sold)}
+        )
+    
+    dense = {
+        variety_id: history for variety_id, history in series.items()
+        if len(history) >= FORECAST_MIN_PROPHET_DAYS
+    }
+    
+    # Prophet fits in the process pool (cached fits are reused)
+    results = ForecastJobs.run_batch(tenant.id, "demand", dense, days_ahead)
+    
+    # Sparse series, and any dense fit that failed, use the fast fallback
+    sparse = {
+        variety_id: series.get(variety_id, [])
+        for variety_id in varieties
+        if variety_id not in results
+    }
+    results.update(
+        AnalyticsEngine.forecast_sparse_demand_batch(sparse, start_date, end_date, days_ahead)
+    )
+    
+    forecasts = []
+    for variety_id, variety in varieties.items():
+        forecast_result = results[variety_id]
+        history = series.get(variety_id, [])
+        
+        # Average over days with sales (same as the single-product endpoint)
+        avg_daily_sales = sum(item["quantity"] for item in history) / len(history) if history else 0
+        reorder_point = AnalyticsEngine.calculate_reorder_point(avg_daily_sales)
+        
+        forecasts.append({
+            "variety_id": variety_id,
+            "variety_name": variety.name,
+            "forecast": forecast_result.get("forecast", []),
+            "confidence": forecast_result.get("confidence", "low"),
+            "r_squared": forecast_result.get("r_squared", 0),
+            "analytics": {
+                "avg_daily_sales": round(avg_daily_sales, 2),
+                "total_predicted_demand": int(forecast_result.get("total_predicted", 0)),
+                "reorder_point": reorder_point,
+                "recommendation": f"Reorder when stock falls below {reorder_point} units"
+            },
+            "model_info": forecast_result.get("model_info", {}),
+            "message": forecast_result.get("message", "")
+        })
+    
+    return {
+        "forecasts": forecasts,
+        "total_products": len(forecasts),
+        "days_ahead": days_ahead,
+        "generated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/product-demand/{variety_id}")
 def predict_product_demand(
     variety_id: int,
@@ -95,44 +199,34 @@ def predict_product_demand(
             detail="Variety not found in your business"
         )
     
-    # Get historical sales for this product
-    end_date = date.today()
-    start_date = end_date - timedelta(days=90)
+    # Get historical sales for this product (last 90 days, TENANT FILTERED)
+    historical_data = get_demand_history(db, tenant.id, variety_id)
     
-    # Get daily sales WITH TENANT FILTER
-    daily_sales = db.query(
-        Sale.sale_date,
-        func.sum(Sale.quantity).label('quantity_sold')
-    ).filter(
-        Sale.variety_id == variety_id,
-        Sale.sale_date >= start_date,
-        Sale.sale_date <= end_date,
-        Sale.tenant_id == tenant.id
-    ).group_by(Sale.sale_date).order_by(Sale.sale_date).all()
-    
-    if len(daily_sales) < 7:
+    if not historical_data:
         return {
             "variety_id": variety_id,
             "variety_name": variety.name,
-            "message": "Insufficient sales history for this product (need at least 7 days)",
+            "message": "No sales history for this product yet",
             "forecast": [],
             "confidence": "low"
         }
     
-    # 🆕 Prepare data for Prophet (quantity prediction)
-    historical_data = [
-        {"date": str(sale.sale_date), "quantity": float(sale.quantity_sold)}
-        for sale in daily_sales
-    ]
-    
-    # 🆕 Generate forecast using Prophet for QUANTITY
-    forecast_result = AnalyticsEngine.forecast_product_demand_prophet(
-        historical_data, days_ahead
-    )
+    if len(historical_data) >= FORECAST_MIN_PROPHET_DAYS:
+        # 🆕 Generate forecast using Prophet for QUANTITY (process pool, cached until this variety's sales change)
+        forecast_result = ForecastJobs.run(
+            tenant.id, "demand", historical_data, days_ahead, variety_id=variety_id
+        )
+    else:
+        # Too few sale days for Prophet: same average-rate forecast as the batch endpoint
+        end_date = date.today()
+        start_date = end_date - timedelta(days=90)
+        forecast_result = AnalyticsEngine.forecast_sparse_demand_batch(
+            {variety_id: historical_data}, start_date, end_date, days_ahead
+        )[variety_id]
     
     # Calculate reorder point
-    total_qty = sum(sale.quantity_sold for sale in daily_sales)
-    avg_daily_sales = total_qty / len(daily_sales)
+    total_qty = sum(item["quantity"] for item in historical_data)
+    avg_daily_sales = total_qty / len(historical_data)
     reorder_point = AnalyticsEngine.calculate_reorder_point(avg_daily_sales)
     
     return {
@@ -153,6 +247,7 @@ def predict_product_demand(
 
 
 @router.get("/sales-trends")
+@ResponseCache.cached("predictions.sales-trends", domains=("sales",))
 def analyze_sales_trends(
     days: int = Query(30, ge=7, le=180),
     tenant: Tenant = Depends(get_current_tenant),
@@ -163,17 +258,8 @@ def analyze_sales_trends(
     end_date = date.today()
     start_date = end_date - timedelta(days=days)
     
-    # Get daily sales WITH TENANT FILTER
-    daily_sales = db.query(
-        Sale.sale_date,
-        func.sum(Sale.selling_price * Sale.quantity).label('revenue'),
-        func.sum(Sale.profit).label('profit'),
-        func.count(Sale.id).label('transaction_count')
-    ).filter(
-        Sale.sale_date >= start_date,
-        Sale.sale_date <= end_date,
-        Sale.tenant_id == tenant.id
-    ).group_by(Sale.sale_date).order_by(Sale.sale_date).all()
+    # Get daily sales from the rollup WITH TENANT FILTER
+    daily_sales = SalesRollupService.get_daily_series(db, tenant.id, start_date, end_date)
     
     if len(daily_sales) < 7:
         return {"error": "Insufficient data for trend analysis"}
@@ -223,6 +309,7 @@ def analyze_sales_trends(
 
 
 @router.get("/product-performance")
+@ResponseCache.cached("predictions.product-performance", domains=("sales", "inventory"))
 def analyze_product_performance(
     days: int = Query(30, ge=7, le=180),
     tenant: Tenant = Depends(get_current_tenant),
@@ -303,6 +390,7 @@ def analyze_product_performance(
 
 
 @router.get("/smart-insights")
+@ResponseCache.cached("predictions.smart-insights", domains=("sales", "inventory"))
 def get_smart_insights(
     days: int = 30,
     tenant: Tenant = Depends(get_current_tenant),
@@ -316,28 +404,22 @@ def get_smart_insights(
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
         
-        # Fetch sales data WITH TENANT FILTER
-        sales = db.query(Sale).filter(
-            Sale.sale_date >= start_date,
-            Sale.sale_date <= end_date,
-            Sale.tenant_id == tenant.id
-        ).all()
-        
-        # Format sales_data correctly with "revenue" key
+        # Per-day revenue from the rollup WITH TENANT FILTER (one grouped query)
         sales_data = [
-            {
-                "date": sale.sale_date,
-                "revenue": float(sale.selling_price * sale.quantity)
-            }
-            for sale in sales
+            {"date": row.sale_date, "revenue": float(row.revenue)}
+            for row in SalesRollupService.get_daily_series(db, tenant.id, start_date, end_date)
         ]
         
-        # Fetch inventory data WITH TENANT FILTER
-        inventories = db.query(SupplierInventory).filter(
+        # Supplied quantity per variety and day WITH TENANT FILTER (one grouped query)
+        inventories = db.query(
+            SupplierInventory.variety_id,
+            SupplierInventory.supply_date,
+            func.sum(SupplierInventory.quantity).label('quantity')
+        ).filter(
             SupplierInventory.supply_date >= start_date,
             SupplierInventory.supply_date <= end_date,
             SupplierInventory.tenant_id == tenant.id
-        ).all()
+        ).group_by(SupplierInventory.variety_id, SupplierInventory.supply_date).all()
         
         inventory_data = [
             {
@@ -348,35 +430,16 @@ def get_smart_insights(
             for inv in inventories
         ]
         
-        # Calculate product performance
-        product_stats = {}
-        for sale in sales:
-            # Get variety WITH TENANT FILTER
-            variety = db.query(ClothVariety).filter(
-                ClothVariety.id == sale.variety_id,
-                ClothVariety.tenant_id == tenant.id
-            ).first()
-            
-            if not variety:
-                continue
-                
-            name = variety.name
-            if name not in product_stats:
-                product_stats[name] = {
-                    "name": name,
-                    "revenue": 0,
-                    "quantity": 0,
-                    "margin": 0
-                }
-            
-            revenue = float(sale.selling_price * sale.quantity)
-            product_stats[name]["revenue"] += revenue
-            product_stats[name]["quantity"] += float(sale.quantity)
-            
-            if revenue > 0:
-                product_stats[name]["margin"] = (float(sale.profit) / revenue) * 100
-        
-        product_data = list(product_stats.values())
+        # Per-variety revenue / quantity / margin, joined once to the variety names
+        product_data = []
+        for row in SalesRollupService.get_variety_totals(db, tenant.id, start_date, end_date):
+            revenue = float(row.revenue or 0)
+            product_data.append({
+                "name": row.variety_name,
+                "revenue": revenue,
+                "quantity": float(row.quantity_sold or 0),
+                "margin": (float(row.profit or 0) / revenue) * 100 if revenue > 0 else 0
+            })
         
         # Generate insights
         insights = AnalyticsEngine.generate_insights(sales_data, inventory_data, product_data)
@@ -456,4 +519,67 @@ def get_reorder_recommendations(
         "recommendations": recommendations,
         "total_products": len(recommendations),
         "generated_at": datetime.now().isoformat()
-    }
\ No newline at end of file
+    }
+
+
+# ==================== FORECAST JOBS ====================
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+def submit_forecast_job(
+    job_request: ForecastJobCreate,
+    tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a forecast in the background worker pool (tenant-isolated)
+    Identical in-flight requests share one job; poll GET /predictions/jobs/{job_id}
+    """
+    if job_request.kind == "demand":
+        if job_request.variety_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="variety_id is required for demand forecasts"
+            )
+        
+        # Check if variety exists FOR THIS TENANT
+        variety = db.query(ClothVariety).filter(
+            ClothVariety.id == job_request.variety_id,
+            ClothVariety.tenant_id == tenant.id
+        ).first()
+        
+        if not variety:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Variety not found in your business"
+            )
+        
+        historical_data = get_demand_history(db, tenant.id, job_request.variety_id)
+    else:
+        historical_data = get_revenue_history(db, tenant.id)
+    
+    job = ForecastJobs.submit(
+        tenant.id,
+        job_request.kind,
+        historical_data,
+        job_request.days_ahead,
+        variety_id=job_request.variety_id if job_request.kind == "demand" else None
+    )
+    
+    return ForecastJobs.describe(job)
+
+
+@router.get("/jobs/{job_id}")
+def get_forecast_job(
+    job_id: str,
+    tenant: Tenant = Depends(get_current_tenant)
+):
+    """Poll a forecast job: queued / running / completed (with result) / failed (tenant-isolated)"""
+    job = ForecastJobs.get(job_id, tenant.id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Forecast job not found (it may have expired)"
+        )
+    
+    return ForecastJobs.describe(job)
@@ -4,8 +4,9 @@ from sqlalchemy import func
 from datetime import date
 from decimal import Decimal
 from database import get_db
-from models import SupplierInventory, SupplierReturn, Sale
+from models import SupplierInventory, SupplierReturn, DailySalesRollup
 from schemas import DailyReport, DailySupplierSummary, DailySalesSummary
+from sales_rollup import SalesRollupService
 
 from routes.auth_routes import get_current_tenant
 from auth_models import Tenant, User
@@ -51,13 +52,8 @@ def get_daily_report(
         return_count=return_count
     )
     
-    # Sales Summary
-    sales_result = db.query(
-        func.sum(Sale.selling_price * Sale.quantity).label('total_sales'),
-        func.sum(Sale.profit).label('total_profit'),
-        func.sum(Sale.quantity).label('total_quantity'),
-        func.count(Sale.id).label('sales_count')
-    ).filter(Sale.sale_date == report_date, Sale.tenant_id == tenant.id ).first()
+    # Sales Summary (from daily rollup)
+    sales_result = SalesRollupService.get_summary(db, tenant.id, report_date, report_date)
     
     total_sales = sales_result.total_sales if sales_result.total_sales else Decimal('0.00')
     total_profit = sales_result.total_profit if sales_result.total_profit else Decimal('0.00')
@@ -87,24 +83,18 @@ def get_profit_report(
         db: Session = Depends(get_db)):
     """Get detailed profit breakdown for a specific date"""
     
-    # Get profit by variety
-    profit_by_variety = db.query(
-        Sale.variety_id,
-        func.sum(Sale.profit).label('total_profit'),
-        func.sum(Sale.quantity).label('total_quantity')
-    ).filter(Sale.sale_date == report_date, Sale.tenant_id == tenant.id).group_by(Sale.variety_id).all()
+    # Get profit by variety (from daily rollup)
+    profit_by_variety = SalesRollupService.get_breakdown(
+        db, tenant.id, report_date, report_date, DailySalesRollup.variety_id
+    )
     
-    # Get profit by salesperson
-    profit_by_salesperson = db.query(
-        Sale.salesperson_name,
-        func.sum(Sale.profit).label('total_profit'),
-        func.sum(Sale.quantity).label('total_quantity')
-    ).filter(Sale.sale_date == report_date, Sale.tenant_id ==tenant.id ).group_by(Sale.salesperson_name).all()
+    # Get profit by salesperson (from daily rollup)
+    profit_by_salesperson = SalesRollupService.get_breakdown(
+        db, tenant.id, report_date, report_date, DailySalesRollup.salesperson_name
+    )
     
     # Calculate total profit
-    total_profit_result = db.query(
-        func.sum(Sale.profit).label('total_profit')
-    ).filter(Sale.sale_date == report_date, Sale.tenant_id ==tenant.id).first()
+    total_profit_result = SalesRollupService.get_summary(db, tenant.id, report_date, report_date)
     
     total_profit = total_profit_result.total_profit if total_profit_result.total_profit else Decimal('0.00')
     
@@ -1,18 +1,30 @@
 # app/routes/sales.py - UPDATED WITH AUTO-CREATION FEATURE
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Literal
+from datetime import date, datetime
 from decimal import Decimal
-from database import get_db
+from enum import Enum
+import csv
+import io
+import json
+from database import get_db, get_async_db, SessionLocal
 from models import Sale, ClothVariety, SupplierInventory, InventoryMovement, StockType, MeasurementUnit, PaymentStatus
-from schemas import SaleCreate, SaleResponse, DailySalesSummary, SalespersonSummary, SaleUpdate
-from routes.auth_routes import get_current_tenant
+from schemas import SaleCreate, SaleResponse, DailySalesSummary, SalespersonSummary, SaleUpdate, BulkSaleCreate, BulkSaleResponse
+from sales_rollup import SalesRollupService
+from sales_bulk import BulkSaleService, BULK_SALES_MAX_ROWS
+from fifo_allocator import FifoAllocator
+from sale_service import SaleService
+from inventory_ledger import InventoryLedger
+from pagination import PageParams, keyset_paginate, page_items
+from routes.auth_routes import get_current_tenant, get_current_tenant_async
 from auth_models import Tenant, User
 from routes.auth_routes import get_current_user
-from rbac import require_permission, Permission
+from rbac import require_permission, require_permission_async, Permission
 # Add this import at the top
 from pydantic import BaseModel
 from typing import Optional
@@ -82,128 +94,203 @@ def create_sale(
             detail="Variety not found. Please provide variety_id or variety_name"
         )
     
-    # ========== STEP 2: Calculate Sale Values ==========
-    quantity = Decimal(str(sale.quantity))
-    total_cost = Decimal(str(sale.cost_price))
-    total_selling = Decimal(str(sale.selling_price))
-    
-    cost_per_unit = total_cost / quantity
-    selling_per_unit = total_selling / quantity
-    profit_per_unit = selling_per_unit - cost_per_unit
-    total_profit = profit_per_unit * quantity
-    
-    # ========== STEP 3: Handle Inventory (Auto-create if needed) ==========
-    supplier_inventory_id = None
-
-    # Always auto-create inventory if needed (no stock_type check)
-    # Check if there's existing inventory with remaining stock
-    existing_inventory = db.query(SupplierInventory).filter(
-        SupplierInventory.variety_id == variety.id,
-        SupplierInventory.quantity_remaining >= quantity,
-        SupplierInventory.tenant_id == tenant.id
-    ).order_by(SupplierInventory.supply_date.asc()).first()
-
-    if existing_inventory:
-        # Use existing inventory (FIFO)
-        supplier_inventory = existing_inventory
-        print(f"✅ Using existing inventory ID: {supplier_inventory.id}")
-    else:
-        # Auto-create inventory record
-        print(f"📦 Auto-creating inventory")
-        
-        supplier_inventory = SupplierInventory(
-            tenant_id=tenant.id,
-            supplier_name="To Be Updated",  # Placeholder
-            variety_id=variety.id,
-            quantity=quantity,  # Use sale quantity
-            price_per_item=cost_per_unit,  # Use cost from sale
-            total_amount=total_cost,  # Total cost
-            supply_date=sale.sale_date,  # Use sale date
-            quantity_used=Decimal('0'),
-            quantity_remaining=quantity,
-            quantity_returned=Decimal('0')
-        )
-        
-        db.add(supplier_inventory)
-        db.flush()
-        print(f"✅ Inventory created with ID: {supplier_inventory.id}")
-        
-    # Deduct from inventory
-    supplier_inventory.quantity_used += quantity
-    supplier_inventory.quantity_remaining -= quantity
-    supplier_inventory_id = supplier_inventory.id
-
-    # Update variety stock
-    variety.current_stock += quantity  # First add the new stock
-    variety.current_stock -= quantity  # Then deduct the sale
-
-    # Log inventory movement
-    inventory_movement = InventoryMovement(
-        tenant_id=tenant.id,
-        variety_id=variety.id,
-        movement_type='sale',
-        quantity=-quantity,
-        reference_type='sale',
-        notes=f'Sale by {sale.salesperson_name} (auto-inventory)',
-        movement_date=sale.sale_date,
-        stock_after=variety.current_stock
-    )
-    db.add(inventory_movement)
-    
-    # ========== STEP 4: Create Sale Record ==========
-    db_sale = Sale(
-        tenant_id=tenant.id,
+    # ========== STEP 2: Allocate inventory, record sale (one transaction, one commit) ==========
+    recorded = SaleService.record_sale(
+        db, tenant.id, variety,
+        quantity=Decimal(str(sale.quantity)),
+        total_cost=Decimal(str(sale.cost_price)),
+        total_selling=Decimal(str(sale.selling_price)),
         salesperson_name=sale.salesperson_name,
-        variety_id=variety.id,
-        quantity=quantity,
-        selling_price=selling_per_unit,
-        cost_price=cost_per_unit,
-        profit=total_profit,
         sale_date=sale.sale_date,
-        supplier_inventory_id=supplier_inventory_id,
         payment_status=sale.payment_status,
-        customer_name=sale.customer_name
+        customer_name=sale.customer_name,
+        movement_notes=f'Sale by {sale.salesperson_name} (auto-inventory)'
     )
-
-    db.add(db_sale)
-    db.commit()
-    db.refresh(db_sale)
-
-    # Update inventory movement reference
-    inventory_movement.reference_id = db_sale.id
-    db.commit()
+    db_sale = recorded["sale"]
     
     print(f"✅ Sale recorded successfully with ID: {db_sale.id}")
     
     return db_sale
 
 
+# ==================== BULK UPLOAD ====================
+@router.post("/bulk", response_model=BulkSaleResponse)
+def create_sales_bulk(
+    payload: BulkSaleCreate,
+    atomic: bool = Query(False, description="Reject the whole upload if any row is invalid"),
+    tenant: Tenant = Depends(get_current_tenant),
+    user: User = Depends(require_permission(Permission.ADD_SALES)),
+    db: Session = Depends(get_db)
+):
+    """
+    Record a batch of sales (e.g. a day of paper slips) in one transaction
+    
+    Each item has the same fields as POST /sales/ and follows the same rules
+    (auto-created varieties / inventory, FIFO lots). Invalid rows are reported in
+    `errors` by their index; valid rows are recorded unless `atomic=true`.
+    
+    Required Permission: ADD_SALES
+    """
+    if len(payload.sales) > BULK_SALES_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many sales in one upload (max {BULK_SALES_MAX_ROWS})"
+        )
+    
+    return BulkSaleService.ingest(db, tenant.id, payload.sales, atomic=atomic)
+
+
 # ==================== GET ALL SALES ====================
 @router.get("/", response_model=List[SaleResponse])
 def get_all_sales(
+    response: Response,
+    page: PageParams = Depends(),
     tenant: Tenant = Depends(get_current_tenant),
     user: User = Depends(require_permission(Permission.VIEW_SALES)),
     db: Session = Depends(get_db)
 ):
-    """Get all sales records (tenant-isolated)"""
-    sales = db.query(Sale).filter(Sale.tenant_id == tenant.id).all()
-    return sales
+    """
+    Get all sales records (tenant-isolated)
+    Newest first, one page of ?limit= at a time (next cursor in X-Next-Cursor)
+    """
+    query = db.query(Sale).filter(Sale.tenant_id == tenant.id)
+
+    query = keyset_paginate(query, Sale.sale_date, Sale.id, page)
+    return page_items(query.all(), "sale_date", page, response)
+
+
+# ==================== STREAMING EXPORT ====================
+EXPORT_COLUMNS = [
+    "id", "sale_date", "sale_timestamp", "salesperson_name", "variety_id", "variety_name",
+    "quantity", "selling_price", "cost_price", "profit", "stock_type", "payment_status",
+    "customer_name", "supplier_inventory_id"
+]
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_value(value):
+    """Plain CSV / JSON value for an exported column"""
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def _iter_export_rows(
+    tenant_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    variety_id: Optional[int],
+    salesperson_name: Optional[str]
+):
+    """
+    Yield export rows (tuples) using a server-side cursor
+    Runs on its own session: the response body is produced after the request's dependencies finish
+    """
+    query = select(
+        Sale.id, Sale.sale_date, Sale.sale_timestamp, Sale.salesperson_name,
+        Sale.variety_id, ClothVariety.name, Sale.quantity, Sale.selling_price,
+        Sale.cost_price, Sale.profit, Sale.stock_type, Sale.payment_status,
+        Sale.customer_name, Sale.supplier_inventory_id
+    ).join(
+        ClothVariety, ClothVariety.id == Sale.variety_id
+    ).where(
+        Sale.tenant_id == tenant_id
+    ).order_by(Sale.sale_date, Sale.id)
+    
+    if start_date:
+        query = query.where(Sale.sale_date >= start_date)
+    if end_date:
+        query = query.where(Sale.sale_date <= end_date)
+    if variety_id:
+        query = query.where(Sale.variety_id == variety_id)
+    if salesperson_name:
+        query = query.where(Sale.salesperson_name == salesperson_name)
+    
+    db = SessionLocal()
+    try:
+        # stream_results + yield_per: rows arrive in batches, never all in memory
+        result = db.execute(
+            query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        )
+        for partition in result.partitions():
+            yield [[_export_value(value) for value in row] for row in partition]
+    finally:
+        db.close()
+
+
+def _stream_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    
+    # Header only when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _stream_ndjson(batches):
+    for batch in batches:
+        yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in batch)
+
+
+@router.get("/export")
+def export_sales(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    variety_id: Optional[int] = Query(None),
+    salesperson_name: Optional[str] = Query(None),
+    tenant: Tenant = Depends(get_current_tenant),
+    user: User = Depends(require_permission(Permission.VIEW_SALES))
+):
+    """
+    Stream sales as CSV or NDJSON (tenant-isolated)
+    Memory stays constant no matter how many sales the business has
+    """
+    batches = _iter_export_rows(tenant.id, start_date, end_date, variety_id, salesperson_name)
+    
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_ndjson(batches),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="sales.ndjson"'}
+        )
+    
+    return StreamingResponse(
+        _stream_csv(batches),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="sales.csv"'}
+    )
 
 
 # ==================== GET SALES BY DATE ====================
 @router.get("/date/{sale_date}", response_model=List[SaleResponse])
-def get_sales_by_date(
+async def get_sales_by_date(
     sale_date: date,
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(require_permission(Permission.VIEW_SALES)),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.VIEW_SALES)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all sales for a specific date (tenant-isolated)"""
-    sales = db.query(Sale).filter(
-        Sale.sale_date == sale_date,
-        Sale.tenant_id == tenant.id
-    ).all()
-    return sales
+    result = await db.execute(
+        select(Sale).options(
+            selectinload(Sale.variety)  # async sessions can't lazy-load the response's variety
+        ).where(
+            Sale.sale_date == sale_date,
+            Sale.tenant_id == tenant.id
+        )
+    )
+    return result.scalars().all()
 
 
 # ==================== DELETE SALE ====================
@@ -227,16 +314,12 @@ def delete_sale(
             detail=f"Sale not found in your business"
         )
     
-    # Restore inventory
+    # Restore inventory (to every lot the sale consumed)
     if sale.supplier_inventory_id:
-        supplier_inventory = db.query(SupplierInventory).filter(
-            SupplierInventory.id == sale.supplier_inventory_id,
-            SupplierInventory.tenant_id == tenant.id
-        ).first()
-        
-        if supplier_inventory:
-            supplier_inventory.quantity_used -= sale.quantity
-            supplier_inventory.quantity_remaining += sale.quantity
+        FifoAllocator.release(
+            db, tenant.id, sale.variety_id, "sale", sale.id, sale.quantity,
+            legacy_lot_id=sale.supplier_inventory_id
+        )
         
         variety = db.query(ClothVariety).filter(
             ClothVariety.id == sale.variety_id,
@@ -259,6 +342,9 @@ def delete_sale(
             )
             db.add(inventory_movement)
     
+    # Remove from daily rollup (same transaction)
+    SalesRollupService.remove_sale(db, sale)
+    
     db.delete(sale)
     db.commit()
     
@@ -267,23 +353,16 @@ def delete_sale(
 
 # ==================== GET DAILY SALES SUMMARY ====================
 @router.get("/daily-summary/{sale_date}", response_model=DailySalesSummary)
-def get_daily_sales_summary(
+async def get_daily_sales_summary(
     sale_date: date,
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(require_permission(Permission.VIEW_SALES)),
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.VIEW_SALES)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get sales summary for a specific date (tenant-isolated)"""
     
-    result = db.query(
-        func.sum(Sale.selling_price * Sale.quantity).label('total_sales'),
-        func.sum(Sale.profit).label('total_profit'),
-        func.sum(Sale.quantity).label('total_quantity'),
-        func.count(Sale.id).label('sales_count')
-    ).filter(
-        Sale.sale_date == sale_date,
-        Sale.tenant_id == tenant.id
-    ).first()
+    # Read pre-aggregated totals from the daily rollup
+    result = await SalesRollupService.aget_summary(db, tenant.id, sale_date, sale_date)
     
     total_sales = result.total_sales if result.total_sales else Decimal('0.00')
     total_profit = result.total_profit if result.total_profit else Decimal('0.00')
@@ -327,6 +406,9 @@ def update_sale(
             detail=f"Sale not found in your business"
         )
     
+    # Snapshot rollup contribution before any field changes
+    old_contribution = SalesRollupService.sale_contribution(sale)
+    
     # Track changes
     recalculate_profit = False
     old_cost_price = sale.cost_price
@@ -457,41 +539,62 @@ def update_sale(
     
     # 🔄 Handle quantity changes in inventory
     if quantity_changed and sale.supplier_inventory_id:
-        supplier_inventory = db.query(SupplierInventory).filter(
-            SupplierInventory.id == sale.supplier_inventory_id,
-            SupplierInventory.tenant_id == tenant.id
+        # Calculate difference
+        quantity_diff = sale.quantity - old_quantity
+        
+        variety = db.query(ClothVariety).filter(
+            ClothVariety.id == sale.variety_id,
+            ClothVariety.tenant_id == tenant.id
         ).first()
         
-        if supplier_inventory:
-            # Calculate difference
-            quantity_diff = sale.quantity - old_quantity
-            
-            # Update inventory quantities
-            supplier_inventory.quantity_used += quantity_diff
-            supplier_inventory.quantity_remaining -= quantity_diff
-            
-            # Update variety stock
-            variety = db.query(ClothVariety).filter(
-                ClothVariety.id == sale.variety_id,
-                ClothVariety.tenant_id == tenant.id
-            ).first()
-            
-            if variety:
-                variety.current_stock -= quantity_diff
-                
-                # Log inventory movement
-                inventory_movement = InventoryMovement(
-                    tenant_id=tenant.id,
-                    variety_id=sale.variety_id,
-                    movement_type='sale_adjustment',
-                    quantity=-quantity_diff,
-                    reference_id=sale.id,
-                    reference_type='sale_updated',
-                    notes=f'Sale quantity adjusted by {float(quantity_diff)} (Sale ID: {sale.id})',
-                    movement_date=date.today(),
-                    stock_after=variety.current_stock
+        if quantity_diff > 0:
+            # Sold more - take the extra from the oldest lots
+            allocations, shortfall = FifoAllocator.allocate(db, tenant.id, sale.variety_id, quantity_diff)
+            if shortfall > 0:
+                lot = FifoAllocator.create_consumed_lot(
+                    db, tenant.id, sale.variety_id, shortfall, Decimal(str(sale.cost_price)),
+                    supply_date=sale.sale_date,
+                    supplier_name="To Be Updated"
                 )
-                db.add(inventory_movement)
+                allocations.append((lot, shortfall))
+                
+                # Auto-created stock enters the ledger as a supply
+                if variety:
+                    InventoryLedger.record_movement(
+                        db, tenant.id, variety, 'supply', shortfall,
+                        reference_type='supplier_inventory',
+                        reference_id=lot.id,
+                        notes=f'Auto-created for sale {sale.id} adjustment',
+                        movement_date=lot.supply_date
+                    )
+            FifoAllocator.record(db, tenant.id, sale.variety_id, allocations, "sale", sale.id)
+        else:
+            # Sold less - give the difference back, newest lot first
+            FifoAllocator.release(
+                db, tenant.id, sale.variety_id, "sale", sale.id, -quantity_diff,
+                legacy_lot_id=sale.supplier_inventory_id
+            )
+        
+        # Update variety stock
+        if variety:
+            variety.current_stock -= quantity_diff
+            
+            # Log inventory movement
+            inventory_movement = InventoryMovement(
+                tenant_id=tenant.id,
+                variety_id=sale.variety_id,
+                movement_type='sale_adjustment',
+                quantity=-quantity_diff,
+                reference_id=sale.id,
+                reference_type='sale_updated',
+                notes=f'Sale quantity adjusted by {float(quantity_diff)} (Sale ID: {sale.id})',
+                movement_date=date.today(),
+                stock_after=variety.current_stock
+            )
+            db.add(inventory_movement)
+    
+    # Move the sale's totals to its (possibly new) rollup key
+    SalesRollupService.replace_sale(db, old_contribution, sale)
     
     db.commit()
     db.refresh(sale)
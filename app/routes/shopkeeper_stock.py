@@ -1,13 +1,13 @@
 # app/routes/shopkeeper_stock.py - FULLY UPDATED WITH MULTI-TENANCY AND RBAC
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 from datetime import date
 from decimal import Decimal
 from database import get_db
-from models import ShopkeeperStock, ShopkeeperSales, ShopkeeperReturn, ClothVariety, InventoryMovement, SupplierInventory
+from models import ShopkeeperStock, ShopkeeperSales, ShopkeeperReturn, ClothVariety, InventoryMovement
 from schemas import (
     ShopkeeperStockCreate,
     ShopkeeperStockResponse,
@@ -18,6 +18,9 @@ from schemas import (
 from routes.auth_routes import get_current_tenant
 from auth_models import Tenant, User
 from rbac import require_permission, Permission  # 🆕 RBAC IMPORTS
+from fifo_allocator import FifoAllocator
+from pagination import PageParams, keyset_paginate, page_items
+from response_cache import ResponseCache
 
 router = APIRouter(prefix="/shopkeeper-stock", tags=["Shopkeeper Stock Management"])
 
@@ -54,34 +57,20 @@ def issue_stock_to_shopkeeper(
                 detail=f"Insufficient stock! Available: {variety.current_stock}, Requested: {quantity_decimal}"
             )
     
-    # Find supplier inventory to deduct from (FIFO) - TENANT FILTERED
+    # Take the stock from supplier lots (FIFO, may span several lots) - TENANT FILTERED
     supplier_inventory_id = None
+    allocations = []
     
     if stock.deducted_from_inventory:
-        # Find oldest supplier inventory WITH TENANT FILTER
-        supplier_inventory = db.query(SupplierInventory).filter(
-            SupplierInventory.variety_id == stock.variety_id,
-            SupplierInventory.quantity_remaining > 0,
-            SupplierInventory.tenant_id == tenant.id
-        ).order_by(SupplierInventory.supply_date.asc()).first()
+        allocations, shortfall = FifoAllocator.allocate(db, tenant.id, stock.variety_id, quantity_decimal)
         
-        if not supplier_inventory:
+        if shortfall > 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No supplier inventory found with remaining stock in your business"
+                detail=f"Not enough remaining supplier inventory in your business. Available: {quantity_decimal - shortfall}, Requested: {quantity_decimal}"
             )
         
-        # Check if enough remaining from this supplier
-        if supplier_inventory.quantity_remaining < quantity_decimal:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Not enough remaining from oldest supplier inventory. Available: {supplier_inventory.quantity_remaining}, Requested: {quantity_decimal}"
-            )
-        
-        # UPDATE SUPPLIER INVENTORY
-        supplier_inventory.quantity_used += quantity_decimal
-        supplier_inventory.quantity_remaining -= quantity_decimal
-        supplier_inventory_id = supplier_inventory.id
+        supplier_inventory_id = allocations[0][0].id  # oldest lot
     
     # Create shopkeeper stock record
     db_stock = ShopkeeperStock(
@@ -104,6 +93,7 @@ def issue_stock_to_shopkeeper(
     
     # ONLY deduct from variety stock if flag is True
     if stock.deducted_from_inventory:
+        FifoAllocator.record(db, tenant.id, stock.variety_id, allocations, "shopkeeper_stock", db_stock.id)
         variety.current_stock -= quantity_decimal
         
         # Log inventory movement
@@ -128,12 +118,17 @@ def issue_stock_to_shopkeeper(
 
 @router.get("/", response_model=List[ShopkeeperStockResponse])
 def get_all_shopkeeper_stock(
+    response: Response,
     shopkeeper_name: Optional[str] = None,
+    page: PageParams = Depends(),
     tenant: Tenant = Depends(get_current_tenant),
     user: User = Depends(require_permission(Permission.VIEW_SHOPKEEPER_STOCK)),  # 🆕 RBAC CHECK
     db: Session = Depends(get_db)
 ):
-    """Get all shopkeeper stock records (tenant-isolated), optionally filtered by shopkeeper name, requires VIEW_SHOPKEEPER_STOCK permission"""
+    """
+    Get all shopkeeper stock records (tenant-isolated), optionally filtered by shopkeeper name, requires VIEW_SHOPKEEPER_STOCK permission
+    Newest first, one page of ?limit= at a time (next cursor in X-Next-Cursor)
+    """
     
     # Start with tenant filter
     query = db.query(ShopkeeperStock).filter(
@@ -145,8 +140,8 @@ def get_all_shopkeeper_stock(
             func.lower(ShopkeeperStock.shopkeeper_name).like(f"%{shopkeeper_name.lower()}%")
         )
     
-    stocks = query.order_by(ShopkeeperStock.issue_date.desc()).all()
-    return stocks
+    query = keyset_paginate(query, ShopkeeperStock.issue_date, ShopkeeperStock.id, page)
+    return page_items(query.all(), "issue_date", page, response)
 
 
 @router.get("/{stock_id}", response_model=ShopkeeperStockResponse)
@@ -275,17 +270,12 @@ def record_shopkeeper_return(
     stock.quantity_returned += quantity_decimal
     stock.quantity_remaining -= quantity_decimal
     
-    # Restore supplier inventory if it was deducted (WITH TENANT CHECK)
+    # Restore supplier inventory if it was deducted (WITH TENANT CHECK) - newest lot first
     if stock.deducted_from_inventory and stock.supplier_inventory_id:
-        # Verify supplier inventory belongs to same tenant
-        supplier_inventory = db.query(SupplierInventory).filter(
-            SupplierInventory.id == stock.supplier_inventory_id,
-            SupplierInventory.tenant_id == tenant.id
-        ).first()
-        
-        if supplier_inventory:
-            supplier_inventory.quantity_used -= quantity_decimal
-            supplier_inventory.quantity_remaining += quantity_decimal
+        FifoAllocator.release(
+            db, tenant.id, stock.variety_id, "shopkeeper_stock", stock.id, quantity_decimal,
+            legacy_lot_id=stock.supplier_inventory_id
+        )
     
     # Restore variety stock if it was deducted
     if stock.deducted_from_inventory:
@@ -319,6 +309,7 @@ def record_shopkeeper_return(
 
 
 @router.get("/summary/by-shopkeeper")
+@ResponseCache.cached("shopkeeper-stock.summary-by-shopkeeper", domains=("shopkeeper_stock",))
 def get_shopkeeper_summary(
     tenant: Tenant = Depends(get_current_tenant),
     user: User = Depends(require_permission(Permission.VIEW_SHOPKEEPER_STOCK)),  # 🆕 RBAC CHECK
@@ -384,15 +375,11 @@ def delete_shopkeeper_stock(
     
     # Restore supplier inventory if applicable (WITH TENANT CHECK)
     if stock.deducted_from_inventory and stock.supplier_inventory_id and restore_quantity > 0:
-        supplier_inventory = db.query(SupplierInventory).filter(
-            SupplierInventory.id == stock.supplier_inventory_id,
-            SupplierInventory.tenant_id == tenant.id
-        ).first()
-        
-        if supplier_inventory:
-            # Restore full issued quantity
-            supplier_inventory.quantity_used -= restore_quantity
-            supplier_inventory.quantity_remaining += restore_quantity
+        # Restore full issued quantity to the lots it came from
+        FifoAllocator.release(
+            db, tenant.id, stock.variety_id, "shopkeeper_stock", stock.id, restore_quantity,
+            legacy_lot_id=stock.supplier_inventory_id
+        )
     
     # Restore variety stock if applicable
     if stock.deducted_from_inventory and restore_quantity > 0:
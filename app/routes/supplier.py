@@ -1,9 +1,9 @@
 # app/routes/supplier.py - UPDATED WITH MULTI-TENANCY AND RBAC
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 from datetime import date
 from decimal import Decimal
 from database import get_db
@@ -16,6 +16,8 @@ from schemas import (
 from routes.auth_routes import get_current_tenant
 from auth_models import Tenant, User
 from rbac import require_permission, Permission  # 🆕 RBAC IMPORTS
+from pagination import PageParams, keyset_paginate, page_items
+from response_cache import ResponseCache
 
 router = APIRouter(prefix="/supplier", tags=["Supplier Management"])
 
@@ -87,17 +89,61 @@ def add_supplier_inventory(
 
 @router.get("/inventory", response_model=List[SupplierInventoryResponse])
 def get_all_inventory(
+    response: Response,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    page: PageParams = Depends(),
     tenant: Tenant = Depends(get_current_tenant),
     user: User = Depends(require_permission(Permission.VIEW_INVENTORY)),  # 🆕 RBAC CHECK
     db: Session = Depends(get_db)
 ):
-    """Get all supplier inventory records (tenant-isolated, requires VIEW_INVENTORY permission)"""
+    """
+    Get all supplier inventory records (tenant-isolated, requires VIEW_INVENTORY permission)
+    Newest supply first, one page of ?limit= at a time (next cursor in X-Next-Cursor)
+    Optionally only supplies dated start_date..end_date (inclusive)
+    """
     
-    inventories = db.query(SupplierInventory).filter(
+    query = db.query(SupplierInventory).filter(
         SupplierInventory.tenant_id == tenant.id
-    ).all()
+    )
     
-    return inventories
+    if start_date:
+        query = query.filter(SupplierInventory.supply_date >= start_date)
+    if end_date:
+        query = query.filter(SupplierInventory.supply_date <= end_date)
+    
+    query = keyset_paginate(query, SupplierInventory.supply_date, SupplierInventory.id, page)
+    return page_items(query.all(), "supply_date", page, response)
+
+
+@router.get("/inventory/totals")
+@ResponseCache.cached("supplier.inventory-totals", domains=("inventory",))
+def get_inventory_totals(
+    tenant: Tenant = Depends(get_current_tenant),
+    user: User = Depends(require_permission(Permission.VIEW_INVENTORY)),
+    db: Session = Depends(get_db)
+):
+    """All-time supplied / used / returned / remaining quantities and value (tenant-isolated)"""
+    
+    totals = db.query(
+        func.count(SupplierInventory.id).label('records'),
+        func.sum(SupplierInventory.quantity).label('quantity'),
+        func.sum(SupplierInventory.quantity_used).label('used'),
+        func.sum(SupplierInventory.quantity_returned).label('returned'),
+        func.sum(SupplierInventory.quantity_remaining).label('remaining'),
+        func.sum(SupplierInventory.total_amount).label('value')
+    ).filter(
+        SupplierInventory.tenant_id == tenant.id
+    ).one()
+    
+    return {
+        "total_records": totals.records,
+        "total_quantity": float(totals.quantity or 0),
+        "total_used": float(totals.used or 0),
+        "total_returned": float(totals.returned or 0),
+        "total_remaining": float(totals.remaining or 0),
+        "total_value": float(totals.value or 0)
+    }
 
 
 @router.get("/inventory/date/{supply_date}", response_model=List[SupplierInventoryResponse])
@@ -270,17 +316,31 @@ def add_supplier_return(
 
 @router.get("/returns", response_model=List[SupplierReturnResponse])
 def get_all_returns(
+    response: Response,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    page: PageParams = Depends(),
     tenant: Tenant = Depends(get_current_tenant),
     user: User = Depends(require_permission(Permission.VIEW_RETURNS)),  # 🆕 RBAC CHECK
     db: Session = Depends(get_db)
 ):
-    """Get all supplier return records (tenant-isolated, requires VIEW_RETURNS permission)"""
+    """
+    Get all supplier return records (tenant-isolated, requires VIEW_RETURNS permission)
+    Newest return first, one page of ?limit= at a time (next cursor in X-Next-Cursor)
+    Optionally only returns dated start_date..end_date (inclusive)
+    """
     
-    returns = db.query(SupplierReturn).filter(
+    query = db.query(SupplierReturn).filter(
         SupplierReturn.tenant_id == tenant.id
-    ).all()
+    )
     
-    return returns
+    if start_date:
+        query = query.filter(SupplierReturn.return_date >= start_date)
+    if end_date:
+        query = query.filter(SupplierReturn.return_date <= end_date)
+    
+    query = keyset_paginate(query, SupplierReturn.return_date, SupplierReturn.id, page)
+    return page_items(query.all(), "return_date", page, response)
 
 
 @router.get("/returns/date/{return_date}", response_model=List[SupplierReturnResponse])
@@ -7,6 +7,7 @@ from database import get_db
 from auth_models import User, Tenant
 from auth_schemas import UserCreate, UserResponse, UserUpdate, MessageResponse
 from routes.auth_routes import get_current_user, get_current_tenant
+from principal_cache import PrincipalCache
 from rbac import (
     require_owner, 
     check_user_limit, 
@@ -144,6 +145,7 @@ def update_team_member(
         setattr(target_user, field, value)
     
     db.commit()
+    PrincipalCache.invalidate_user(target_user.id)
     db.refresh(target_user)
     
     return target_user
@@ -183,6 +185,7 @@ def deactivate_team_member(
     
     target_user.is_active = False
     db.commit()
+    PrincipalCache.invalidate_user(target_user.id)
     
     return MessageResponse(
         message=f"User {target_user.full_name} deactivated successfully",
@@ -224,6 +227,7 @@ def reactivate_team_member(
     
     target_user.is_active = True
     db.commit()
+    PrincipalCache.invalidate_user(target_user.id)
     
     return MessageResponse(
         message=f"User {target_user.full_name} reactivated successfully",
@@ -265,6 +269,7 @@ def delete_team_member(
     
     db.delete(target_user)
     db.commit()
+    PrincipalCache.invalidate_user(user_id)
     
     return None
 
@@ -306,6 +311,7 @@ def reset_user_password(
     target_user.account_locked_until = None
     
     db.commit()
+    PrincipalCache.invalidate_user(target_user.id)
     
     return MessageResponse(
         message=f"Password reset successfully for {target_user.full_name}",
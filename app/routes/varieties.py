@@ -1,14 +1,18 @@
 # app/routes/varieties.py - UPDATED WITH MULTI-TENANCY AND RBAC
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import List
-from database import get_db
+from database import get_db, get_async_db
 from models import ClothVariety, MeasurementUnit
 from schemas import ClothVarietyCreate, ClothVarietyResponse, ClothVarietyUpdate
-from routes.auth_routes import get_current_tenant
+from routes.auth_routes import get_current_tenant, get_current_tenant_async
 from auth_models import Tenant, User  # 🆕 ADDED User
-from rbac import require_permission, Permission  # 🆕 NEW RBAC
+from rbac import require_permission, require_permission_async, Permission  # 🆕 NEW RBAC
+from pagination import PageParams, keyset_paginate, page_items
+from conditional_get import ConditionalGet
 
 router = APIRouter(prefix="/varieties", tags=["Cloth Varieties"])
 
@@ -45,33 +49,44 @@ def create_variety(
 
 
 @router.get("/", response_model=List[ClothVarietyResponse])
-def get_all_varieties(
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(require_permission(Permission.VIEW_VARIETIES)),  # 🆕 RBAC - OWNER & SALESPERSON
-    db: Session = Depends(get_db)
+async def get_all_varieties(
+    response: Response,
+    page: PageParams = Depends(),
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.VIEW_VARIETIES)),  # 🆕 RBAC - OWNER & SALESPERSON
+    etag: None = Depends(ConditionalGet("inventory")),  # 304 if unchanged
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all cloth varieties (only for current tenant, requires VIEW_VARIETIES - OWNER & SALESPERSON)"""
+    """
+    Get all cloth varieties (only for current tenant, requires VIEW_VARIETIES - OWNER & SALESPERSON)
+    Newest first by id, one page of ?limit= at a time (next cursor in X-Next-Cursor)
+    """
     
-    varieties = db.query(ClothVariety).filter(
-        ClothVariety.tenant_id == tenant.id
-    ).all()
+    statement = select(ClothVariety).where(ClothVariety.tenant_id == tenant.id)
     
-    return varieties
+    # created_at is nullable - page on the primary key alone
+    statement = keyset_paginate(statement, ClothVariety.id, ClothVariety.id, page)
+    result = await db.execute(statement)
+    return page_items(result.scalars().all(), "id", page, response)
 
 
 @router.get("/{variety_id}", response_model=ClothVarietyResponse)
-def get_variety(
+async def get_variety(
     variety_id: int,
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(require_permission(Permission.VIEW_VARIETIES)),  # 🆕 RBAC - OWNER & SALESPERSON
-    db: Session = Depends(get_db)
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.VIEW_VARIETIES)),  # 🆕 RBAC - OWNER & SALESPERSON
+    etag: None = Depends(ConditionalGet("inventory")),  # 304 if unchanged
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific cloth variety by ID (tenant-isolated, requires VIEW_VARIETIES - OWNER & SALESPERSON)"""
     
-    variety = db.query(ClothVariety).filter(
-        ClothVariety.id == variety_id,
-        ClothVariety.tenant_id == tenant.id
-    ).first()
+    result = await db.execute(
+        select(ClothVariety).where(
+            ClothVariety.id == variety_id,
+            ClothVariety.tenant_id == tenant.id
+        )
+    )
+    variety = result.scalars().first()
     
     if not variety:
         raise HTTPException(
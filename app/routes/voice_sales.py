@@ -1,29 +1,29 @@
 # app/routes/voice_sales.py - SMART AUTO-CREATION VERSION (NO STOCK TYPE)
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Dict, Optional, Literal
 from decimal import Decimal
 from datetime import date
 import os
+import importlib.util
 import requests
 from dotenv import load_dotenv
 load_dotenv()
 
-# Import AI models with structured output
-try:
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_google_genai import ChatGoogleGenerativeAI
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+# Structured-output model comes from the shared LLM client registry
+from llm_clients import LLMClients, LLM_BACKEND, LLMTimeoutError, LLMCancelledError
+GEMINI_AVAILABLE = importlib.util.find_spec("langchain_google_genai") is not None
 
-from database import get_db
-from models import ClothVariety, Sale, SupplierInventory, InventoryMovement, MeasurementUnit
+from database import get_db, get_async_db
+from models import ClothVariety, SupplierInventory, MeasurementUnit
 from auth_models import Tenant, User
-from routes.auth_routes import get_current_tenant, get_current_user
-from rbac import require_permission, Permission
+from routes.auth_routes import get_current_tenant, get_current_tenant_async, get_current_user
+from rbac import require_permission, require_permission_async, Permission
+from sale_service import SaleService
 
 router = APIRouter(prefix="/sales/voice", tags=["Voice Sales"])
 
@@ -161,9 +161,10 @@ async def transcribe_audio(
 @router.post("/validate", response_model=VoiceValidationResponse)
 async def validate_voice_command(
     request: VoiceValidationRequest,
-    tenant: Tenant = Depends(get_current_tenant),
-    user: User = Depends(require_permission(Permission.ADD_SALES)),
-    db: Session = Depends(get_db)
+    http_request: Request,
+    tenant: Tenant = Depends(get_current_tenant_async),
+    user: User = Depends(require_permission_async(Permission.ADD_SALES)),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Validate voice command using AI
@@ -171,16 +172,17 @@ async def validate_voice_command(
     ROBUST: Handles missing cost price gracefully
     """
     
-    if not GEMINI_AVAILABLE:
+    if not GEMINI_AVAILABLE and LLM_BACKEND != "fake":
         raise HTTPException(
             status_code=500,
             detail="Gemini AI not available. Install langchain-google-genai"
         )
     
     # Get all varieties for this tenant
-    varieties = db.query(ClothVariety).filter(
-        ClothVariety.tenant_id == tenant.id
-    ).all()
+    result = await db.execute(
+        select(ClothVariety).where(ClothVariety.tenant_id == tenant.id)
+    )
+    varieties = result.scalars().all()
     
     # Build variety context for AI
     variety_context = "Available cloth varieties:\n"
@@ -277,22 +279,16 @@ User command: "{request.transcript}"
 """
 
     try:
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
+        # Shared structured-output model (built once per process)
+        structured_model = LLMClients.structured("voice", VoiceSaleData)
+        if structured_model is None:
             raise HTTPException(
                 status_code=500,
                 detail="GOOGLE_API_KEY not configured"
             )
         
-        # Use structured output
-        model = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            api_key=api_key,
-            temperature=0.1
-        )
-        
-        structured_model = model.with_structured_output(VoiceSaleData)
-        result = structured_model.invoke(system_prompt)
+        # Awaited (not blocking the event loop), with timeout / concurrency limit / disconnect cancel
+        result = await LLMClients.ainvoke(structured_model, system_prompt, request=http_request)
         
         if not result.success:
             return VoiceValidationResponse(
@@ -301,10 +297,12 @@ User command: "{request.transcript}"
             )
         
         # ========== VARIETY CHECK ==========
-        variety = db.query(ClothVariety).filter(
-            ClothVariety.tenant_id == tenant.id,
-            ClothVariety.name.ilike(result.variety_name)
-        ).first()
+        variety = (await db.execute(
+            select(ClothVariety).where(
+                ClothVariety.tenant_id == tenant.id,
+                ClothVariety.name.ilike(result.variety_name)
+            )
+        )).scalars().first()
         
         is_new_variety = variety is None
         
@@ -327,11 +325,13 @@ User command: "{request.transcript}"
             
             # FALLBACK 1: Latest inventory (FIFO)
             if variety:
-                latest_inventory = db.query(SupplierInventory).filter(
-                    SupplierInventory.variety_id == variety.id,
-                    SupplierInventory.quantity_remaining > 0,
-                    SupplierInventory.tenant_id == tenant.id
-                ).order_by(SupplierInventory.supply_date.desc()).first()
+                latest_inventory = (await db.execute(
+                    select(SupplierInventory).where(
+                        SupplierInventory.variety_id == variety.id,
+                        SupplierInventory.quantity_remaining > 0,
+                        SupplierInventory.tenant_id == tenant.id
+                    ).order_by(SupplierInventory.supply_date.desc()).limit(1)
+                )).scalars().first()
                 
                 if latest_inventory:
                     cost_per_unit = Decimal(str(latest_inventory.price_per_item))
@@ -401,6 +401,15 @@ User command: "{request.transcript}"
             cost_source=cost_source
         )
         
+    except LLMTimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="AI took too long to understand the command. Please try again."
+        )
+    
+    except LLMCancelledError:
+        raise  # client is gone - nothing to answer
+        
     except Exception as e:
         error_msg = str(e)
         
@@ -463,98 +472,25 @@ async def record_voice_sale(
         variety_created = True
         print(f"✅ Variety created with ID: {variety.id}")
     
-    # ========== STEP 2: Calculate Sale Values ==========
-    quantity = Decimal(str(sale_data['quantity']))
-    total_cost = Decimal(str(sale_data['cost_price']))
-    total_selling = Decimal(str(sale_data['selling_price']))
-    
-    cost_per_unit = total_cost / quantity
-    selling_per_unit = total_selling / quantity
-    profit_per_unit = selling_per_unit - cost_per_unit
-    total_profit = profit_per_unit * quantity
-    
-    # ========== STEP 3: Handle Inventory (Auto-create if needed) ==========
-    supplier_inventory_id = None
-    inventory_created = False
-    
-    # Check for existing inventory
-    existing_inventory = db.query(SupplierInventory).filter(
-        SupplierInventory.variety_id == variety.id,
-        SupplierInventory.quantity_remaining >= quantity,
-        SupplierInventory.tenant_id == tenant.id
-    ).order_by(SupplierInventory.supply_date.asc()).first()
-    
-    if existing_inventory:
-        supplier_inventory = existing_inventory
-        print(f"✅ Voice: Using existing inventory ID: {supplier_inventory.id}")
-    else:
-        # AUTO-CREATE INVENTORY
-        print(f"📦 Voice: Auto-creating inventory")
-        
-        supplier_inventory = SupplierInventory(
-            tenant_id=tenant.id,
-            supplier_name="Voice Sale (To Be Updated)",
-            variety_id=variety.id,
-            quantity=quantity,
-            price_per_item=cost_per_unit,
-            total_amount=total_cost,
-            supply_date=date.today(),
-            quantity_used=Decimal('0'),
-            quantity_remaining=quantity,
-            quantity_returned=Decimal('0')
-        )
-        
-        db.add(supplier_inventory)
-        db.flush()
-        inventory_created = True
-        print(f"✅ Inventory created with ID: {supplier_inventory.id}")
-    
-    # Deduct from inventory
-    supplier_inventory.quantity_used += quantity
-    supplier_inventory.quantity_remaining -= quantity
-    supplier_inventory_id = supplier_inventory.id
-    
-    # Update variety stock
-    variety.current_stock += quantity
-    variety.current_stock -= quantity
-    
-    # Log inventory movement
-    inventory_movement = InventoryMovement(
-        tenant_id=tenant.id,
-        variety_id=variety.id,
-        movement_type='sale',
-        quantity=-quantity,
-        reference_type='voice_sale',
-        notes=f'Voice sale by {user.full_name}',
-        movement_date=date.today(),
-        stock_after=variety.current_stock
-    )
-    db.add(inventory_movement)
-    
-    # ========== STEP 4: Create Sale Record ==========
-    db_sale = Sale(
-        tenant_id=tenant.id,
+    # ========== STEP 2: Allocate inventory, record sale (one transaction, one commit) ==========
+    recorded = SaleService.record_sale(
+        db, tenant.id, variety,
+        quantity=Decimal(str(sale_data['quantity'])),
+        total_cost=Decimal(str(sale_data['cost_price'])),
+        total_selling=Decimal(str(sale_data['selling_price'])),
         salesperson_name=user.full_name,
-        variety_id=variety.id,
-        quantity=quantity,
-        selling_price=selling_per_unit,
-        cost_price=cost_per_unit,
-        profit=total_profit,
         sale_date=date.today(),
         payment_status=sale_data['payment_status'],
         customer_name=sale_data.get('customer_name'),
-        supplier_inventory_id=supplier_inventory_id
+        auto_supplier_name="Voice Sale (To Be Updated)",
+        movement_reference_type='voice_sale',
+        movement_notes=f'Voice sale by {user.full_name}'
     )
+    sale_id = recorded["sale_id"]
+    total_profit = recorded["profit"]
+    inventory_created = recorded["inventory_created"]
     
-    db.add(db_sale)
-    db.commit()
-    db.refresh(db_sale)
-    
-    # Update movement reference
-    inventory_movement.reference_id = db_sale.id
-    db.commit()
-    
-    print(f"✅ Voice sale recorded with ID: {db_sale.id}")
+    print(f"✅ Voice sale recorded with ID: {sale_id}")
     
     # Build response message
     message = "Voice sale recorded successfully! 🎉"
@@ -566,7 +502,7 @@ async def record_voice_sale(
     return {
         "success": True,
         "message": message,
-        "sale_id": db_sale.id,
+        "sale_id": sale_id,
         "total_profit": float(total_profit),
         "variety_created": variety_created,
         "inventory_created": inventory_created,
@@ -0,0 +1,119 @@
+# app/sale_service.py - Single-transaction write path for one sale
+
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from models import Sale, ClothVariety, PaymentStatus
+from sales_rollup import SalesRollupService
+from fifo_allocator import FifoAllocator
+from inventory_ledger import InventoryLedger
+
+
+class SaleService:
+    """
+    Records a sale as one unit of work: lot allocation, sale row, rollup, allocation rows
+    and the inventory movement are written in a single transaction with ONE commit.
+
+    The sale row is flushed first to get its id, so the movement is created afterwards
+    with reference_id already set - it is inserted once, never updated.
+    Stock drawn from existing lots lowers the variety's current_stock; stock that had to
+    be auto-created is booked as a supply first, so the ledger always sums to current_stock.
+    """
+
+    @staticmethod
+    def record_sale(
+        db: Session,
+        tenant_id: int,
+        variety: ClothVariety,
+        quantity: Decimal,
+        total_cost: Decimal,
+        total_selling: Decimal,
+        salesperson_name: str,
+        sale_date: date,
+        payment_status: PaymentStatus = PaymentStatus.PAID,
+        customer_name: Optional[str] = None,
+        auto_supplier_name: str = "To Be Updated",
+        auto_supply_date: Optional[date] = None,
+        movement_reference_type: str = "sale",
+        movement_notes: str = "",
+        movement_date: Optional[date] = None
+    ) -> Dict:
+        """
+        Allocate stock, write the sale and everything that hangs off it, commit once
+        Returns {"sale", "sale_id", "profit", "allocations", "inventory_created"}
+        (sale_id is read before the commit expires the sale, so using it costs no SELECT)
+        """
+        quantity = Decimal(str(quantity))
+        cost_per_unit = Decimal(str(total_cost)) / quantity
+        selling_per_unit = Decimal(str(total_selling)) / quantity
+        total_profit = (selling_per_unit - cost_per_unit) * quantity
+
+        # ========== Allocate Inventory (FIFO across lots) ==========
+        # Locks the variety row first and refreshes `variety`: concurrent sales of this
+        # variety queue here, so the current_stock updates below never lose one another
+        allocations, shortfall = FifoAllocator.allocate(db, tenant_id, variety.id, quantity)
+
+        if shortfall > 0:
+            # Stock sold that was never recorded as supplied - auto-create a lot for the rest
+            print(f"📦 Auto-creating inventory for {shortfall}")
+            lot = FifoAllocator.create_consumed_lot(
+                db, tenant_id, variety.id, shortfall, cost_per_unit,
+                supply_date=auto_supply_date or sale_date,
+                supplier_name=auto_supplier_name
+            )
+            allocations.append((lot, shortfall))
+            print(f"✅ Inventory created with ID: {lot.id}")
+
+            # The auto-created stock enters the ledger like any supply
+            InventoryLedger.record_movement(
+                db, tenant_id, variety, 'supply', shortfall,
+                reference_type='supplier_inventory',
+                reference_id=lot.id,
+                notes=f'Auto-created for sale by {salesperson_name}',
+                movement_date=lot.supply_date
+            )
+
+        print(f"✅ Allocated from inventory IDs: {[lot.id for lot, _ in allocations]}")
+
+        # ========== Sale Record ==========
+        db_sale = Sale(
+            tenant_id=tenant_id,
+            salesperson_name=salesperson_name,
+            variety_id=variety.id,
+            quantity=quantity,
+            selling_price=selling_per_unit,
+            cost_price=cost_per_unit,
+            profit=total_profit,
+            sale_date=sale_date,
+            supplier_inventory_id=allocations[0][0].id,  # oldest lot
+            payment_status=payment_status,
+            customer_name=customer_name
+        )
+        db.add(db_sale)
+        db.flush()  # assigns db_sale.id for the allocation and movement rows
+
+        # Keep daily rollup in sync
+        SalesRollupService.add_sale(db, db_sale)
+
+        # ========== Cross-references (inserted with the commit, no follow-up UPDATE) ==========
+        FifoAllocator.record(db, tenant_id, variety.id, allocations, "sale", db_sale.id)
+
+        InventoryLedger.record_movement(
+            db, tenant_id, variety, 'sale', -quantity,
+            reference_type=movement_reference_type,
+            reference_id=db_sale.id,
+            notes=movement_notes,
+            movement_date=movement_date or sale_date
+        )
+
+        sale_id = db_sale.id
+        db.commit()
+
+        return {
+            "sale": db_sale,
+            "sale_id": sale_id,
+            "profit": total_profit,
+            "allocations": allocations,
+            "inventory_created": shortfall > 0
+        }
@@ -0,0 +1,166 @@
+# app/sale_write_benchmark.py - Statements, commits and latency per recorded sale
+#
+# Usage (from app/, against the configured DATABASE_URL):
+#   python sale_write_benchmark.py                 # 200 sales per path
+#   python sale_write_benchmark.py --sales 1000
+#
+# Compares the previous create_sale write path (commit, refresh, backfill the movement
+# reference, commit again) with SaleService.record_sale (one commit). Runs on a
+# throwaway tenant that is deleted afterwards.
+
+import time
+import statistics
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict
+from sqlalchemy import event
+from database import SessionLocal, engine, init_db
+from models import Sale, ClothVariety, SupplierInventory, InventoryMovement, InventoryAllocation, DailySalesRollup
+from sales_rollup import SalesRollupService
+from sale_service import SaleService
+from fifo_stress import create_fixture, cleanup
+
+
+class StatementCounter:
+    """Counts SQL statements and commits issued through an engine (the sync one by default)"""
+
+    def __init__(self, target=engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(target, "before_cursor_execute", self._on_execute)
+        event.listen(target, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+
+# ==================== REFERENCE (PREVIOUS) WRITE PATH ====================
+
+def legacy_record_sale(db, tenant_id: int, variety: ClothVariety, quantity: Decimal,
+                       total_cost: Decimal, total_selling: Decimal, salesperson_name: str, sale_date: date):
+    cost_per_unit = total_cost / quantity
+    selling_per_unit = total_selling / quantity
+
+    supplier_inventory = db.query(SupplierInventory).filter(
+        SupplierInventory.variety_id == variety.id,
+        SupplierInventory.quantity_remaining >= quantity,
+        SupplierInventory.tenant_id == tenant_id
+    ).order_by(SupplierInventory.supply_date.asc()).first()
+
+    if not supplier_inventory:
+        supplier_inventory = SupplierInventory(
+            tenant_id=tenant_id, supplier_name="To Be Updated", variety_id=variety.id,
+            quantity=quantity, price_per_item=cost_per_unit, total_amount=total_cost,
+            supply_date=sale_date, quantity_used=Decimal('0'), quantity_remaining=quantity,
+            quantity_returned=Decimal('0')
+        )
+        db.add(supplier_inventory)
+        db.flush()
+
+    supplier_inventory.quantity_used += quantity
+    supplier_inventory.quantity_remaining -= quantity
+
+    inventory_movement = InventoryMovement(
+        tenant_id=tenant_id, variety_id=variety.id, movement_type='sale', quantity=-quantity,
+        reference_type='sale', notes='benchmark', movement_date=sale_date,
+        stock_after=variety.current_stock
+    )
+    db.add(inventory_movement)
+
+    db_sale = Sale(
+        tenant_id=tenant_id, salesperson_name=salesperson_name, variety_id=variety.id,
+        quantity=quantity, selling_price=selling_per_unit, cost_price=cost_per_unit,
+        profit=(selling_per_unit - cost_per_unit) * quantity, sale_date=sale_date,
+        supplier_inventory_id=supplier_inventory.id
+    )
+    db.add(db_sale)
+    SalesRollupService.add_sale(db, db_sale)
+
+    db.commit()
+    db.refresh(db_sale)
+
+    inventory_movement.reference_id = db_sale.id
+    db.commit()
+    return db_sale.id
+
+
+def new_record_sale(db, tenant_id: int, variety: ClothVariety, quantity: Decimal,
+                    total_cost: Decimal, total_selling: Decimal, salesperson_name: str, sale_date: date):
+    recorded = SaleService.record_sale(
+        db, tenant_id, variety, quantity=quantity, total_cost=total_cost, total_selling=total_selling,
+        salesperson_name=salesperson_name, sale_date=sale_date, movement_notes='benchmark'
+    )
+    return recorded["sale_id"]
+
+
+# ==================== HELPERS ====================
+
+def run_path(record: Callable, counter: StatementCounter, tenant_id: int, variety_id: int, sales: int) -> Dict:
+    """Record `sales` sales, one session each (like one request each)"""
+    latencies, statements, commits = [], [], []
+
+    for n in range(sales):
+        db = SessionLocal()
+        try:
+            before_statements, before_commits = counter.statements, counter.commits
+            started = time.perf_counter()
+
+            variety = db.query(ClothVariety).filter(
+                ClothVariety.id == variety_id, ClothVariety.tenant_id == tenant_id
+            ).first()
+            record(db, tenant_id, variety, Decimal('2'), Decimal('200'), Decimal('300'),
+                   f"bench-{n % 5}", date.today())
+
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter.statements - before_statements)
+            commits.append(counter.commits - before_commits)
+        finally:
+            db.close()
+
+    latencies.sort()
+    return {
+        "statements": statistics.mean(statements),
+        "commits": statistics.mean(commits),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    }
+
+
+def cleanup_sales(tenant_id: int):
+    """Sales / rollup / movement rows are not covered by fifo_stress.cleanup"""
+    db = SessionLocal()
+    try:
+        for model in (InventoryAllocation, InventoryMovement, DailySalesRollup, Sale):
+            db.query(model).filter(model.tenant_id == tenant_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-sale statement count and latency, old vs new write path")
+    parser.add_argument("--sales", type=int, default=200, help="Sales recorded per path")
+    args = parser.parse_args()
+
+    init_db()
+    counter = StatementCounter()
+    # Plenty of stock so neither path auto-creates lots
+    tenant_id, variety_id = create_fixture(lots=10, lot_quantity=Decimal(args.sales * 2))
+
+    try:
+        results = {
+            "before (2 commits)": run_path(legacy_record_sale, counter, tenant_id, variety_id, args.sales),
+            "after (SaleService)": run_path(new_record_sale, counter, tenant_id, variety_id, args.sales),
+        }
+    finally:
+        cleanup_sales(tenant_id)
+        cleanup(tenant_id)
+
+    print(f"{'path':<22} {'statements':>11} {'commits':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, row in results.items():
+        print(f"{name:<22} {row['statements']:>11.1f} {row['commits']:>8.1f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}")
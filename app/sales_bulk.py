@@ -0,0 +1,323 @@
+# app/sales_bulk.py - Batch sale ingestion (end-of-day uploads)
+
+import os
+from decimal import Decimal
+from typing import Dict, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import func, insert, or_
+from sqlalchemy.orm import Session
+from models import Sale, ClothVariety, SupplierInventory, InventoryMovement, InventoryAllocation, MeasurementUnit
+from schemas import SaleCreate
+from sales_rollup import SalesRollupService
+from inventory_ledger import InventoryLedger
+from data_versions import DataVersions
+
+
+BULK_SALES_MAX_ROWS = int(os.getenv("BULK_SALES_MAX_ROWS", "1000"))
+
+
+class BulkSaleService:
+    """
+    Records a whole batch of sales with set-based DB work instead of per-sale round trips.
+
+    Same rules as POST /sales/ for every row (auto-created varieties, FIFO across lots,
+    inventory auto-created only for uncovered stock), but:
+    - varieties are resolved with ONE query (by id, or case-insensitive name), then locked
+      in id order with ONE query - before any lot, like FifoAllocator, so concurrent
+      single sales and uploads queue instead of losing current_stock updates or deadlocking
+    - open inventory lots are loaded and locked with ONE query, then allocated in memory
+    - sales, movements and allocations are each written with ONE multi-row INSERT, all in
+      one transaction with one commit
+    - a bad row is reported by index instead of failing the whole upload
+    """
+
+    @staticmethod
+    def validate_rows(rows: List[Dict]) -> Tuple[List[Tuple[int, SaleCreate]], List[Dict]]:
+        """Parse each row as a SaleCreate; returns ([(index, sale)], [errors])"""
+        valid, errors = [], []
+        for index, row in enumerate(rows):
+            try:
+                valid.append((index, SaleCreate.model_validate(row)))
+            except ValidationError as e:
+                messages = [
+                    f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+                    for err in e.errors()
+                ]
+                errors.append({"index": index, "detail": "; ".join(messages)})
+        return valid, errors
+
+    @staticmethod
+    def resolve_varieties(
+        db: Session,
+        tenant_id: int,
+        sales: List[Tuple[int, SaleCreate]]
+    ) -> Tuple[Dict[int, ClothVariety], List[Dict]]:
+        """
+        Map row index -> variety for every row, creating varieties named in the batch that
+        don't exist yet (once per distinct name). Rows with neither are reported as errors.
+        """
+        ids = {sale.variety_id for _, sale in sales if sale.variety_id}
+        names = {sale.variety_name.strip().lower() for _, sale in sales if sale.variety_name}
+
+        conditions = []
+        if ids:
+            conditions.append(ClothVariety.id.in_(ids))
+        if names:
+            conditions.append(func.lower(ClothVariety.name).in_(names))
+
+        by_id: Dict[int, ClothVariety] = {}
+        by_name: Dict[str, ClothVariety] = {}
+        if conditions:
+            existing = db.query(ClothVariety).filter(
+                ClothVariety.tenant_id == tenant_id,
+                or_(*conditions)
+            ).order_by(ClothVariety.id.asc()).all()
+
+            for variety in existing:
+                by_id[variety.id] = variety
+                by_name.setdefault(variety.name.strip().lower(), variety)
+
+        resolved, errors, created = {}, [], []
+        for index, sale in sales:
+            variety = by_id.get(sale.variety_id) if sale.variety_id else None
+
+            if not variety and sale.variety_name:
+                key = sale.variety_name.strip().lower()
+                variety = by_name.get(key)
+
+                if not variety:
+                    quantity = Decimal(str(sale.quantity))
+                    variety = ClothVariety(
+                        tenant_id=tenant_id,
+                        name=sale.variety_name.strip(),
+                        measurement_unit=MeasurementUnit.PIECES,
+                        description=None,
+                        default_cost_price=Decimal(str(sale.cost_price)) / quantity,
+                        current_stock=Decimal('0'),
+                        min_stock_level=None
+                    )
+                    by_name[key] = variety
+                    created.append(variety)
+
+            if not variety:
+                errors.append({
+                    "index": index,
+                    "detail": "Variety not found. Please provide variety_id or variety_name"
+                })
+                continue
+
+            resolved[index] = variety
+
+        if created:
+            db.add_all(created)
+            db.flush()  # ids for the sale / inventory rows
+            print(f"📦 Auto-created {len(created)} varieties")
+
+        return resolved, errors
+
+    @staticmethod
+    def lock_varieties(db: Session, tenant_id: int, variety_ids):
+        """SELECT ... FOR UPDATE the batch's varieties in id order, refreshing their current_stock"""
+        if not variety_ids:
+            return
+        db.query(ClothVariety).filter(
+            ClothVariety.tenant_id == tenant_id,
+            ClothVariety.id.in_(sorted(variety_ids))
+        ).order_by(ClothVariety.id.asc()).with_for_update().populate_existing().all()
+
+    @staticmethod
+    def insert_sales(db: Session, rows: List[Dict]) -> List[int]:
+        """
+        INSERT the sale rows with one statement and return their ids in row order
+        With RETURNING (PostgreSQL, SQLite, MariaDB) the ids come back with the insert.
+        MySQL has none: a multi-row INSERT is a "simple insert", for which InnoDB reserves
+        one consecutive block of auto-increment ids starting at LAST_INSERT_ID() (lastrowid).
+        """
+        if not rows:
+            return []
+
+        if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+            return list(db.scalars(
+                insert(Sale).returning(Sale.id, sort_by_parameter_order=True), rows
+            ))
+
+        result = db.execute(Sale.__table__.insert().values(rows))
+        if result.rowcount != len(rows):
+            raise RuntimeError(f"Bulk sale insert wrote {result.rowcount} of {len(rows)} rows")
+        return list(range(result.lastrowid, result.lastrowid + len(rows)))
+
+    @staticmethod
+    def load_open_lots(db: Session, tenant_id: int, variety_ids) -> Dict[int, List[SupplierInventory]]:
+        """Lots with stock left for these varieties, oldest first, locked until commit"""
+        lots: Dict[int, List[SupplierInventory]] = {variety_id: [] for variety_id in variety_ids}
+        if not lots:
+            return lots
+
+        rows = db.query(SupplierInventory).filter(
+            SupplierInventory.tenant_id == tenant_id,
+            SupplierInventory.variety_id.in_(list(lots)),
+            SupplierInventory.quantity_remaining > 0
+        ).order_by(
+            SupplierInventory.variety_id,
+            SupplierInventory.supply_date.asc(),
+            SupplierInventory.id.asc()
+        ).with_for_update().all()
+
+        for lot in rows:
+            lots[lot.variety_id].append(lot)
+        return lots
+
+    @staticmethod
+    def ingest(db: Session, tenant_id: int, rows: List[Dict], atomic: bool = False) -> Dict:
+        """
+        Record every valid row and report the rest. With atomic=True nothing is written
+        if any row is invalid. Commits once.
+        """
+        valid, errors = BulkSaleService.validate_rows(rows)
+
+        if atomic and errors:
+            return BulkSaleService._result(rows, [], errors)
+
+        resolved, variety_errors = BulkSaleService.resolve_varieties(db, tenant_id, valid)
+        errors.extend(variety_errors)
+
+        if atomic and errors:
+            db.rollback()  # drop any auto-created varieties
+            return BulkSaleService._result(rows, [], errors)
+
+        accepted = [(index, sale) for index, sale in valid if index in resolved]
+        variety_ids = {resolved[index].id for index, _ in accepted}
+        BulkSaleService.lock_varieties(db, tenant_id, variety_ids)
+        lots = BulkSaleService.load_open_lots(db, tenant_id, variety_ids)
+
+        # ========== Allocate inventory in memory (FIFO per variety, split across lots) ==========
+        planned, new_lots = [], []
+        for index, sale in accepted:
+            variety = resolved[index]
+            quantity = Decimal(str(sale.quantity))
+            cost_per_unit = Decimal(str(sale.cost_price)) / quantity
+
+            allocations, needed = [], quantity
+            for lot in lots[variety.id]:
+                if needed <= 0:
+                    break
+                take = min(lot.quantity_remaining, needed)
+                if take <= 0:
+                    continue
+                lot.quantity_used += take
+                lot.quantity_remaining -= take
+                allocations.append((lot, take))
+                needed -= take
+
+            if needed > 0:
+                # Auto-create inventory for the part no lot covers, like a single sale would
+                lot = SupplierInventory(
+                    tenant_id=tenant_id,
+                    supplier_name="To Be Updated",
+                    variety_id=variety.id,
+                    quantity=needed,
+                    price_per_item=cost_per_unit,
+                    total_amount=cost_per_unit * needed,
+                    supply_date=sale.sale_date,
+                    quantity_used=needed,
+                    quantity_remaining=Decimal('0'),
+                    quantity_returned=Decimal('0')
+                )
+                new_lots.append(lot)
+                allocations.append((lot, needed))
+
+            planned.append((index, sale, variety, allocations, quantity, cost_per_unit))
+
+        if new_lots:
+            db.add_all(new_lots)
+        db.flush()  # new lot ids + one UPDATE per touched lot
+
+        # ========== Sales (one multi-row INSERT) ==========
+        sale_rows = []
+        for index, sale, variety, allocations, quantity, cost_per_unit in planned:
+            selling_per_unit = Decimal(str(sale.selling_price)) / quantity
+            sale_rows.append({
+                "tenant_id": tenant_id,
+                "salesperson_name": sale.salesperson_name,
+                "variety_id": variety.id,
+                "quantity": quantity,
+                "selling_price": selling_per_unit,
+                "cost_price": cost_per_unit,
+                "profit": (selling_per_unit - cost_per_unit) * quantity,
+                "sale_date": sale.sale_date,
+                "supplier_inventory_id": allocations[0][0].id,  # oldest lot
+                "payment_status": sale.payment_status,
+                "customer_name": sale.customer_name
+            })
+
+        sale_ids = BulkSaleService.insert_sales(db, sale_rows)
+        # Unsaved instances carrying the inserted values, for the rollup and the references
+        sales = [Sale(id=sale_id, **row) for sale_id, row in zip(sale_ids, sale_rows)]
+
+        # ========== Ledger movements (one multi-row INSERT) ==========
+        # Same bookings as a single sale: auto-created stock as a supply, then the sale itself
+        movements = []
+
+        def book(variety, movement_type, quantity, reference_type, reference_id, notes, movement_date):
+            variety.current_stock += quantity
+            movements.append({
+                "tenant_id": tenant_id,
+                "variety_id": variety.id,
+                "movement_type": movement_type,
+                "quantity": quantity,
+                "reference_id": reference_id,
+                "reference_type": reference_type,
+                "notes": notes,
+                "movement_date": movement_date,
+                "stock_after": variety.current_stock
+            })
+
+        auto_created = set(new_lots)
+        for (index, sale, variety, allocations, quantity, _), db_sale in zip(planned, sales):
+            for lot, taken in allocations:
+                if lot in auto_created:
+                    book(variety, "supply", taken, "supplier_inventory", lot.id,
+                         f"Auto-created for sale by {sale.salesperson_name}", lot.supply_date)
+            book(variety, "sale", -quantity, "sale", db_sale.id,
+                 f"Sale by {sale.salesperson_name} (bulk upload)", sale.sale_date)
+
+        if movements:
+            db.execute(insert(InventoryMovement), movements)
+            InventoryLedger.invalidate_for_rows(db, movements)
+
+        # ========== Lot allocations (one multi-row INSERT) ==========
+        allocation_rows = [
+            {
+                "tenant_id": tenant_id,
+                "supplier_inventory_id": lot.id,
+                "variety_id": variety.id,
+                "reference_type": "sale",
+                "reference_id": db_sale.id,
+                "quantity": taken
+            }
+            for (_, _, variety, allocations, _, _), db_sale in zip(planned, sales)
+            for lot, taken in allocations
+        ]
+        if allocation_rows:
+            db.execute(insert(InventoryAllocation), allocation_rows)
+
+        SalesRollupService.add_sales(db, sales)
+
+        # The sales were inserted without the ORM flush, so bump their data version explicitly
+        if sales:
+            DataVersions.bump(db, {(tenant_id, "sales")})
+
+        db.commit()
+        print(f"✅ Bulk upload: {len(sales)} sales recorded, {len(errors)} rows rejected")
+
+        return BulkSaleService._result(rows, sale_ids, errors)
+
+    @staticmethod
+    def _result(rows: List[Dict], sale_ids: List[int], errors: List[Dict]) -> Dict:
+        return {
+            "received": len(rows),
+            "created": len(sale_ids),
+            "failed": len(errors),
+            "sale_ids": sale_ids,
+            "errors": sorted(errors, key=lambda error: error["index"])
+        }
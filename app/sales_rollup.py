@@ -0,0 +1,346 @@
+# app/sales_rollup.py - Daily sales rollup maintenance and queries
+
+from typing import Dict, List, Optional
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, delete, select, cast, Integer
+from models import Sale, DailySalesRollup, ClothVariety
+
+
+def _as_stored(value, column) -> Decimal:
+    """A value as the column stores it (DECIMAL scale, rounded half away from zero like MySQL)"""
+    return Decimal(str(value)).quantize(Decimal(1).scaleb(-column.type.scale), rounding=ROUND_HALF_UP)
+
+
+class SalesRollupService:
+    """
+    Keeps the daily_sales_rollup table in sync with the sales table.
+
+    Write paths call add_sale / remove_sale inside their own transaction (no commit here),
+    so the rollup changes are committed or rolled back together with the sale itself.
+    Report endpoints read the rollup instead of aggregating raw sales.
+    """
+
+    @staticmethod
+    def sale_contribution(sale: Sale) -> Dict:
+        """
+        Capture what a sale contributes to its rollup row (call BEFORE mutating the sale)
+        Built from the values as stored in the sales row: a just-flushed sale still holds its
+        unrounded per-unit price (100 / 3), and rebuild() / a later removal must subtract
+        exactly what was added here.
+        """
+        columns = Sale.__table__.c
+        quantity = _as_stored(sale.quantity, columns.quantity)
+        selling_price = _as_stored(sale.selling_price, columns.selling_price)
+
+        return {
+            "tenant_id": sale.tenant_id,
+            "sale_date": sale.sale_date,
+            "variety_id": sale.variety_id,
+            "salesperson_name": sale.salesperson_name,
+            "revenue": selling_price * quantity,
+            "profit": _as_stored(sale.profit, columns.profit),
+            "quantity": quantity,
+            "count": 1
+        }
+
+    @staticmethod
+    def _upsert(dialect_name: str, rows: List[Dict]):
+        """INSERT the rows, or add their totals to the existing rows, in one statement"""
+        totals = ("total_revenue", "total_profit", "total_quantity", "sales_count")
+
+        if dialect_name == "mysql":
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+            statement = dialect_insert(DailySalesRollup).values(rows)
+            return statement.on_duplicate_key_update({
+                column: getattr(DailySalesRollup, column) + getattr(statement.inserted, column)
+                for column in totals
+            })
+
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(DailySalesRollup).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=["tenant_id", "sale_date", "variety_id", "salesperson_name"],
+            set_={
+                column: getattr(DailySalesRollup, column) + getattr(statement.excluded, column)
+                for column in totals
+            }
+        )
+
+    @staticmethod
+    def apply_many(db: Session, contributions: List[Dict], sign: int = 1):
+        """
+        Add (sign=1) or subtract (sign=-1) sale contributions from their rollup rows
+
+        One upsert creates missing rows and adjusts existing ones atomically, so concurrent
+        first sales for the same key neither race on the unique key nor deadlock on gap locks.
+        Rows whose last sale was removed are deleted in a second statement.
+        """
+        if not contributions:
+            return
+
+        # Fixed key order: concurrent writers lock rows in the same order
+        contributions = sorted(contributions, key=lambda c: (
+            c["tenant_id"], c["sale_date"], c["variety_id"], c["salesperson_name"]
+        ))
+        rows = [
+            {
+                "tenant_id": contribution["tenant_id"],
+                "sale_date": contribution["sale_date"],
+                "variety_id": contribution["variety_id"],
+                "salesperson_name": contribution["salesperson_name"],
+                "total_revenue": sign * contribution["revenue"],
+                "total_profit": sign * contribution["profit"],
+                "total_quantity": sign * contribution["quantity"],
+                "sales_count": sign * contribution.get("count", 1)
+            }
+            for contribution in contributions
+        ]
+
+        connection = db.connection()
+        connection.execute(SalesRollupService._upsert(connection.dialect.name, rows))
+
+        if sign < 0:
+            # Last sale for a key is gone
+            for contribution in contributions:
+                connection.execute(
+                    delete(DailySalesRollup).where(
+                        DailySalesRollup.tenant_id == contribution["tenant_id"],
+                        DailySalesRollup.sale_date == contribution["sale_date"],
+                        DailySalesRollup.variety_id == contribution["variety_id"],
+                        DailySalesRollup.salesperson_name == contribution["salesperson_name"],
+                        DailySalesRollup.sales_count <= 0
+                    )
+                )
+
+    @staticmethod
+    def apply(db: Session, contribution: Dict, sign: int = 1):
+        """Add (sign=1) or subtract (sign=-1) a sale contribution from its rollup row"""
+        SalesRollupService.apply_many(db, [contribution], sign)
+
+    @staticmethod
+    def add_sale(db: Session, sale: Sale):
+        """Add a newly created sale to the rollup"""
+        SalesRollupService.apply(db, SalesRollupService.sale_contribution(sale), sign=1)
+
+    @staticmethod
+    def add_sales(db: Session, sales: List[Sale]):
+        """
+        Add many new sales to the rollup (bulk ingestion)
+        Contributions are summed per rollup key first, then written with one upsert
+        """
+        merged: Dict[tuple, Dict] = {}
+        for sale in sales:
+            contribution = SalesRollupService.sale_contribution(sale)
+            key = (
+                contribution["tenant_id"], contribution["sale_date"],
+                contribution["variety_id"], contribution["salesperson_name"]
+            )
+            if key not in merged:
+                merged[key] = contribution
+                continue
+            for field in ("revenue", "profit", "quantity", "count"):
+                merged[key][field] += contribution[field]
+
+        SalesRollupService.apply_many(db, list(merged.values()), sign=1)
+
+    @staticmethod
+    def remove_sale(db: Session, sale: Sale):
+        """Remove a sale (about to be deleted) from the rollup"""
+        SalesRollupService.apply(db, SalesRollupService.sale_contribution(sale), sign=-1)
+
+    @staticmethod
+    def replace_sale(db: Session, old_contribution: Dict, sale: Sale):
+        """Swap an updated sale's old contribution for its new one"""
+        SalesRollupService.apply(db, old_contribution, sign=-1)
+        SalesRollupService.add_sale(db, sale)
+
+    @staticmethod
+    def rebuild(db: Session, tenant_id: Optional[int] = None) -> int:
+        """
+        Recompute the rollup from the raw sales table (backfill / repair)
+        Rebuilds one tenant if tenant_id is given, otherwise everything. Commits.
+        """
+        delete_query = db.query(DailySalesRollup)
+        if tenant_id is not None:
+            delete_query = delete_query.filter(DailySalesRollup.tenant_id == tenant_id)
+        delete_query.delete(synchronize_session=False)
+
+        grouped = select(
+            Sale.tenant_id,
+            Sale.sale_date,
+            Sale.variety_id,
+            Sale.salesperson_name,
+            func.sum(Sale.selling_price * Sale.quantity),
+            func.sum(Sale.profit),
+            func.sum(Sale.quantity),
+            func.count(Sale.id)
+        ).group_by(
+            Sale.tenant_id, Sale.sale_date, Sale.variety_id, Sale.salesperson_name
+        )
+        if tenant_id is not None:
+            grouped = grouped.where(Sale.tenant_id == tenant_id)
+
+        result = db.execute(
+            insert(DailySalesRollup).from_select(
+                [
+                    "tenant_id", "sale_date", "variety_id", "salesperson_name",
+                    "total_revenue", "total_profit", "total_quantity", "sales_count"
+                ],
+                grouped
+            )
+        )
+        db.commit()
+
+        return result.rowcount
+
+    @staticmethod
+    def backfill_if_empty(db: Session) -> int:
+        """Populate the rollup on first start after the table was added"""
+        has_rollup = db.query(DailySalesRollup.id).first() is not None
+        has_sales = db.query(Sale.id).first() is not None
+
+        if has_rollup or not has_sales:
+            return 0
+
+        print("📊 Backfilling daily_sales_rollup from sales...")
+        return SalesRollupService.rebuild(db)
+
+    # ==================== READERS ====================
+
+    @staticmethod
+    def _summary_statement(tenant_id: int, start_date: date, end_date: date):
+        return select(
+            func.sum(DailySalesRollup.total_revenue).label('total_sales'),
+            func.sum(DailySalesRollup.total_profit).label('total_profit'),
+            func.sum(DailySalesRollup.total_quantity).label('total_quantity'),
+            cast(func.sum(DailySalesRollup.sales_count), Integer).label('sales_count')
+        ).where(
+            DailySalesRollup.tenant_id == tenant_id,
+            DailySalesRollup.sale_date >= start_date,
+            DailySalesRollup.sale_date <= end_date
+        )
+
+    @staticmethod
+    def get_summary(db: Session, tenant_id: int, start_date: date, end_date: date):
+        """Totals over a date range: total_sales, total_profit, total_quantity, sales_count"""
+        return db.execute(
+            SalesRollupService._summary_statement(tenant_id, start_date, end_date)
+        ).first()
+
+    @staticmethod
+    async def aget_summary(db: AsyncSession, tenant_id: int, start_date: date, end_date: date):
+        """Async version of get_summary"""
+        result = await db.execute(
+            SalesRollupService._summary_statement(tenant_id, start_date, end_date)
+        )
+        return result.first()
+
+    @staticmethod
+    def get_daily_series(
+        db: Session,
+        tenant_id: int,
+        start_date: date,
+        end_date: date,
+        variety_id: Optional[int] = None
+    ) -> List:
+        """Per-day rows ordered by date: sale_date, revenue, profit, quantity_sold, transaction_count"""
+        query = db.query(
+            DailySalesRollup.sale_date,
+            func.sum(DailySalesRollup.total_revenue).label('revenue'),
+            func.sum(DailySalesRollup.total_profit).label('profit'),
+            func.sum(DailySalesRollup.total_quantity).label('quantity_sold'),
+            cast(func.sum(DailySalesRollup.sales_count), Integer).label('transaction_count')
+        ).filter(
+            DailySalesRollup.tenant_id == tenant_id,
+            DailySalesRollup.sale_date >= start_date,
+            DailySalesRollup.sale_date <= end_date
+        )
+
+        if variety_id is not None:
+            query = query.filter(DailySalesRollup.variety_id == variety_id)
+
+        return query.group_by(DailySalesRollup.sale_date).order_by(DailySalesRollup.sale_date).all()
+
+    @staticmethod
+    def get_variety_daily_quantities(
+        db: Session,
+        tenant_id: int,
+        start_date: date,
+        end_date: date,
+        variety_ids: Optional[List[int]] = None
+    ) -> List:
+        """Per-variety, per-day quantities in one query: variety_id, sale_date, quantity_sold"""
+        query = db.query(
+            DailySalesRollup.variety_id,
+            DailySalesRollup.sale_date,
+            func.sum(DailySalesRollup.total_quantity).label('quantity_sold')
+        ).filter(
+            DailySalesRollup.tenant_id == tenant_id,
+            DailySalesRollup.sale_date >= start_date,
+            DailySalesRollup.sale_date <= end_date
+        )
+
+        if variety_ids is not None:
+            query = query.filter(DailySalesRollup.variety_id.in_(variety_ids))
+
+        return query.group_by(
+            DailySalesRollup.variety_id, DailySalesRollup.sale_date
+        ).order_by(
+            DailySalesRollup.variety_id, DailySalesRollup.sale_date
+        ).all()
+
+    @staticmethod
+    def get_variety_totals(db: Session, tenant_id: int, start_date: date, end_date: date) -> List:
+        """Per-variety totals joined once to the variety name: variety_id, variety_name, revenue, profit, quantity_sold"""
+        return db.query(
+            DailySalesRollup.variety_id,
+            ClothVariety.name.label('variety_name'),
+            func.sum(DailySalesRollup.total_revenue).label('revenue'),
+            func.sum(DailySalesRollup.total_profit).label('profit'),
+            func.sum(DailySalesRollup.total_quantity).label('quantity_sold')
+        ).join(
+            ClothVariety, ClothVariety.id == DailySalesRollup.variety_id
+        ).filter(
+            DailySalesRollup.tenant_id == tenant_id,
+            ClothVariety.tenant_id == tenant_id,
+            DailySalesRollup.sale_date >= start_date,
+            DailySalesRollup.sale_date <= end_date
+        ).group_by(DailySalesRollup.variety_id, ClothVariety.name).all()
+
+    @staticmethod
+    def get_breakdown(db: Session, tenant_id: int, start_date: date, end_date: date, group_column) -> List:
+        """Profit / quantity grouped by a rollup key column (e.g. variety_id or salesperson_name)"""
+        return db.query(
+            group_column,
+            func.sum(DailySalesRollup.total_profit).label('total_profit'),
+            func.sum(DailySalesRollup.total_quantity).label('total_quantity')
+        ).filter(
+            DailySalesRollup.tenant_id == tenant_id,
+            DailySalesRollup.sale_date >= start_date,
+            DailySalesRollup.sale_date <= end_date
+        ).group_by(group_column).all()
+
+
+if __name__ == "__main__":
+    # Backfill: python sales_rollup.py [--tenant-id N]
+    import argparse
+    from database import SessionLocal, Base, engine
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily_sales_rollup table from sales")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Only rebuild this tenant")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[DailySalesRollup.__table__])
+
+    db = SessionLocal()
+    try:
+        rows = SalesRollupService.rebuild(db, tenant_id=args.tenant_id)
+        print(f"✅ Rebuilt daily_sales_rollup: {rows} rows")
+    finally:
+        db.close()
@@ -3,7 +3,7 @@
 from pydantic import BaseModel, Field, field_validator
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Literal
 from models import MeasurementUnit, StockType, PaymentStatus, LoanStatus
 
 # Cloth Variety Schemas
@@ -170,6 +170,24 @@ class SaleBase(BaseModel):
 class SaleCreate(SaleBase):
     pass
 
+class BulkSaleCreate(BaseModel):
+    """End-of-day batch upload - each item has the SaleCreate shape, validated row by row"""
+    sales: List[Dict] = Field(..., min_length=1)
+
+
+class BulkSaleError(BaseModel):
+    index: int  # position in the uploaded `sales` list
+    detail: str
+
+
+class BulkSaleResponse(BaseModel):
+    received: int
+    created: int
+    failed: int
+    sale_ids: List[int]
+    errors: List[BulkSaleError]
+
+
 class SaleUpdate(BaseModel):
     """Schema for updating sale - ALL fields optional"""
     salesperson_name: Optional[str] = None
@@ -282,6 +300,22 @@ class InventoryMovementResponse(BaseModel):
         from_attributes = True
 
 
+class InventoryAsOfResponse(BaseModel):
+    variety_id: int
+    variety_name: str
+    stock: Decimal
+    snapshot_date: Optional[date] = None  # month-end snapshot the answer started from
+    delta_since_snapshot: Decimal
+
+
+class StockDriftResponse(BaseModel):
+    variety_id: int
+    variety_name: str
+    current_stock: Decimal
+    ledger_stock: Decimal
+    drift: Decimal  # current_stock - ledger_stock
+
+
 class InventoryStatusResponse(BaseModel):
     variety_id: int
     variety_name: str
@@ -293,6 +327,12 @@ class InventoryStatusResponse(BaseModel):
     total_returned: Decimal
     measurement_unit: str
 
+# Forecast Job Schemas
+class ForecastJobCreate(BaseModel):
+    kind: Literal["revenue", "demand"] = "revenue"
+    variety_id: Optional[int] = None  # Required for kind="demand"
+    days_ahead: int = Field(30, ge=7, le=90)
+
 # Loan Summary Schemas
 class CustomerLoanSummary(BaseModel):
     customer_name: str
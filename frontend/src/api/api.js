@@ -121,20 +121,50 @@ api.interceptors.response.use(
   }
 );
 
+// ✅ LIST ENDPOINTS - the server returns one page at a time (newest first) and the
+// next page's cursor in the X-Next-Cursor header.
+// List screens show one page and a "Load more" control (getPage); getAllPages follows
+// every cursor and is only for callers that really need every row (analytics, pickers)
+const LIST_PAGE_SIZE = 500; // server MAX_PAGE_SIZE
+
+export const getPage = async (url, { params, cursor } = {}) => {
+  const response = await api.get(url, {
+    params: { ...params, ...(cursor ? { cursor } : {}) },
+  });
+  return { rows: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
+export const getAllPages = async (url, config = {}) => {
+  const rows = [];
+  let cursor = null;
+  let response;
+
+  do {
+    response = await api.get(url, {
+      ...config,
+      params: { ...config.params, limit: LIST_PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+    });
+    rows.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+
+  return { ...response, data: rows };
+};
+
 // Cloth Varieties
-export const getVarieties = () => api.get('/varieties/');
+export const getVarieties = () => getAllPages('/varieties/');
 export const createVariety = (data) => api.post('/varieties/', data);
 export const updateVariety = (id, data) => api.put(`/varieties/${id}`, data);
 export const deleteVariety = (id) => api.delete(`/varieties/${id}`);
 
 // Supplier Inventory
-export const getSupplierInventory = () => api.get('/supplier/inventory');
+export const getSupplierInventory = () => getAllPages('/supplier/inventory');
 export const getSupplierInventoryByDate = (date) => api.get(`/supplier/inventory/date/${date}`);
 export const createSupplierInventory = (data) => api.post('/supplier/inventory', data);
 export const deleteSupplierInventory = (id) => api.delete(`/supplier/inventory/${id}`);
 
 // Supplier Returns
-export const getSupplierReturns = () => api.get('/supplier/returns');
+export const getSupplierReturns = () => getAllPages('/supplier/returns');
 export const getSupplierReturnsByDate = (date) => api.get(`/supplier/returns/date/${date}`);
 export const createSupplierReturn = (data) => api.post('/supplier/returns', data);
 export const deleteSupplierReturn = (id) => api.delete(`/supplier/returns/${id}`);
@@ -144,7 +174,7 @@ export const getSupplierDailySummary = (date) => api.get(`/supplier/daily-summar
 export const getSupplierWiseSummary = (date) => api.get(`/supplier/supplier-summary/${date}`);
 
 // Sales
-export const getSales = () => api.get('/sales/');
+export const getSales = () => getAllPages('/sales/');
 export const getSalesByDate = (date) => api.get(`/sales/date/${date}`);
 export const createSale = (data) => api.post('/sales/', data);
 export const deleteSale = (id) => api.delete(`/sales/${id}`);
@@ -158,7 +188,7 @@ export const getDailyReport = (date) => api.get(`/reports/daily/${date}`);
 export const getProfitReport = (date) => api.get(`/reports/profit/${date}`);
 
 // Expenses
-export const getExpenses = () => api.get('/expenses/');
+export const getExpenses = () => getAllPages('/expenses/');
 export const getExpensesByDate = (date) => api.get(`/expenses/date/${date}`);
 export const getExpensesByMonth = (year, month) => api.get(`/expenses/month/${year}/${month}`);
 export const createExpense = (data) => api.post('/expenses/', data);
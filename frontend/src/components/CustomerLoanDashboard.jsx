@@ -6,7 +6,8 @@ import {
   AlertCircle, CheckCircle, Clock,
   TrendingUp, FileText, Phone, Plus, X
 } from 'lucide-react';
-import api from '../api/api';
+import api, { getPage } from '../api/api';
+import LoadMoreButton from './LoadMoreButton';
 
 const formatDate = (date) => {
   return new Date(date).toLocaleDateString('en-US', {
@@ -21,6 +22,8 @@ export default function CustomerLoanDashboard() {
   const [searchTerm, setSearchTerm] = useState('');
   const [selectedLoan, setSelectedLoan] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filterStatus, setFilterStatus] = useState('all');
 
   // Payment modal state
@@ -37,16 +40,17 @@ export default function CustomerLoanDashboard() {
     setLoading(true);
     try {
       const [loansRes, summaryRes, customerSummaryRes] = await Promise.all([
-        api.get(`/loans/${filterStatus !== 'all' ? `?status=${filterStatus}` : ''}`),
+        getPage('/loans/', { params: loanParams() }),
         api.get('/loans/summary/status'),
         api.get('/loans/summary/customers')
       ]);
 
-      const loansData = loansRes.data;
+      const loansData = loansRes.rows;
       const summaryData = summaryRes.data;
       const customerSummaryData = customerSummaryRes.data;
 
       setLoans(Array.isArray(loansData) ? loansData : []);
+      setNextCursor(loansRes.nextCursor);
       setSummary(summaryData);
       setCustomerSummaries(Array.isArray(customerSummaryData) ? customerSummaryData : []);
     } catch (error) {
@@ -56,6 +60,21 @@ export default function CustomerLoanDashboard() {
     }
   };
 
+  const loanParams = () => (filterStatus !== 'all' ? { status: filterStatus } : {});
+
+  const loadMoreLoans = async () => {
+    setLoadingMore(true);
+    try {
+      const { rows, nextCursor: cursor } = await getPage('/loans/', { params: loanParams(), cursor: nextCursor });
+      setLoans((current) => [...current, ...(Array.isArray(rows) ? rows : [])]);
+      setNextCursor(cursor);
+    } catch (error) {
+      console.error('Error loading more loans:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSearch = async () => {
     if (!searchTerm.trim()) {
       loadData();
@@ -67,6 +86,7 @@ export default function CustomerLoanDashboard() {
       const response = await api.get(`/loans/search/${searchTerm}`);
       const data = response.data;
       setLoans(Array.isArray(data) ? data : []);
+      setNextCursor(null);  // search results come in one response
     } catch (error) {
       console.error('Error searching loans:', error);
       alert('Customer not found');
@@ -435,6 +455,10 @@ Are you sure you want to delete this loan?`;
               </table>
             )}
           </div>
+
+          {nextCursor && (
+            <LoadMoreButton onClick={loadMoreLoans} loading={loadingMore} className="pb-4 sm:pb-6" />
+          )}
         </div>
 
         {/* MOBILE-FIRST CUSTOMER SUMMARIES */}
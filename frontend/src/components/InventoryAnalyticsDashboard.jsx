@@ -6,7 +6,7 @@ import {
   Radar, PolarGrid, PolarAngleAxis, PolarRadiusAxis
 } from 'recharts';
 import { Sun, Moon } from 'lucide-react';
-import api from '../api/api';
+import { getAllPages } from '../api/api';
 
 // ==================== UTILITY FUNCTIONS ====================
 const getDateRange = (days) => {
@@ -600,10 +600,10 @@ const InventoryAnalyticsDashboard = ({ timeRange, onTimeRangeChange }) => {
       const { startDate, endDate } = getDateRange(timeRange);
 
       const [inventoryRes, returnsRes, salesRes, varietiesRes] = await Promise.all([
-        api.get('/supplier/inventory'),
-        api.get('/supplier/returns'),
-        api.get('/sales/'),
-        api.get('/varieties/')
+        getAllPages('/supplier/inventory'),
+        getAllPages('/supplier/returns'),
+        getAllPages('/sales/'),
+        getAllPages('/varieties/')
       ]);
 
       const allInventory = inventoryRes.data;
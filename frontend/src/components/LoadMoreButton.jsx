@@ -0,0 +1,14 @@
+// frontend/src/components/LoadMoreButton.jsx - "Load more" control under paged lists
+export default function LoadMoreButton({ onClick, loading, className = '' }) {
+  return (
+    <div className={`mt-4 flex justify-center ${className}`}>
+      <button
+        onClick={onClick}
+        disabled={loading}
+        className="px-5 py-2 text-sm font-medium rounded-lg border border-gray-300 bg-white text-gray-700 hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed dark:bg-gray-800 dark:text-gray-200 dark:border-gray-600 dark:hover:bg-gray-700 transition-colors"
+      >
+        {loading ? 'Loading...' : 'Load more'}
+      </button>
+    </div>
+  );
+}
@@ -3,7 +3,7 @@
 import React, { useState, useEffect } from 'react';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, Area, AreaChart } from 'recharts';
 import { Package, TrendingUp, AlertTriangle, ShoppingCart, Zap, X } from 'lucide-react';
-import api from '../api/api';
+import api, { getAllPages } from '../api/api';
 
 const ProductDemandPredictor = () => {
   const [varieties, setVarieties] = useState([]);
@@ -19,7 +19,7 @@ const ProductDemandPredictor = () => {
 
   const loadVarieties = async () => {
     try {
-      const response = await api.get('/varieties/');
+      const response = await getAllPages('/varieties/');
       const data = response.data;
       setVarieties(data);
       if (data.length > 0) {
@@ -4,7 +4,8 @@ import {
   CheckCircle, Clock, User, RotateCcw,
   AlertCircle, ChevronDown, ChevronUp, AlertTriangle, Search
 } from 'lucide-react';
-import api from '../api/api';
+import api, { getAllPages, getPage } from '../api/api';
+import LoadMoreButton from './LoadMoreButton';
 
 const formatDate = (date) => {
   const d = new Date(date);
@@ -15,6 +16,9 @@ const ShopkeeperStockManagement = () => {
   const [varieties, setVarieties] = useState([]);
   const [shopkeepers, setShopkeepers] = useState([]);
   const [issuedStock, setIssuedStock] = useState([]);
+  const [shopkeeperSummaries, setShopkeeperSummaries] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedShopkeeper, setSelectedShopkeeper] = useState(null);
   const [expandedRecord, setExpandedRecord] = useState(null);
   const [loading, setLoading] = useState(false);
@@ -55,13 +59,16 @@ const ShopkeeperStockManagement = () => {
 
   useEffect(() => {
     loadVarieties();
-    loadIssuedStock();
     loadSupplierInventories();
   }, []);
 
+  useEffect(() => {
+    loadIssuedStock();
+  }, [selectedShopkeeper]);
+
   const loadVarieties = async () => {
     try {
-      const response = await api.get('/varieties/');
+      const response = await getAllPages('/varieties/');
       setVarieties(Array.isArray(response.data) ? response.data : []);
     } catch (error) {
       console.error('Error loading varieties:', error);
@@ -71,12 +78,17 @@ const ShopkeeperStockManagement = () => {
   const loadIssuedStock = async () => {
     setLoading(true);
     try {
-      const response = await api.get('/shopkeeper-stock/');
-      const data = response.data;
-      setIssuedStock(Array.isArray(data) ? data : []);
-
-      const uniqueShopkeepers = [...new Set(data.map(item => item.shopkeeper_name))];
-      setShopkeepers(uniqueShopkeepers);
+      // One page of records; totals and shopkeeper names come from the per-shopkeeper summary
+      const [page, summaryRes] = await Promise.all([
+        getPage('/shopkeeper-stock/', { params: stockParams() }),
+        api.get('/shopkeeper-stock/summary/by-shopkeeper')
+      ]);
+      setIssuedStock(Array.isArray(page.rows) ? page.rows : []);
+      setNextCursor(page.nextCursor);
+
+      const summaries = Array.isArray(summaryRes.data) ? summaryRes.data : [];
+      setShopkeeperSummaries(summaries);
+      setShopkeepers(summaries.map(item => item.shopkeeper_name));
     } catch (error) {
       console.error('Error loading issued stock:', error);
     } finally {
@@ -84,9 +96,24 @@ const ShopkeeperStockManagement = () => {
     }
   };
 
+  const stockParams = () => (selectedShopkeeper ? { shopkeeper_name: selectedShopkeeper } : {});
+
+  const loadMoreIssuedStock = async () => {
+    setLoadingMore(true);
+    try {
+      const { rows, nextCursor: cursor } = await getPage('/shopkeeper-stock/', { params: stockParams(), cursor: nextCursor });
+      setIssuedStock((current) => [...current, ...(Array.isArray(rows) ? rows : [])]);
+      setNextCursor(cursor);
+    } catch (error) {
+      console.error('Error loading more issued stock:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const loadSupplierInventories = async () => {
     try {
-      const response = await api.get('/supplier/inventory');
+      const response = await getAllPages('/supplier/inventory');
       setSupplierInventories(Array.isArray(response.data) ? response.data : []);
     } catch (error) {
       console.error('Error loading supplier inventories:', error);
@@ -318,10 +345,16 @@ const ShopkeeperStockManagement = () => {
     ? issuedStock.filter(item => item.shopkeeper_name === selectedShopkeeper)
     : issuedStock;
 
-  const totalIssued = filteredStock.reduce((sum, item) => sum + parseFloat(item.quantity_issued), 0);
-  const totalSold = filteredStock.reduce((sum, item) => sum + parseFloat(item.quantity_sold), 0);
-  const totalReturned = filteredStock.reduce((sum, item) => sum + parseFloat(item.quantity_returned), 0);
-  const totalRemaining = filteredStock.reduce((sum, item) => sum + parseFloat(item.quantity_remaining), 0);
+  // Totals over every record (not just the loaded pages)
+  const selectedSummaries = selectedShopkeeper
+    ? shopkeeperSummaries.filter(item => item.shopkeeper_name === selectedShopkeeper)
+    : shopkeeperSummaries;
+
+  const totalIssued = selectedSummaries.reduce((sum, item) => sum + item.total_issued, 0);
+  const totalSold = selectedSummaries.reduce((sum, item) => sum + item.total_sold, 0);
+  const totalReturned = selectedSummaries.reduce((sum, item) => sum + item.total_returned, 0);
+  const totalRemaining = selectedSummaries.reduce((sum, item) => sum + item.total_remaining, 0);
+  const totalRecords = selectedSummaries.reduce((sum, item) => sum + item.total_records, 0);
 
   return (
     <div className="min-h-screen bg-gray-50 p-6">
@@ -635,7 +668,7 @@ const ShopkeeperStockManagement = () => {
           <div className="p-6 border-b border-gray-200">
             <h3 className="text-xl font-bold text-gray-800">Issued Stock Records</h3>
             <p className="text-sm text-gray-600 mt-1">
-              {filteredStock.length} record{filteredStock.length !== 1 ? 's' : ''}
+              {nextCursor ? `Showing ${filteredStock.length} of ${totalRecords}` : filteredStock.length} record{filteredStock.length !== 1 ? 's' : ''}
               {selectedShopkeeper && ` for ${selectedShopkeeper}`}
             </p>
           </div>
@@ -769,6 +802,10 @@ const ShopkeeperStockManagement = () => {
               ))}
             </div>
           )}
+
+          {!loading && nextCursor && (
+            <LoadMoreButton onClick={loadMoreIssuedStock} loading={loadingMore} className="pb-6" />
+          )}
         </div>
 
         {/* Sales Modal */}
@@ -6,7 +6,7 @@ import {
   Volume2, StopCircle, Package, DollarSign, TrendingUp,
   Calendar, CreditCard, Wallet, ShoppingBag, Info, X, Plus
 } from 'lucide-react';
-import api from '../api/api';
+import api, { getAllPages } from '../api/api';
 import { useAuth } from '../context/AuthContext';
 
 const formatDate = (date) => {
@@ -63,7 +63,7 @@ const VoiceSalesComponent = () => {
 
   const loadVarieties = async () => {
     try {
-      const response = await api.get('/varieties/');
+      const response = await getAllPages('/varieties/');
       setVarieties(Array.isArray(response.data) ? response.data : []);
     } catch (error) {
       console.error('Error loading varieties:', error);
@@ -1,4 +1,4 @@
-import api from '../../api/api'
+import { getAllPages } from '../../api/api'
 import { TrendingUp, TrendingDown, DollarSign, ShoppingCart, Package, Award, AlertCircle, Users, Calendar } from 'lucide-react';
 
 
@@ -11,10 +11,10 @@ const getItemCount = (quantity, unit) => {
 export const fetchAnalyticsByDateRange = async (startDate, endDate) => {
   try {
     const [salesRes, inventoryRes, returnsRes, varietiesRes] = await Promise.all([
-      api.get('/sales/'),
-      api.get('/supplier/inventory'),
-      api.get('/supplier/returns'),
-      api.get('/varieties/')
+      getAllPages('/sales/'),
+      getAllPages('/supplier/inventory'),
+      getAllPages('/supplier/returns'),
+      getAllPages('/varieties/')
     ]);
 
     const [allSales, allInventory, allReturns, varieties] = [
@@ -1,7 +1,7 @@
 // frontend/src/pages/Dashboard.jsx - WITH UNIFIED SKELETON SYSTEM
 import { useState, useEffect } from 'react';
 import { TrendingUp, Package, ShoppingCart } from 'lucide-react';
-import api from '../api/api';
+import api, { getAllPages } from '../api/api';
 
 // NEW: Single import from unified skeleton
 import { SkeletonStatCard , StatCard} from '../components/skeleton/UnifiedSkeleton'
@@ -36,7 +36,7 @@ export default function Dashboard() {
       const [reportRes, salesRes, varietiesRes] = await Promise.all([
         api.get(`/reports/daily/${date}`),
         api.get(`/sales/date/${date}`),
-        api.get('/varieties/')
+        getAllPages('/varieties/')
       ]);
 
       const reportData = reportRes.data;
@@ -3,7 +3,7 @@ import { useState, useEffect } from 'react';
 import { Plus, Calendar, Trash2, Package, DollarSign, TrendingUp, AlertCircle, Edit2, ChevronDown, ChevronUp, Eye } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 import SalesForm from '../components/SaleForm';
-import api from '../api/api';
+import api, { getAllPages } from '../api/api';
 
 import { EditSaleModal } from '../components/core/SaleFunc';
 import { SkeletonStatCard, SkeletonMobileCard, SkeletonTableRow } from '../components/skeleton/UnifiedSkeleton';
@@ -100,7 +100,7 @@ export default function ModernSalesWithProgressiveDisclosure() {
 
   const loadVarieties = async () => {
     try {
-      const response = await api.get('/varieties/');
+      const response = await getAllPages('/varieties/');
       setVarieties(Array.isArray(response.data) ? response.data : []);
     } catch (error) {
       console.error('Error loading varieties:', error);
@@ -116,7 +116,7 @@ export default function ModernSalesWithProgressiveDisclosure() {
 
   const loadSupplierInventories = async () => {
     try {
-      const response = await api.get('/supplier/inventory');
+      const response = await getAllPages('/supplier/inventory');
       setSupplierInventories(Array.isArray(response.data) ? response.data : []);
     } catch (error) {
       console.error('Error loading supplier inventories:', error);
@@ -6,7 +6,7 @@ import {
   Boxes, RotateCcw, CheckCircle, AlertCircle, Search, ChevronDown
 } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
-import api from '../api/api';
+import api, { getAllPages } from '../api/api';
 
 import { SkeletonStatCard, SkeletonDailyCard, SkeletonGroupCard } from '../components/skeleton/UnifiedSkeleton';
 
@@ -107,7 +107,7 @@ const DailyCard = ({ date, dayData, onClick }) => {
 export default function ModernSupplierInventory() {
   const [varieties, setVarieties] = useState([]);
   const [inventory, setInventory] = useState([]);
-  const [allInventory, setAllInventory] = useState([]);
+  const [inventoryTotals, setInventoryTotals] = useState(null);
   const [loading, setLoading] = useState(true);
   const [initialLoading, setInitialLoading] = useState(true);
   const [showForm, setShowForm] = useState(false);
@@ -144,7 +144,7 @@ export default function ModernSupplierInventory() {
 
   const loadVarieties = async () => {
     try {
-      const response = await api.get('/varieties/');
+      const response = await getAllPages('/varieties/');
       setVarieties(Array.isArray(response.data) ? response.data : []);
     } catch (error) {
       console.error('Error loading varieties:', error);
@@ -153,8 +153,8 @@ export default function ModernSupplierInventory() {
 
   const loadAllInventory = async () => {
     try {
-      const response = await api.get('/supplier/inventory');
-      setAllInventory(Array.isArray(response.data) ? response.data : []);
+      const response = await api.get('/supplier/inventory/totals');
+      setInventoryTotals(response.data);
       setInitialLoading(false);
     } catch (error) {
       console.error('Error loading all inventory:', error);
@@ -165,15 +165,16 @@ export default function ModernSupplierInventory() {
   const loadMonthlyInventory = async () => {
     setLoading(true);
     try {
-      const response = await api.get('/supplier/inventory');
-      const data = response.data;
-
-      const filtered = (Array.isArray(data) ? data : []).filter(item => {
-        const itemDate = new Date(item.supply_date);
-        return itemDate.getMonth() === currentMonth && itemDate.getFullYear() === currentYear;
-      }).sort((a, b) => new Date(b.supply_date) - new Date(a.supply_date));
+      // Only the selected month is fetched; the server filters by supply date
+      const response = await getAllPages('/supplier/inventory', {
+        params: {
+          start_date: formatDate(new Date(currentYear, currentMonth, 1)),
+          end_date: formatDate(new Date(currentYear, currentMonth + 1, 0))
+        }
+      });
+      const data = Array.isArray(response.data) ? response.data : [];
 
-      setInventory(filtered);
+      setInventory([...data].sort((a, b) => new Date(b.supply_date) - new Date(a.supply_date)));
     } catch (error) {
       console.error('Error loading inventory:', error);
     } finally {
@@ -271,11 +272,11 @@ export default function ModernSupplierInventory() {
   };
 
   const overallStats = {
-    totalQuantity: allInventory.reduce((sum, item) => sum + parseFloat(item.quantity), 0),
-    totalUsed: allInventory.reduce((sum, item) => sum + parseFloat(item.quantity_used), 0),
-    totalReturned: allInventory.reduce((sum, item) => sum + parseFloat(item.quantity_returned || 0), 0),
-    totalRemaining: allInventory.reduce((sum, item) => sum + parseFloat(item.quantity_remaining), 0),
-    totalValue: allInventory.reduce((sum, item) => sum + parseFloat(item.total_amount), 0)
+    totalQuantity: inventoryTotals?.total_quantity || 0,
+    totalUsed: inventoryTotals?.total_used || 0,
+    totalReturned: inventoryTotals?.total_returned || 0,
+    totalRemaining: inventoryTotals?.total_remaining || 0,
+    totalValue: inventoryTotals?.total_value || 0
   };
 
   const groupedBySupplier = inventory.reduce((acc, item) => {
@@ -2,7 +2,7 @@
 import { useState, useEffect } from 'react';
 import { Plus, Trash2, TrendingDown, RotateCcw, ChevronLeft, ChevronRight, AlertCircle, X, Eye, ChevronDown } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
-import api from '../api/api';
+import api, { getAllPages } from '../api/api';
 
 import { SkeletonStatCard, SkeletonGroupCard } from '../components/skeleton/UnifiedSkeleton';
 
@@ -108,7 +108,7 @@ export default function ModernSupplierReturns() {
 
   const loadVarieties = async () => {
     try {
-      const response = await api.get('/varieties/');
+      const response = await getAllPages('/varieties/');
       setVarieties(Array.isArray(response.data) ? response.data : []);
     } catch (error) {
       console.error('Error loading varieties:', error);
@@ -117,7 +117,7 @@ export default function ModernSupplierReturns() {
 
   const loadSupplierInventories = async () => {
     try {
-      const response = await api.get('/supplier/inventory');
+      const response = await getAllPages('/supplier/inventory');
       setSupplierInventories(Array.isArray(response.data) ? response.data : []);
       setInitialLoading(false);
     } catch (error) {
@@ -129,15 +129,16 @@ export default function ModernSupplierReturns() {
   const loadMonthlyReturns = async () => {
     setLoading(true);
     try {
-      const response = await api.get('/supplier/returns');
-      const data = response.data;
-      
-      const filtered = (Array.isArray(data) ? data : []).filter(item => {
-        const itemDate = new Date(item.return_date);
-        return itemDate.getMonth() === currentMonth && itemDate.getFullYear() === currentYear;
-      }).sort((a, b) => new Date(b.return_date) - new Date(a.return_date));
+      // Only the selected month is fetched; the server filters by return date
+      const response = await getAllPages('/supplier/returns', {
+        params: {
+          start_date: formatDate(new Date(currentYear, currentMonth, 1)),
+          end_date: formatDate(new Date(currentYear, currentMonth + 1, 0))
+        }
+      });
+      const data = Array.isArray(response.data) ? response.data : [];
       
-      setReturns(filtered);
+      setReturns([...data].sort((a, b) => new Date(b.return_date) - new Date(a.return_date)));
     } catch (error) {
       console.error('Error loading returns:', error);
     } finally {
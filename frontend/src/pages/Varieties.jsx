@@ -1,13 +1,16 @@
 // frontend/src/pages/Varieties.jsx - WITH MODERN SKELETON LOADING UI
 import { useState, useEffect } from 'react';
 import { Plus, Trash2, Edit2, X, Save, Package } from 'lucide-react';
-import api from '../api/api';
+import api, { getPage } from '../api/api';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 import { SkeletonMobileCard , SkeletonTableRow } from '../components/skeleton/UnifiedSkeleton'
 
 export default function Varieties() {
   const [varieties, setVarieties] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showForm, setShowForm] = useState(false);
   const [editingId, setEditingId] = useState(null);
 
@@ -32,8 +35,9 @@ export default function Varieties() {
   const loadVarieties = async () => {
     setLoading(true);
     try {
-      const res = await api.get('/varieties/');
-      setVarieties(Array.isArray(res.data) ? res.data : []);
+      const { rows, nextCursor } = await getPage('/varieties/');
+      setVarieties(Array.isArray(rows) ? rows : []);
+      setNextCursor(nextCursor);
     } catch (error) {
       console.error('Failed to load varieties:', error);
       alert('Failed to load varieties');
@@ -42,6 +46,19 @@ export default function Varieties() {
     }
   };
 
+  const loadMoreVarieties = async () => {
+    setLoadingMore(true);
+    try {
+      const { rows, nextCursor: cursor } = await getPage('/varieties/', { cursor: nextCursor });
+      setVarieties((current) => [...current, ...(Array.isArray(rows) ? rows : [])]);
+      setNextCursor(cursor);
+    } catch (error) {
+      console.error('Failed to load more varieties:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSubmit = async () => {
     const payload = {
       name: formData.name,
@@ -411,9 +428,13 @@ export default function Varieties() {
         )}
       </div>
 
+      {!loading && nextCursor && (
+        <LoadMoreButton onClick={loadMoreVarieties} loading={loadingMore} />
+      )}
+
       {!loading && varieties.length > 0 && (
         <div className="mt-4 text-xs sm:text-sm text-gray-500 dark:text-gray-400 text-center">
-          Total: {varieties.length} {varieties.length === 1 ? 'variety' : 'varieties'}
+          {nextCursor ? 'Showing' : 'Total:'} {varieties.length} {varieties.length === 1 ? 'variety' : 'varieties'}
         </div>
       )}
 